@@ -0,0 +1,74 @@
+''' Benchmark the knock and gin cards of Gin Rummy computed on bitboards,
+with and without the cached meld clusters, and the games per second of
+random agents
+'''
+import time
+import argparse
+
+import rlcard
+from rlcard.agents import RandomAgent
+from rlcard.games.gin_rummy import judge
+from rlcard.games.gin_rummy.utils import melding
+
+def get_hands(env, num_hands):
+    ''' Get the hands of 11 cards of the players in random games
+    '''
+    hands = []
+    while len(hands) < num_hands:
+        env.reset()
+        while not env.is_over() and len(hands) < num_hands:
+            player = env.game.round.get_current_player()
+            if len(player.hand) == 11:
+                hands.append(list(player.hand))
+            env.step(env.np_random.choice(list(env._get_legal_actions().keys())))
+    return hands
+
+def clear_caches():
+    melding.get_meld_cluster_masks.cache_clear()
+    melding.get_best_meld_cluster_masks.cache_clear()
+    judge._get_going_out_masks.cache_clear()
+
+def run(args):
+    env = rlcard.make('gin-rummy', config={'seed': args.seed})
+    hands = get_hands(env, args.num_hands)
+    print('{:<24}{:>12}{:>18}'.format('going out cards', 'hands', 'decisions/hour'))
+    for name in ['uncached', 'cached']:
+        clear_caches()
+        if name == 'cached':
+            for hand in hands:
+                judge.get_going_out_cards(hand, 10)
+        start = time.perf_counter()
+        for hand in hands:
+            if name == 'uncached':
+                clear_caches()
+            judge.get_going_out_cards(hand, 10)
+        elapsed = time.perf_counter() - start
+        print('{:<24}{:>12}{:>18.3g}'.format(name, len(hands), len(hands) * 3600 / elapsed))
+
+    env.set_agents([RandomAgent(num_actions=env.num_actions) for _ in range(env.num_players)])
+    start = time.perf_counter()
+    for _ in range(args.num_games):
+        env.run(is_training=False)
+    print('{} random games: {:.1f} games/second'.format(args.num_games, args.num_games / (time.perf_counter() - start)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Gin Rummy melding benchmark")
+    parser.add_argument(
+        '--num_hands',
+        type=int,
+        default=5000,
+    )
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=200,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
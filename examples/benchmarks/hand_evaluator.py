@@ -0,0 +1,61 @@
+''' Benchmark the table-driven hand evaluator against the `Hand` class on
+random 7-card hold'em hands
+'''
+import time
+import argparse
+import numpy as np
+
+from rlcard.games.limitholdem.evaluator import (
+    ID_TO_CARD,
+    evaluate,
+    evaluate_batch,
+    get_category,
+)
+from rlcard.games.limitholdem.utils import Hand
+
+def run(args):
+    np_random = np.random.RandomState(args.seed)
+    card_ids = np.argsort(np_random.rand(args.num_hands, 52), axis=1)[:, :7]
+    card_strings = [[ID_TO_CARD[card_id] for card_id in hand] for hand in card_ids.tolist()]
+
+    start = time.perf_counter()
+    categories = []
+    for cards in card_strings:
+        hand = Hand(cards)
+        hand.evaluateHand()
+        categories.append(hand.category)
+    hand_time = time.perf_counter() - start
+
+    evaluate(card_ids[0].tolist())  # Build the tables outside of the timings
+    hands = card_ids.tolist()
+    start = time.perf_counter()
+    strengths = [evaluate(hand) for hand in hands]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_strengths = evaluate_batch(card_ids)
+    batch_time = time.perf_counter() - start
+
+    assert get_category(np.array(strengths)).tolist() == categories
+    assert batch_strengths.tolist() == strengths
+
+    print('{:<16}{:>16}{:>12}'.format('evaluator', 'hands/second', 'speedup'))
+    for name, seconds in [('Hand', hand_time), ('evaluate', scalar_time), ('evaluate_batch', batch_time)]:
+        print('{:<16}{:>16.0f}{:>12.1f}'.format(name, args.num_hands / seconds, hand_time / seconds))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Hold'em hand evaluator benchmark")
+    parser.add_argument(
+        '--num_hands',
+        type=int,
+        default=100000,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,54 @@
+''' Benchmark the games per second of random agents on Mahjong with the cached
+win detection on tile counts against judging the hands from their strings at
+every step (the former way)
+'''
+import time
+import argparse
+
+import rlcard
+from rlcard.agents import RandomAgent
+from rlcard.games.mahjong.judger import MahjongJudger
+
+def use_string_judger(game):
+    ''' Make the judger of the game judge the hands from their strings
+    '''
+    def judge_hu(player):
+        return MahjongJudger.judge_hand([card.get_str() for card in player.hand], len(player.pile))
+
+    init_game = game.init_game
+
+    def patched_init_game():
+        result = init_game()
+        game.judger.judge_hu = judge_hu
+        return result
+
+    game.init_game = patched_init_game
+
+def run(args):
+    print('{:<10}{:>12}{:>14}'.format('judger', 'games', 'games/second'))
+    for name in ['strings', 'counts']:
+        env = rlcard.make('mahjong', config={'seed': args.seed})
+        env.set_agents([RandomAgent(num_actions=env.num_actions) for _ in range(env.num_players)])
+        if name == 'strings':
+            use_string_judger(env.game)
+        start = time.perf_counter()
+        for _ in range(args.num_games):
+            env.run(is_training=False)
+        print('{:<10}{:>12}{:>14.1f}'.format(name, args.num_games, args.num_games / (time.perf_counter() - start)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Mahjong win detection benchmark")
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=200,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
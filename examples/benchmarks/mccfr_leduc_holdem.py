@@ -0,0 +1,68 @@
+''' Benchmark exploitability against wall-clock time of CFR (chance sampling)
+and Monte Carlo CFR (external and outcome sampling) on Leduc Hold'em
+'''
+import time
+import argparse
+
+import rlcard
+from rlcard.agents import CFRAgent
+from rlcard.agents.mccfr_agent import (
+    ExternalSamplingMCCFRAgent,
+    OutcomeSamplingMCCFRAgent,
+)
+from rlcard.utils import set_seed
+from rlcard.utils.exploitability import GameTree
+
+AGENTS = {
+    'cfr': CFRAgent,
+    'external-sampling': ExternalSamplingMCCFRAgent,
+    'outcome-sampling': OutcomeSamplingMCCFRAgent,
+}
+
+def run(args):
+    set_seed(args.seed)
+    eval_env = rlcard.make('leduc-holdem', config={'seed': args.seed, 'allow_step_back': True})
+    # The game tree is enumerated once for all the evaluations
+    tree = GameTree(eval_env)
+
+    print('{:<20}{:>12}{:>12}{:>16}'.format('algorithm', 'iterations', 'seconds', 'exploitability'))
+    for name in args.algorithms:
+        env = rlcard.make('leduc-holdem', config={'seed': args.seed, 'allow_step_back': True})
+        agent = AGENTS[name](env)
+        # Only the training time is counted, not the evaluation time
+        train_time, next_eval = 0.0, 0.0
+        while train_time < args.time_budget:
+            start = time.perf_counter()
+            agent.train()
+            train_time += time.perf_counter() - start
+            if train_time >= next_eval or train_time >= args.time_budget:
+                print('{:<20}{:>12}{:>12.2f}{:>16.4f}'.format(name, agent.iteration, train_time, tree.exploitability(agent)))
+                next_eval += args.eval_every
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("MCCFR benchmark on Leduc Hold'em")
+    parser.add_argument(
+        '--algorithms',
+        nargs='*',
+        default=list(AGENTS.keys()),
+        choices=list(AGENTS.keys()),
+    )
+    parser.add_argument(
+        '--time_budget',
+        type=float,
+        default=60,
+    )
+    parser.add_argument(
+        '--eval_every',
+        type=float,
+        default=10,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
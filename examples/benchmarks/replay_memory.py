@@ -0,0 +1,73 @@
+''' Benchmark the uniform and the prioritized replay memories of DQN
+'''
+import time
+import argparse
+
+import numpy as np
+
+from rlcard.agents.dqn_agent import Memory, PrioritizedMemory
+
+def fill(memory, args):
+    ''' Fill the memory with random transitions, in chunks of equal states to keep it fast
+    '''
+    states = np.random.rand(1000, args.state_size).astype(np.float32)
+    for i in range(args.memory_size):
+        state = states[i % len(states)]
+        memory.save(state, i % args.num_actions, 0.0, state, [i % args.num_actions], False)
+
+def run(args):
+    np.random.seed(args.seed)
+    print('{:<14}{:>14}{:>18}{:>18}'.format('memory', 'saves/second', 'batches/second', 'samples/second'))
+    for name, memory in [('uniform', Memory(args.memory_size, args.batch_size, args.num_actions)),
+                         ('prioritized', PrioritizedMemory(args.memory_size, args.batch_size, args.num_actions))]:
+        start = time.perf_counter()
+        fill(memory, args)
+        saves_per_second = args.memory_size / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(args.num_batches):
+            if name == 'prioritized':
+                indices = memory.sample(beta=0.4)[-2]
+                memory.update_priorities(indices, np.random.randn(args.batch_size))
+            else:
+                memory.sample()
+        batches_per_second = args.num_batches / (time.perf_counter() - start)
+        print('{:<14}{:>14.0f}{:>18.0f}{:>18.0f}'.format(name, saves_per_second, batches_per_second,
+                                                        batches_per_second * args.batch_size))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Replay memory benchmark of DQN")
+    parser.add_argument(
+        '--memory_size',
+        type=int,
+        default=1000000,
+    )
+    parser.add_argument(
+        '--batch_size',
+        type=int,
+        default=32,
+    )
+    parser.add_argument(
+        '--state_size',
+        type=int,
+        default=72,
+    )
+    parser.add_argument(
+        '--num_actions',
+        type=int,
+        default=4,
+    )
+    parser.add_argument(
+        '--num_batches',
+        type=int,
+        default=10000,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,80 @@
+''' Benchmark the CFR traversals on Leduc and Limit Hold'em with the undo log
+of the games against snapshots made by deepcopy (the former way of stepping back)
+'''
+import time
+import argparse
+from copy import deepcopy
+
+import rlcard
+from rlcard.agents import CFRAgent
+
+def use_deepcopy_snapshots(game):
+    ''' Make the game snapshot all its fields with deepcopy before each step
+    '''
+    step, snapshots = game.step, []
+    game.allow_step_back = False
+
+    def snapshot_step(action):
+        # The game itself is not copied, since its judge may refer to it
+        snapshots.append(deepcopy({k: v for k, v in vars(game).items() if k not in ('step', 'step_back')}, {id(game): game}))
+        return step(action)
+
+    def snapshot_step_back():
+        if not snapshots:
+            return False
+        vars(game).update(snapshots.pop())
+        return True
+
+    game.step, game.step_back = snapshot_step, snapshot_step_back
+
+def count_steps(env):
+    ''' Count the calls to step of the environment
+    '''
+    step = env.step
+    env.num_steps = 0
+
+    def counted_step(action, raw_action=False):
+        env.num_steps += 1
+        return step(action, raw_action)
+
+    env.step = counted_step
+
+def run(args):
+    print('{:<16}{:<12}{:>12}{:>16}{:>10}'.format('game', 'step_back', 'iterations', 'steps/second', 'speedup'))
+    for env_id in args.env_ids:
+        baseline = None
+        for mode in ['deepcopy', 'undo log']:
+            env = rlcard.make(env_id, config={'seed': args.seed, 'allow_step_back': True})
+            if mode == 'deepcopy':
+                use_deepcopy_snapshots(env.game)
+            count_steps(env)
+            agent = CFRAgent(env)
+            start = time.perf_counter()
+            while time.perf_counter() - start < args.time_budget:
+                agent.train()
+            steps_per_second = env.num_steps / (time.perf_counter() - start)
+            baseline = baseline or steps_per_second
+            print('{:<16}{:<12}{:>12}{:>16.0f}{:>10.1f}'.format(env_id, mode, agent.iteration,
+                                                              steps_per_second, steps_per_second / baseline))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Step back benchmark with CFR")
+    parser.add_argument(
+        '--env_ids',
+        nargs='*',
+        default=['leduc-holdem', 'limit-holdem'],
+    )
+    parser.add_argument(
+        '--time_budget',
+        type=float,
+        default=10,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,60 @@
+''' Benchmark the step/step_back pairs per second on Gin Rummy and Bridge,
+trying every legal action along random games as a tree search does, with
+the undo log of the games against snapshots made by deepcopy
+'''
+import time
+import argparse
+
+import numpy as np
+
+import rlcard
+
+from step_back import use_deepcopy_snapshots
+
+def run(args):
+    print('{:<16}{:<12}{:>12}{:>16}{:>10}'.format('game', 'step_back', 'pairs', 'pairs/second', 'speedup'))
+    for env_id in args.env_ids:
+        baseline = None
+        for mode in ['deepcopy', 'undo log']:
+            env = rlcard.make(env_id, config={'seed': args.seed, 'allow_step_back': True})
+            if mode == 'deepcopy':
+                use_deepcopy_snapshots(env.game)
+            rng = np.random.RandomState(args.seed)
+            num_pairs, elapsed = 0, 0.0
+            for _ in range(args.num_games):
+                state, _ = env.reset()
+                while not env.is_over():
+                    legal_actions = list(state['legal_actions'].keys())
+                    start = time.perf_counter()
+                    for action in legal_actions:
+                        env.step(action)
+                        env.step_back()
+                    elapsed += time.perf_counter() - start
+                    num_pairs += len(legal_actions)
+                    state, _ = env.step(rng.choice(legal_actions))
+            pairs_per_second = num_pairs / elapsed
+            baseline = baseline or pairs_per_second
+            print('{:<16}{:<12}{:>12}{:>16.0f}{:>10.1f}'.format(env_id, mode, num_pairs,
+                                                              pairs_per_second, pairs_per_second / baseline))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Step/step_back pairs benchmark")
+    parser.add_argument(
+        '--env_ids',
+        nargs='*',
+        default=['gin-rummy', 'bridge'],
+    )
+    parser.add_argument(
+        '--num_games',
+        type=int,
+        default=20,
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+    )
+
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,48 @@
+''' Summarize the stage timings of a DMC run and report its bottleneck
+'''
+import os
+import argparse
+
+from rlcard.agents.dmc_agent.metrics import (
+    STAGES,
+    read_records,
+    summarize,
+)
+
+def report(args):
+    records = read_records(os.path.join(args.log_dir, 'metrics.jsonl'))
+    if args.last > 0:
+        records = records[-args.last:]
+    summary, bottleneck = summarize(records)
+
+    print('{:<28}{:>12}{:>14}{:>10}'.format('stage', 'count', 'mean (ms)', 'share'))
+    for stage in STAGES:
+        print('{:<28}{:>12}{:>14.3f}{:>9.1f}%'.format(
+            stage,
+            summary[stage]['count'],
+            summary[stage]['mean'] * 1000,
+            summary[stage]['share'] * 100,
+        ))
+    if records:
+        print('Full queue depths: {}'.format(records[-1]['full_queue_depths']))
+        print('Free queue depths: {}'.format(records[-1]['free_queue_depths']))
+    print(bottleneck)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser("Stage timing report of DMC")
+    parser.add_argument(
+        '--log_dir',
+        type=str,
+        default='experiments/dmc_result/leduc_holdem',
+        help='The directory of the run, containing metrics.jsonl',
+    )
+    parser.add_argument(
+        '--last',
+        type=int,
+        default=0,
+        help='Only summarize the last records, 0 for all',
+    )
+
+    args = parser.parse_args()
+
+    report(args)
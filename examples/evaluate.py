@@ -12,6 +12,7 @@ from rlcard.utils import (
     get_device,
     set_seed,
     tournament,
+    parallel_tournament,
 )
 
 def load_model(model_path, env=None, position=None, device=None):
@@ -50,9 +51,21 @@ def evaluate(args):
     env.set_agents(agents)
 
     # Evaluate
-    rewards = tournament(env, args.num_games)
-    for position, reward in enumerate(rewards):
-        print(position, args.models[position], reward)
+    if args.num_workers > 1:
+        rewards, intervals = parallel_tournament(
+            args.env,
+            agents,
+            args.num_games,
+            config={'seed': args.seed},
+            seed=args.seed,
+            num_workers=args.num_workers,
+        )
+        for position, (reward, interval) in enumerate(zip(rewards, intervals)):
+            print(position, args.models[position], reward, '+/-', interval)
+    else:
+        rewards = tournament(env, args.num_games)
+        for position, reward in enumerate(rewards):
+            print(position, args.models[position], reward)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser("Evaluation example in RLCard")
@@ -94,6 +107,11 @@ if __name__ == '__main__':
         type=int,
         default=10000,
     )
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=1,
+    )
 
     args = parser.parse_args()
 
@@ -8,6 +8,7 @@ from rlcard.agents import (
     CFRAgent,
     RandomAgent,
 )
+from rlcard.agents.parallel_cfr import ParallelCFRTrainer
 from rlcard.utils import (
     set_seed,
     tournament,
@@ -35,14 +36,30 @@ def train(args):
     set_seed(args.seed)
 
     # Initilize CFR Agent
-    agent = CFRAgent(
-        env,
-        os.path.join(
-            args.log_dir,
-            'cfr_model',
-        ),
-    )
-    agent.load()  # If we have saved model, we first load the model
+    if args.num_workers > 1:
+        # Run the traversals in worker processes
+        trainer = ParallelCFRTrainer(
+            'leduc-holdem',
+            num_workers=args.num_workers,
+            config={
+                'seed': 0,
+            },
+            seed=args.seed,
+            model_path=os.path.join(
+                args.log_dir,
+                'cfr_model',
+            ),
+        )
+        agent = trainer.agent
+    else:
+        trainer = agent = CFRAgent(
+            env,
+            os.path.join(
+                args.log_dir,
+                'cfr_model',
+            ),
+        )
+    trainer.load()  # If we have saved model, we first load the model
 
     # Evaluate CFR against random
     eval_env.set_agents([
@@ -53,13 +70,14 @@ def train(args):
     # Start training
     with Logger(args.log_dir) as logger:
         for episode in range(args.num_episodes):
-            agent.train()
+            trainer.train()
             print('\rIteration {}'.format(episode), end='')
             # Evaluate the performance. Play with Random agents.
             if episode % args.evaluate_every == 0:
-                agent.save() # Save model
+                trainer.save() # Save model
                 logger.log_performance(
-                    env.timestep,
+                    # The environments of the workers are not visible, so we log the iterations
+                    env.timestep if args.num_workers <= 1 else episode,
                     tournament(
                         eval_env,
                         args.num_eval_games
@@ -68,6 +86,9 @@ def train(args):
 
         # Get the paths
         csv_path, fig_path = logger.csv_path, logger.fig_path
+    if args.num_workers > 1:
+        trainer.close()
+
     # Plot the learning curve
     plot_curve(csv_path, fig_path, 'cfr')
 
@@ -98,6 +119,11 @@ if __name__ == '__main__':
         type=str,
         default='experiments/leduc_holdem_cfr_result/',
     )
+    parser.add_argument(
+        '--num_workers',
+        type=int,
+        default=1,
+    )
 
     args = parser.parse_args()
 
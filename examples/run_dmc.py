@@ -23,7 +23,11 @@ def train(args):
         save_interval=args.save_interval,
         num_actor_devices=args.num_actor_devices,
         num_actors=args.num_actors,
+        num_envs_per_actor=args.num_envs_per_actor,
         training_device=args.training_device,
+        broadcast_interval=args.broadcast_interval,
+        num_torch_threads=args.num_torch_threads,
+        pin_cores=args.pin_cores,
     )
 
     # Train DMC Agents
@@ -84,12 +88,35 @@ if __name__ == '__main__':
         type=int,
         help='The number of actors for each simulation device',
     )
+    parser.add_argument(
+        '--num_envs_per_actor',
+        default=1,
+        type=int,
+        help='The number of environments run by each actor, whose decisions are batched',
+    )
     parser.add_argument(
         '--training_device',
         default="0",
         type=str,
         help='The index of the GPU used for training models',
     )
+    parser.add_argument(
+        '--broadcast_interval',
+        default=1,
+        type=int,
+        help='The number of learner steps between two weight broadcasts to the actors',
+    )
+    parser.add_argument(
+        '--num_torch_threads',
+        default=None,
+        type=int,
+        help='The number of intra-op torch threads of the learner',
+    )
+    parser.add_argument(
+        '--pin_cores',
+        action='store_true',
+        help='Pin the learner and the actors to disjoint CPU cores',
+    )
 
     args = parser.parse_args()
 
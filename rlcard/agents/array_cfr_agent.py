@@ -0,0 +1,419 @@
+import os
+import sys
+import time
+import pickle
+import numpy as np
+
+from rlcard.utils.utils import remove_illegal
+
+class InfoSetTable(object):
+    ''' Array-backed storage for the information sets of CFR. The state strings
+    are interned into integer ids and the regrets, the current strategy and the
+    strategy sums are stored as rows of contiguous 2-D arrays that grow in chunks.
+    '''
+
+    def __init__(self, num_actions, chunk_size=4096):
+        ''' Initialize the table
+
+        Args:
+            num_actions (int): The size of the action space
+            chunk_size (int): The number of rows added when the table is full
+        '''
+        self.num_actions = num_actions
+        self.chunk_size = chunk_size
+        self.index = {}
+        self.keys = []
+        self.size = 0
+        self.capacity = 0
+
+        self.regrets = np.zeros((0, num_actions))
+        self.strategy = np.zeros((0, num_actions))
+        self.strategy_sums = np.zeros((0, num_actions))
+        self.legal_mask = np.zeros((0, num_actions), dtype=bool)
+        self.reach_sums = np.zeros(0)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get_id(self, key, legal_actions):
+        ''' Get the id of an information set, interning it if it is new.
+        A new information set starts with the uniform strategy over its legal actions.
+        Since different states may share a state_str, the legal-action mask of a
+        set is the union of the legal actions it has been seen with.
+
+        Args:
+            key (str): The state_str
+            legal_actions (list): Indices of legal actions
+
+        Returns:
+            (int): The id of the information set
+        '''
+        infoset_id = self.index.get(key)
+        if infoset_id is not None:
+            self.legal_mask[infoset_id, legal_actions] = True
+            return infoset_id
+
+        if self.size == self.capacity:
+            self._grow()
+        infoset_id = self.size
+        self.size += 1
+        self.index[key] = infoset_id
+        self.keys.append(key)
+        self.legal_mask[infoset_id, legal_actions] = True
+        self.strategy[infoset_id, legal_actions] = 1.0 / len(legal_actions)
+        return infoset_id
+
+    def regret_matching(self):
+        ''' Recompute the current strategy of all the information sets from the
+        positive regrets. Sets without positive regrets play uniformly over their
+        legal actions.
+        '''
+        n = self.size
+        positive_regrets = np.maximum(self.regrets[:n], 0)
+        positive_regret_sums = positive_regrets.sum(axis=1, keepdims=True)
+        legal_counts = self.legal_mask[:n].sum(axis=1, keepdims=True)
+        uniform = self.legal_mask[:n] / legal_counts
+        self.strategy[:n] = np.where(positive_regret_sums > 0,
+                                     positive_regrets / np.where(positive_regret_sums > 0, positive_regret_sums, 1),
+                                     uniform)
+
+    def current_strategy(self, infoset_id, legal_actions):
+        ''' Apply regret matching to a single information set. This is used by
+        the sampling variants, which only touch a few sets per iteration.
+
+        Args:
+            infoset_id (int): The id of the information set
+            legal_actions (list): Indices of legal actions
+
+        Returns:
+            (numpy.array): The action probabilities over the legal actions
+        '''
+        positive_regrets = np.maximum(self.regrets[infoset_id, legal_actions], 0)
+        positive_regret_sum = positive_regrets.sum()
+        if positive_regret_sum > 0:
+            probs = positive_regrets / positive_regret_sum
+        else:
+            probs = np.full(len(legal_actions), 1.0 / len(legal_actions))
+        self.strategy[infoset_id] = 0
+        self.strategy[infoset_id, legal_actions] = probs
+        return probs
+
+    def accumulate_strategy(self):
+        ''' Add the current strategy weighted by the accumulated reach
+        probabilities to the strategy sums, then clear the reach probabilities
+        '''
+        n = self.size
+        self.strategy_sums[:n] += self.reach_sums[:n, np.newaxis] * self.strategy[:n]
+        self.reach_sums[:n] = 0
+
+    def average_policy(self, infoset_id):
+        ''' Get the normalized average strategy of an information set
+
+        Args:
+            infoset_id (int): The id of the information set
+
+        Returns:
+            (numpy.array): The average action probabilities
+        '''
+        return remove_illegal(self.strategy_sums[infoset_id], np.flatnonzero(self.legal_mask[infoset_id]))
+
+    @property
+    def nbytes(self):
+        ''' The number of bytes used by the filled rows, the interned keys and the index
+        '''
+        arrays = (self.regrets, self.strategy, self.strategy_sums, self.legal_mask, self.reach_sums)
+        return (sum(a[:self.size].nbytes for a in arrays)
+                + sum(sys.getsizeof(k) for k in self.keys)
+                + sys.getsizeof(self.keys)
+                + sys.getsizeof(self.index))
+
+    def to_dicts(self):
+        ''' Export the table with the dict layout of `CFRAgent`
+
+        Returns:
+            (tuple): The policy, average policy, regret and legal action dicts keyed by state_str
+        '''
+        policy, average_policy, regrets, legal_actions = {}, {}, {}, {}
+        for key, i in self.index.items():
+            policy[key] = self.strategy[i].copy()
+            average_policy[key] = self.strategy_sums[i].copy()
+            regrets[key] = self.regrets[i].copy()
+            legal_actions[key] = np.flatnonzero(self.legal_mask[i]).tolist()
+        return policy, average_policy, regrets, legal_actions
+
+    @classmethod
+    def from_dicts(cls, num_actions, average_policy, regrets, legal_actions=None, chunk_size=4096):
+        ''' Build a table from the dict layout of `CFRAgent`. If the legal actions
+        are not given, they are recovered from the nonzero regrets and strategy sums.
+
+        Args:
+            num_actions (int): The size of the action space
+            average_policy (dict): state_str -> strategy sums
+            regrets (dict): state_str -> regrets
+            legal_actions (dict): state_str -> indices of legal actions
+
+        Returns:
+            (InfoSetTable): The table
+        '''
+        table = cls(num_actions, chunk_size)
+        for key, regret in regrets.items():
+            strategy_sum = average_policy.get(key, np.zeros(num_actions))
+            if legal_actions is not None:
+                legal = legal_actions[key]
+            else:
+                legal = np.flatnonzero((regret != 0) | (strategy_sum != 0))
+                if len(legal) == 0:
+                    legal = np.arange(num_actions)
+            i = table.get_id(key, legal)
+            table.regrets[i] = regret
+            table.strategy_sums[i] = strategy_sum
+        table.regret_matching()
+        return table
+
+    def snapshot(self):
+        ''' Copy the accumulated values so that the changes made afterwards can
+        be extracted with `pop_delta`
+
+        Returns:
+            (tuple): The size of the table and copies of the accumulated arrays
+        '''
+        n = self.size
+        return n, self.regrets[:n].copy(), self.strategy_sums[:n].copy(), self.reach_sums[:n].copy()
+
+    def pop_delta(self, snapshot):
+        ''' Extract the changes made since `snapshot` and revert them. The new
+        information sets stay interned, with zero values.
+
+        Args:
+            snapshot (tuple): The output of `snapshot`
+
+        Returns:
+            (tuple): The keys, legal-action masks, regrets, strategy sums and
+                     reach sums of the changed information sets
+        '''
+        n0, regrets, strategy_sums, reach_sums = snapshot
+        n = self.size
+        regret_delta = self.regrets[:n].copy()
+        strategy_sum_delta = self.strategy_sums[:n].copy()
+        reach_sum_delta = self.reach_sums[:n].copy()
+        regret_delta[:n0] -= regrets
+        strategy_sum_delta[:n0] -= strategy_sums
+        reach_sum_delta[:n0] -= reach_sums
+
+        changed = np.any(regret_delta != 0, axis=1) | np.any(strategy_sum_delta != 0, axis=1) | (reach_sum_delta != 0)
+        changed[n0:] = True
+        ids = np.flatnonzero(changed)
+
+        self.regrets[:n0], self.strategy_sums[:n0], self.reach_sums[:n0] = regrets, strategy_sums, reach_sums
+        self.regrets[n0:n], self.strategy_sums[n0:n], self.reach_sums[n0:n] = 0, 0, 0
+
+        return ([self.keys[i] for i in ids], self.legal_mask[ids], regret_delta[ids],
+                strategy_sum_delta[ids], reach_sum_delta[ids])
+
+    def apply_delta(self, delta):
+        ''' Add the changes extracted by `pop_delta`, possibly from another table
+
+        Args:
+            delta (tuple): The output of `pop_delta`
+        '''
+        keys, legal_mask, regrets, strategy_sums, reach_sums = delta
+        ids = np.array([self.get_id(key, np.flatnonzero(mask)) for key, mask in zip(keys, legal_mask)], dtype=np.int64)
+        if len(ids) == 0:
+            return
+        self.regrets[ids] += regrets
+        self.strategy_sums[ids] += strategy_sums
+        self.reach_sums[ids] += reach_sums
+
+    def _grow(self):
+        ''' Extend all the arrays by one chunk
+        '''
+        self.capacity += self.chunk_size
+        self.regrets = self._resize(self.regrets)
+        self.strategy = self._resize(self.strategy)
+        self.strategy_sums = self._resize(self.strategy_sums)
+        self.legal_mask = self._resize(self.legal_mask)
+        self.reach_sums = self._resize(self.reach_sums)
+
+    def _resize(self, array):
+        new_array = np.zeros((self.capacity,) + array.shape[1:], dtype=array.dtype)
+        new_array[:self.size] = array[:self.size]
+        return new_array
+
+class ArrayCFRAgent():
+    ''' Implement CFR (chance sampling) algorithm on top of an `InfoSetTable`.
+    It follows the same traversal as `CFRAgent`, but regret matching and the
+    average-strategy update are done on whole arrays. The regrets are the same
+    as the ones of `CFRAgent`. The strategy sums only differ for the state_strs
+    shared by states with different legal actions, since the reach probability
+    of a set is applied to its strategy over the union of its legal actions.
+    '''
+
+    def __init__(self, env, model_path='./cfr_model', chunk_size=4096):
+        ''' Initilize Agent
+
+        Args:
+            env (Env): Env class
+            model_path (str): The directory to save/load the model
+            chunk_size (int): The number of rows added when the table is full
+        '''
+        self.use_raw = False
+        self.env = env
+        self.model_path = model_path
+        self.chunk_size = chunk_size
+
+        self.table = InfoSetTable(env.num_actions, chunk_size)
+
+        self.iteration = 0
+        self.train_time = 0.0
+
+    def train(self):
+        ''' Do one iteration of CFR
+        '''
+        start = time.perf_counter()
+        self.iteration += 1
+        self.run_traversals()
+        self.update_policy()
+        self.train_time += time.perf_counter() - start
+
+    def run_traversals(self):
+        ''' Traverse tree to compute counterfactual regret for each player.
+        The regrets and the reach probabilities are recorded in traversal
+        '''
+        for player_id in range(self.env.num_players):
+            self.env.reset()
+            probs = np.ones(self.env.num_players)
+            self.traverse_tree(probs, player_id)
+
+    def update_policy(self):
+        ''' Update the strategy sums with the strategy used in this iteration, then the strategy
+        '''
+        self.table.accumulate_strategy()
+        self.table.regret_matching()
+
+    def traverse_tree(self, probs, player_id):
+        ''' Traverse the game tree, update the regrets
+
+        Args:
+            probs: The reach probability of the current node
+            player_id: The player to update the value
+
+        Returns:
+            state_utilities (list): The expected utilities for all the players
+        '''
+        if self.env.is_over():
+            return self.env.get_payoffs()
+
+        current_player = self.env.get_player_id()
+
+        obs, legal_actions = self.get_state(current_player)
+        infoset_id = self.table.get_id(obs, legal_actions)
+        action_probs = remove_illegal(self.table.strategy[infoset_id], legal_actions)
+
+        action_utilities = np.zeros((len(legal_actions), self.env.num_players))
+        for i, action in enumerate(legal_actions):
+            new_probs = probs.copy()
+            new_probs[current_player] *= action_probs[action]
+
+            # Keep traversing the child state
+            self.env.step(action)
+            action_utilities[i] = self.traverse_tree(new_probs, player_id)
+            self.env.step_back()
+
+        state_utility = action_probs[legal_actions] @ action_utilities
+
+        if not current_player == player_id:
+            return state_utility
+
+        # If it is current player, we record the reach probability and compute regret
+        counterfactual_prob = (np.prod(probs[:current_player]) *
+                                np.prod(probs[current_player + 1:]))
+        self.table.regrets[infoset_id, legal_actions] += counterfactual_prob * \
+            (action_utilities[:, current_player] - state_utility[current_player])
+        self.table.reach_sums[infoset_id] += self.iteration * probs[current_player]
+        return state_utility
+
+    def eval_step(self, state):
+        ''' Given a state, predict action based on average policy
+
+        Args:
+            state (numpy.array): State representation
+
+        Returns:
+            action (int): Predicted action
+            info (dict): A dictionary containing information
+        '''
+        obs = state['obs'].tobytes()
+        legal_actions = list(state['legal_actions'].keys())
+        infoset_id = self.table.index.get(obs)
+        if infoset_id is None:
+            probs = remove_illegal(np.ones(self.env.num_actions), legal_actions)
+        else:
+            probs = remove_illegal(self.table.average_policy(infoset_id), legal_actions)
+        action = np.random.choice(len(probs), p=probs)
+
+        info = {}
+        info['probs'] = {state['raw_legal_actions'][i]: float(probs[legal_actions[i]]) for i in range(len(state['legal_actions']))}
+
+        return action, info
+
+    def get_state(self, player_id):
+        ''' Get state_str of the player
+
+        Args:
+            player_id (int): The player id
+
+        Returns:
+            (tuple) that contains:
+                state (str): The state str
+                legal_actions (list): Indices of legal actions
+        '''
+        state = self.env.get_state(player_id)
+        return state['obs'].tobytes(), list(state['legal_actions'].keys())
+
+    def stats(self):
+        ''' Report the training speed and the memory footprint
+
+        Returns:
+            (dict): The iterations per second, the number of information sets
+                    and the bytes used per information set
+        '''
+        return {
+            'iterations_per_second': self.iteration / self.train_time if self.train_time > 0 else 0.0,
+            'num_infosets': len(self.table),
+            'bytes_per_infoset': self.table.nbytes / max(len(self.table), 1),
+        }
+
+    def save(self):
+        ''' Save model with the same layout as `CFRAgent`, plus the legal actions
+        of every information set
+        '''
+        if not os.path.exists(self.model_path):
+            os.makedirs(self.model_path)
+
+        policy, average_policy, regrets, legal_actions = self.table.to_dicts()
+        for name, obj in [('policy', policy),
+                          ('average_policy', average_policy),
+                          ('regrets', regrets),
+                          ('iteration', self.iteration),
+                          ('legal_actions', legal_actions)]:
+            with open(os.path.join(self.model_path, name + '.pkl'), 'wb') as f:
+                pickle.dump(obj, f)
+
+    def load(self):
+        ''' Load model saved by this agent or by `CFRAgent`
+        '''
+        if not os.path.exists(self.model_path):
+            return
+
+        loaded = {}
+        for name in ['average_policy', 'regrets', 'iteration', 'legal_actions']:
+            path = os.path.join(self.model_path, name + '.pkl')
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    loaded[name] = pickle.load(f)
+        self.table = InfoSetTable.from_dicts(self.env.num_actions, loaded['average_policy'], loaded['regrets'],
+                                             loaded.get('legal_actions'), self.chunk_size)
+        self.iteration = loaded['iteration']
@@ -0,0 +1,244 @@
+# Copyright 2021 RLCard Team of Texas A&M University
+# Copyright 2021 DouZero Team of Kwai
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import math
+import timeit
+from contextlib import contextmanager
+
+import numpy as np
+import torch
+
+# The stages timed by the actors and the learner threads
+ACTOR_STAGES = ('actor_env_step', 'actor_inference', 'actor_free_queue_wait', 'actor_weight_sync')
+LEARNER_STAGES = ('learner_full_queue_wait', 'learner_batch_assembly', 'learner_forward_backward', 'learner_weight_sync')
+STAGES = ACTOR_STAGES + LEARNER_STAGES
+
+# The histogram buckets are powers of two in seconds, from 2^MIN_EXPONENT to 2^MAX_EXPONENT
+MIN_EXPONENT = -20
+MAX_EXPONENT = 6
+NUM_BUCKETS = MAX_EXPONENT - MIN_EXPONENT + 1
+
+def get_bucket(seconds):
+    ''' Get the histogram bucket of a duration
+
+    Args:
+        seconds (float): The duration
+
+    Returns:
+        (int): The index of the smallest bucket whose upper bound is at least the duration
+    '''
+    if seconds <= 0:
+        return 0
+    exponent = math.frexp(seconds)[1]
+    return min(max(exponent - MIN_EXPONENT, 0), NUM_BUCKETS - 1)
+
+def get_percentile(counts, q):
+    ''' Get a percentile from the counts of a histogram
+
+    Args:
+        counts (numpy.array): The counts of the buckets
+        q (float): The percentile, between 0 and 100
+
+    Returns:
+        (float): The upper bound in seconds of the bucket of the percentile, or 0 without counts
+    '''
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    bucket = int(np.searchsorted(np.cumsum(counts), total * q / 100.0))
+    return 2.0 ** (bucket + MIN_EXPONENT)
+
+class DMCMetrics(object):
+    ''' Timing histograms of the stages of DMC training and gauges of the
+    buffer queues, in shared memory. Every actor process, every learner
+    thread and the weight publisher writes its own row, so no locking is
+    needed. The trainer periodically takes snapshots and writes the
+    differences as records.
+    '''
+
+    def __init__(self, num_rows, num_players):
+        ''' Initialize the metrics
+
+        Args:
+            num_rows (int): The number of actors plus the number of learner threads and the publisher
+            num_players (int): The number of positions
+        '''
+        self.num_players = num_players
+        self.counts = torch.zeros(num_rows, len(STAGES), NUM_BUCKETS, dtype=torch.int64).share_memory_()
+        self.totals = torch.zeros(num_rows, len(STAGES), dtype=torch.float64).share_memory_()
+        # The buffers put in the full queues, taken from them, and held by the actors
+        self.filled = torch.zeros(num_rows, num_players, dtype=torch.int64).share_memory_()
+        self.consumed = torch.zeros(num_rows, num_players, dtype=torch.int64).share_memory_()
+        self.held = torch.zeros(num_rows, num_players, dtype=torch.int64).share_memory_()
+
+    def get_recorder(self, row):
+        ''' Get the recorder of an actor or a learner thread
+
+        Args:
+            row (int): The row of the actor or the thread
+
+        Returns:
+            (StageRecorder): The recorder writing the row
+        '''
+        return StageRecorder(self, row)
+
+    def snapshot(self):
+        ''' Copy the current metrics
+
+        Returns:
+            (dict): The counts and totals of the stages summed over the rows, and the queue depths by position
+        '''
+        full_depths = (self.filled.sum(0) - self.consumed.sum(0)).numpy()
+        return dict(
+            counts=self.counts.sum(0).numpy(),
+            totals=self.totals.sum(0).numpy(),
+            full_queue_depths=full_depths.tolist(),
+            held=self.held.sum(0).numpy().tolist(),
+        )
+
+    @staticmethod
+    def get_record(previous, current, elapsed, num_buffers):
+        ''' Build a record from two snapshots
+
+        Args:
+            previous (dict): The older snapshot
+            current (dict): The newer snapshot
+            elapsed (float): The seconds between the snapshots
+            num_buffers (int): The number of buffers of each position
+
+        Returns:
+            (dict): The count, the total, the mean and some percentiles in seconds of every stage
+                during the interval, and the depths of the queues at the end of the interval
+        '''
+        counts = current['counts'] - previous['counts']
+        totals = current['totals'] - previous['totals']
+        stages = {}
+        for s, stage in enumerate(STAGES):
+            count = int(counts[s].sum())
+            stages[stage] = dict(
+                count=count,
+                total=float(totals[s]),
+                mean=float(totals[s]) / count if count > 0 else 0.0,
+                p50=get_percentile(counts[s], 50),
+                p90=get_percentile(counts[s], 90),
+                p99=get_percentile(counts[s], 99),
+            )
+        free_depths = [num_buffers - full - held for full, held in zip(current['full_queue_depths'], current['held'])]
+        return dict(
+            interval=elapsed,
+            stages=stages,
+            full_queue_depths=current['full_queue_depths'],
+            free_queue_depths=free_depths,
+        )
+
+class StageRecorder(object):
+    ''' Write the timings of one actor or learner thread to its row of `DMCMetrics`
+    '''
+
+    def __init__(self, metrics, row):
+        self.counts = metrics.counts[row]
+        self.totals = metrics.totals[row]
+        self.filled = metrics.filled[row]
+        self.consumed = metrics.consumed[row]
+        self.held = metrics.held[row]
+
+    def record(self, stage, seconds, count=1):
+        ''' Record the duration of a stage
+
+        Args:
+            stage (str): The stage, one of `STAGES`
+            seconds (float): The duration of one occurrence
+            count (int): The number of occurrences with this duration
+        '''
+        s = STAGES.index(stage)
+        self.counts[s, get_bucket(seconds)] += count
+        self.totals[s] += seconds * count
+
+    @contextmanager
+    def time(self, stage):
+        ''' Record the duration of the enclosed block
+
+        Args:
+            stage (str): The stage, one of `STAGES`
+        '''
+        start = timeit.default_timer()
+        yield
+        self.record(stage, timeit.default_timer() - start)
+
+class TimedAgent(object):
+    ''' Wrap an agent to record the duration of its decisions as `actor_inference`
+    '''
+
+    def __init__(self, agent, recorder):
+        self.agent = agent
+        self.recorder = recorder
+        self.use_raw = agent.use_raw
+        self.inference_time = 0.0
+
+    def step(self, state):
+        start = timeit.default_timer()
+        action = self.agent.step(state)
+        elapsed = timeit.default_timer() - start
+        self.recorder.record('actor_inference', elapsed)
+        self.inference_time += elapsed
+        return action
+
+    def eval_step(self, state):
+        return self.agent.eval_step(state)
+
+def read_records(path):
+    ''' Read the records written by the trainer
+
+    Args:
+        path (str): The path of `metrics.jsonl`
+
+    Returns:
+        (list): The records
+    '''
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def summarize(records):
+    ''' Summarize the records of a run and find its bottleneck
+
+    Args:
+        records (list): The records, see `DMCMetrics.get_record`
+
+    Returns:
+        summary (dict): The count, the total and the mean in seconds of every stage, and its share
+            of the time of the actors or of the learner
+        bottleneck (str): A short description of the bottleneck
+    '''
+    summary = {}
+    for stage in STAGES:
+        count = sum(record['stages'][stage]['count'] for record in records)
+        total = sum(record['stages'][stage]['total'] for record in records)
+        summary[stage] = dict(count=count, total=total, mean=total / count if count > 0 else 0.0)
+    for stages in (ACTOR_STAGES, LEARNER_STAGES):
+        total = sum(summary[stage]['total'] for stage in stages)
+        for stage in stages:
+            summary[stage]['share'] = summary[stage]['total'] / total if total > 0 else 0.0
+
+    if summary['learner_full_queue_wait']['share'] > 0.5:
+        bottleneck = 'The learner waits for full buffers most of the time: the actors are the bottleneck ' \
+                     '(largest actor stage: {})'.format(max(ACTOR_STAGES, key=lambda s: summary[s]['share']))
+    elif summary['actor_free_queue_wait']['share'] > 0.5:
+        bottleneck = 'The actors wait for free buffers most of the time: the learner is the bottleneck ' \
+                     '(largest learner stage: {})'.format(max(LEARNER_STAGES, key=lambda s: summary[s]['share']))
+    else:
+        stage = max(STAGES, key=lambda s: summary[s]['share'])
+        bottleneck = 'No side waits most of the time, the largest stage is {}'.format(stage)
+    return summary, bottleneck
@@ -17,6 +17,7 @@ import numpy as np
 
 import torch
 from torch import nn
+import torch.nn.functional as F
 
 class DMCNet(nn.Module):
     def __init__(
@@ -35,9 +36,21 @@ class DMCNet(nn.Module):
         fc.append(nn.Linear(layer_dims[-1], 1))
         self.fc_layers = nn.Sequential(*fc)
 
-    def forward(self, obs, actions):
+    def forward(self, obs, actions, obs_index=None):
         obs = torch.flatten(obs, 1)
         actions = torch.flatten(actions, 1)
+        if obs_index is not None or (obs.shape[0] == 1 and actions.shape[0] > 1):
+            # The observations are scored with many actions. The first layer is
+            # split into its observation and action parts so that each observation
+            # is computed once and broadcast, or gathered with `obs_index`, instead
+            # of being repeated for every action
+            first = self.fc_layers[0]
+            obs_dim = obs.shape[1]
+            obs_part = F.linear(obs, first.weight[:, :obs_dim], first.bias)
+            if obs_index is not None:
+                obs_part = obs_part[obs_index]
+            x = obs_part + F.linear(actions, first.weight[:, obs_dim:])
+            return self.fc_layers[1:](x).flatten()
         x = torch.cat((obs, actions), dim=1)
         values = self.fc_layers(x).flatten()
         return values
@@ -50,16 +63,28 @@ class DMCAgent:
         mlp_layers=[512,512,512,512,512],
         exp_epsilon=0.01,
         device="0",
+        action_features=None,
     ):
         self.use_raw = False
         self.device = 'cuda:'+device if device != "cpu" else "cpu"
         self.net = DMCNet(state_shape, action_shape, mlp_layers).to(self.device)
         self.exp_epsilon = exp_epsilon
         self.action_shape = action_shape
+        # The features of all the actions indexed by action id, see `Env.get_action_features`.
+        # Without it, the features are read from the states
+        self.action_features = None
+        if action_features is not None:
+            self.action_features = torch.as_tensor(np.array(action_features)).to(self.device)
 
     def step(self, state):
         action_keys, values = self.predict(state)
+        return self._select_action(action_keys, values)
+
+    def batch_step(self, states):
+        """Choose the actions of several states with one forward pass"""
+        return [self._select_action(action_keys, values) for action_keys, values in self.batch_predict(states)]
 
+    def _select_action(self, action_keys, values):
         if self.exp_epsilon > 0 and np.random.rand() < self.exp_epsilon:
             action = np.random.choice(action_keys)
         else:
@@ -81,6 +106,8 @@ class DMCAgent:
 
     def share_memory(self):
         self.net.share_memory()
+        if self.action_features is not None:
+            self.action_features.share_memory_()
 
     def eval(self):
         self.net.eval()
@@ -90,24 +117,49 @@ class DMCAgent:
 
     def predict(self, state):
         # Prepare obs and actions
-        obs = state['obs'].astype(np.float32)
-        legal_actions = state['legal_actions']
-        action_keys = np.array(list(legal_actions.keys()))
-        action_values = list(legal_actions.values())
-        # One-hot encoding if there is no action features
-        for i in range(len(action_values)):
-            if action_values[i] is None:
-                action_values[i] = np.zeros(self.action_shape[0])
-                action_values[i][action_keys[i]] = 1
-        action_values = np.array(action_values, dtype=np.float32)
+        action_keys = np.fromiter(state['legal_actions'].keys(), dtype=np.int64, count=len(state['legal_actions']))
+        obs = torch.from_numpy(state['obs']).float().to(self.device).unsqueeze(0)
+        action_values = self._get_action_values(state, action_keys)
+
+        # Predict Q values, the observation is broadcast over the actions
+        with torch.no_grad():
+            values = self.net.forward(obs, action_values.float().to(self.device))
+
+        return action_keys, values.cpu().numpy()
+
+    def batch_predict(self, states):
+        """Predict the values of the legal actions of several states with one forward pass
+
+        Returns:
+            (list): The (action_keys, values) of each state, as returned by `predict`
+        """
+        action_keys = [np.fromiter(state['legal_actions'].keys(), dtype=np.int64, count=len(state['legal_actions']))
+                       for state in states]
+        num_actions = [len(keys) for keys in action_keys]
+        obs = torch.from_numpy(np.stack([state['obs'] for state in states])).float().to(self.device)
+        obs_index = torch.from_numpy(np.repeat(np.arange(len(states)), num_actions)).to(self.device)
+        if getattr(self, 'action_features', None) is not None:
+            action_values = self._get_action_values(None, np.concatenate(action_keys))
+        else:
+            action_values = torch.cat([self._get_action_values(state, keys) for state, keys in zip(states, action_keys)])
 
-        obs = np.repeat(obs[np.newaxis, :], len(action_keys), axis=0)
+        with torch.no_grad():
+            values = self.net.forward(obs, action_values.float().to(self.device), obs_index).cpu().numpy()
 
-        # Predict Q values
-        values = self.net.forward(torch.from_numpy(obs).to(self.device),
-                                  torch.from_numpy(action_values).to(self.device))
+        return list(zip(action_keys, np.split(values, np.cumsum(num_actions)[:-1])))
 
-        return action_keys, values.cpu().detach().numpy()
+    def _get_action_values(self, state, action_keys):
+        if getattr(self, 'action_features', None) is not None:
+            return self.action_features[torch.from_numpy(action_keys).to(self.device)]
+        legal_actions = state['legal_actions']
+        if 'legal_action_features' in state:
+            return torch.from_numpy(state['legal_action_features'])
+        if next(iter(legal_actions.values())) is None:
+            # One-hot encoding if there is no action features
+            action_values = torch.zeros(len(action_keys), self.action_shape[0])
+            action_values[torch.arange(len(action_keys)), torch.from_numpy(action_keys)] = 1
+            return action_values
+        return torch.from_numpy(np.stack(list(legal_actions.values())))
 
     def forward(self, obs, actions):
         return self.net.forward(obs, actions)
@@ -120,6 +172,8 @@ class DMCAgent:
 
     def set_device(self, device):
         self.device = device
+        if getattr(self, 'action_features', None) is not None:
+            self.action_features = self.action_features.to(device)
 
 class DMCModel:
     def __init__(
@@ -128,7 +182,8 @@ class DMCModel:
         action_shape,
         mlp_layers=[512,512,512,512,512],
         exp_epsilon=0.01,
-        device=0
+        device=0,
+        action_features=None,
     ):
         self.agents = []
         for player_id in range(len(state_shape)):
@@ -138,6 +193,7 @@ class DMCModel:
                 mlp_layers,
                 exp_epsilon,
                 device,
+                action_features,
             )
             self.agents.append(agent)
 
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import os
 import threading
 import time
@@ -25,6 +26,7 @@ from torch import multiprocessing as mp
 from torch import nn
 
 from .file_writer import FileWriter
+from .metrics import DMCMetrics
 from .model import DMCModel
 from .pettingzoo_model import DMCModelPettingZoo
 from .utils import (
@@ -32,6 +34,11 @@ from .utils import (
     create_buffers,
     create_optimizers,
     act,
+    act_batched,
+    allocate_cores,
+    run_actor,
+    WeightBroadcast,
+    WeightPublisher,
     log,
 )
 from .pettingzoo_utils import (
@@ -45,7 +52,6 @@ def compute_loss(logits, targets):
 
 def learn(
     position,
-    actor_models,
     agent,
     batch,
     optimizer,
@@ -74,9 +80,6 @@ def learn(
         loss.backward()
         nn.utils.clip_grad_norm_(agent.parameters(), max_grad_norm)
         optimizer.step()
-
-        for actor_model in actor_models.values():
-            actor_model.get_agent(position).load_state_dict(agent.state_dict())
         return stats
 
 
@@ -91,14 +94,23 @@ class DMCTrainer:
         save_interval (int): Time interval (in minutes) at which to save the model
         num_actor_devices (int): The number devices used for simulation
         num_actors (int): Number of actors for each simulation device
+        num_envs_per_actor (int): Number of environments run by each actor. With more than
+            one, the decisions of the environments are grouped by position and batched
         training_device (str): The index of the GPU used for training models, or `cpu`.
         savedir (string): Root dir where experiment data will be saved
         total_frames (int): Total environment frames to train for
         exp_epsilon (float): The prbability for exploration
         batch_size (int): Learner batch size
         unroll_length (int): The unroll length (time dimension)
-        num_buffers (int): Number of shared-memory buffers
+        num_buffers (int): Number of shared-memory buffers of each position, at least `batch_size`
+            plus `num_actors`
         num_threads (int): Number learner threads
+        broadcast_interval (int): Number of learner steps of a position between two publishes of its weights
+            to the actors. The actors pull the latest weights between episodes
+        num_torch_threads (int): Number of intra-op torch threads of the learner. Default: one per learner
+            core when pinning, torch's default otherwise
+        pin_cores (boolean): Whether to pin the learner and the actors to disjoint CPU cores (Linux only).
+            The learner gets `num_torch_threads` cores (1 by default) and each actor gets one of the others
         max_grad_norm (int): Max norm of gradients
         learning_rate (float): Learning rate
         alpha (float): RMSProp smoothing constant
@@ -115,6 +127,7 @@ class DMCTrainer:
         save_interval=30,
         num_actor_devices=1,
         num_actors=5,
+        num_envs_per_actor=1,
         training_device="0",
         savedir='experiments/dmc_result',
         total_frames=100000000000,
@@ -123,6 +136,9 @@ class DMCTrainer:
         unroll_length=100,
         num_buffers=50,
         num_threads=4,
+        broadcast_interval=1,
+        num_torch_threads=None,
+        pin_cores=False,
         max_grad_norm=40,
         learning_rate=0.0001,
         alpha=0.99,
@@ -131,6 +147,15 @@ class DMCTrainer:
     ):
         self.env = env
 
+        self.is_pettingzoo_env = is_pettingzoo_env
+        if self.is_pettingzoo_env and num_envs_per_actor > 1:
+            raise ValueError('num_envs_per_actor is not supported for PettingZoo environments')
+        if not self.is_pettingzoo_env and num_buffers < batch_size + num_actors:
+            # Each actor may hold a partially filled buffer of every position while it waits
+            # for a free buffer of another position, so the learner needs the other buffers
+            raise ValueError('num_buffers ({}) must be at least batch_size ({}) plus num_actors ({})'.format(
+                num_buffers, batch_size, num_actors))
+
         self.plogger = FileWriter(
             xpid=xpid,
             rootdir=savedir,
@@ -148,30 +173,36 @@ class DMCTrainer:
         self.save_interval = save_interval
         self.num_actor_devices = num_actor_devices
         self.num_actors = num_actors
+        self.num_envs_per_actor = num_envs_per_actor
         self.training_device = training_device
         self.total_frames = total_frames
         self.exp_epsilon = exp_epsilon
         self.num_buffers = num_buffers
         self.num_threads = num_threads
+        self.broadcast_interval = broadcast_interval
+        self.num_torch_threads = num_torch_threads
+        self.pin_cores = pin_cores
         self.max_grad_norm = max_grad_norm
         self.learning_rate =learning_rate
         self.alpha = alpha
         self.momentum = momentum
         self.epsilon = epsilon
 
-        self.is_pettingzoo_env = is_pettingzoo_env
         if not self.is_pettingzoo_env:
             self.num_players = self.env.num_players
             self.action_shape = self.env.action_shape
             if self.action_shape[0] == None:  # One-hot encoding
                 self.action_shape = [[self.env.num_actions] for _ in range(self.num_players)]
 
+            action_features = self.env.get_action_features()
+
             def model_func(device):
                 return DMCModel(
                     self.env.state_shape,
                     self.action_shape,
                     exp_epsilon=self.exp_epsilon,
                     device=str(device),
+                    action_features=action_features,
                 )
         else:
             self.num_players = self.env.num_agents
@@ -229,6 +260,15 @@ class DMCTrainer:
             free_queue[device] = _free_queue
             full_queue[device] = _full_queue
 
+        # Versioned weight slots, one per device
+        broadcasts = {device: WeightBroadcast(self.num_actors, self.num_players) for device in self.device_iterator}
+
+        # Stage timings, with one row per actor, then one per learner thread and one for the publisher
+        num_actor_rows = len(self.device_iterator) * self.num_actors
+        num_learner_rows = len(self.device_iterator) * self.num_threads * self.num_players
+        metrics = DMCMetrics(num_actor_rows + num_learner_rows + 1, self.num_players)
+        metrics_path = os.path.join(self.plogger.basepath, 'metrics.jsonl')
+
         # Learner model for training
         learner_model = self.model_func(self.training_device)
 
@@ -247,6 +287,8 @@ class DMCTrainer:
         for p in range(self.num_players):
             stat_keys.append('mean_episode_return_'+str(p))
             stat_keys.append('loss_'+str(p))
+            stat_keys.append('weight_staleness_'+str(p))
+            stat_keys.append('broadcast_latency_'+str(p))
         frames, stats = 0, {k: 0 for k in stat_keys}
 
         # Load models if any
@@ -260,22 +302,48 @@ class DMCTrainer:
                 optimizers[p].load_state_dict(checkpoint_states["optimizer_state_dict"][p])
                 for device in self.device_iterator:
                     models[device].get_agent(p).load_state_dict(learner_model.get_agent(p).state_dict())
-            stats = checkpoint_states["stats"]
+            stats.update(checkpoint_states["stats"])
             frames = checkpoint_states["frames"]
             log.info(f"Resuming preempted job, current stats:\n{stats}")
 
 
+        # Allocate the CPU cores
+        learner_cores, actor_cores = None, [None] * (len(self.device_iterator) * self.num_actors)
+        if self.pin_cores:
+            learner_cores, actor_cores = allocate_cores(len(actor_cores), self.num_torch_threads or 1)
+            log.info('Learner pinned to cores %s, actors pinned to cores %s', learner_cores, actor_cores)
+
         # Starting actor processes
-        for device in self.device_iterator:
-            num_actors = self.num_actors
+        for d, device in enumerate(self.device_iterator):
             for i in range(self.num_actors):
-                actor = ctx.Process(
-                    target=act_pettingzoo if self.is_pettingzoo_env else act,
-                    args=(i, device, self.T, free_queue[device], full_queue[device], models[device], buffers[device], self.env))
+                args = (i, device, self.T, free_queue[device], full_queue[device], models[device], buffers[device], self.env)
+                if self.is_pettingzoo_env:
+                    target = act_pettingzoo
+                elif self.num_envs_per_actor > 1:
+                    target = act_batched
+                    args += (self.num_envs_per_actor, broadcasts[device])
+                else:
+                    target = act
+                    args += (broadcasts[device],)
+                if not self.is_pettingzoo_env:
+                    args += (metrics.get_recorder(d * self.num_actors + i),)
+                actor = ctx.Process(target=run_actor, args=(target, args, device, actor_cores[d * self.num_actors + i]))
                 actor.start()
                 actor_processes.append(actor)
 
-        def batch_and_learn(i, device, position, local_lock, position_lock, lock=threading.Lock()):
+        if learner_cores is not None and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, learner_cores)
+        num_torch_threads = self.num_torch_threads
+        if num_torch_threads is None and learner_cores is not None:
+            num_torch_threads = len(learner_cores)
+        if num_torch_threads is not None:
+            torch.set_num_threads(num_torch_threads)
+
+        # The number of learner steps of each position
+        learner_steps = [0 for _ in range(self.num_players)]
+        timer = timeit.default_timer
+
+        def batch_and_learn(i, device, position, local_lock, position_lock, recorder, lock=threading.Lock()):
             """Thread target for the learning process."""
             nonlocal frames, stats
             while frames < self.total_frames:
@@ -284,11 +352,13 @@ class DMCTrainer:
                     full_queue[device][position],
                     buffers[device][position],
                     self.B,
-                    local_lock
+                    local_lock,
+                    recorder,
                 )
+                recorder.consumed[position] += self.B
+                start_time = timer()
                 _stats = learn(
                     position,
-                    models,
                     learner_model.get_agent(position),
                     batch,
                     optimizers[position],
@@ -297,6 +367,15 @@ class DMCTrainer:
                     self.mean_episode_return_buf,
                     position_lock
                 )
+                recorder.record('learner_forward_backward', timer() - start_time)
+                with position_lock:
+                    learner_steps[position] += 1
+                    step = learner_steps[position]
+                if step % self.broadcast_interval == 0:
+                    publisher.request(position, step)
+                staleness, latency = zip(*[broadcasts[_device].get_stats(position, step) for _device in self.device_iterator])
+                _stats['weight_staleness_'+str(position)] = sum(staleness) / len(staleness)
+                _stats['broadcast_latency_'+str(position)] = sum(latency) / len(latency)
 
                 with lock:
                     for k in _stats:
@@ -315,6 +394,12 @@ class DMCTrainer:
         locks = {device: [threading.Lock() for _ in range(self.num_players)] for device in self.device_iterator}
         position_locks = [threading.Lock() for _ in range(self.num_players)]
 
+        # The weights are copied to the slots in the background
+        publisher = WeightPublisher(broadcasts, learner_model, models, position_locks,
+                                    metrics.get_recorder(num_actor_rows + num_learner_rows))
+        publisher.start()
+
+        row = num_actor_rows
         for device in self.device_iterator:
             for i in range(self.num_threads):
                 for position in range(self.num_players):
@@ -326,10 +411,12 @@ class DMCTrainer:
                             device,
                             position,
                             locks[device][position],
-                            position_locks[position])
+                            position_locks[position],
+                            metrics.get_recorder(row))
                         )
                     thread.start()
                     threads.append(thread)
+                    row += 1
 
         def checkpoint(frames):
             log.info('Saving checkpoint to %s', self.checkpointpath)
@@ -350,9 +437,9 @@ class DMCTrainer:
                     model_weights_dir
                 )
 
-        timer = timeit.default_timer
         try:
             last_checkpoint_time = timer() - self.save_interval * 60
+            last_snapshot = metrics.snapshot()
             while frames < self.total_frames:
                 start_frames = frames
                 start_time = timer()
@@ -370,11 +457,31 @@ class DMCTrainer:
                     fps,
                     pprint.pformat(stats),
                 )
+
+                # Write the stage timings and the queue depths of the interval
+                snapshot = metrics.snapshot()
+                record = metrics.get_record(last_snapshot, snapshot, end_time - start_time,
+                                            self.num_buffers * len(self.device_iterator))
+                last_snapshot = snapshot
+                record.update(_time=time.time(), frames=frames)
+                with open(metrics_path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+
+                stages = record['stages']
+                num_steps = stages['learner_forward_backward']['count']
+                if num_steps > 0:
+                    log.info(
+                        'Learner: %i steps, %.1f ms waiting for a batch and %.1f ms learning per step',
+                        num_steps,
+                        (stages['learner_full_queue_wait']['total'] + stages['learner_batch_assembly']['total']) / num_steps * 1000,
+                        stages['learner_forward_backward']['total'] / num_steps * 1000,
+                    )
         except KeyboardInterrupt:
             return
         else:
             for thread in threads:
                 thread.join()
+            publisher.stop()
             log.info('Learning finished after %d frames.', frames)
 
         checkpoint(frames)
@@ -13,12 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import logging
+import os
+import threading
+import time
+import timeit
 import traceback
 
 import numpy as np
 import torch
 
+from .metrics import TimedAgent
+
 shandle = logging.StreamHandler()
 shandle.setFormatter(
     logging.Formatter(
@@ -29,21 +36,30 @@ log.propagate = False
 log.addHandler(shandle)
 log.setLevel(logging.INFO)
 
+# The interval in seconds between two FPS reports of an actor
+ACTOR_LOG_INTERVAL = 60
+
 def get_batch(
     free_queue,
     full_queue,
     buffers,
     batch_size,
-    lock
+    lock,
+    recorder=None
 ):
+    start_time = timeit.default_timer()
     with lock:
         indices = [full_queue.get() for _ in range(batch_size)]
+    assembly_time = timeit.default_timer()
     batch = {
         key: torch.stack([buffers[key][m] for m in indices], dim=1)
         for key in buffers
     }
     for m in indices:
         free_queue.put(m)
+    if recorder is not None:
+        recorder.record('learner_full_queue_wait', assembly_time - start_time)
+        recorder.record('learner_batch_assembly', timeit.default_timer() - assembly_time)
     return batch
 
 def create_buffers(
@@ -94,6 +110,351 @@ def create_optimizers(
         optimizers.append(optimizer)
     return optimizers
 
+class RolloutWriter(object):
+    ''' Write the steps of one position straight into the shared rollout
+    buffers. A buffer is taken from the free queue when its first step is
+    written and is put in the full queue after its T-th step, so the steps
+    are never held in intermediate lists.
+
+    A partially filled buffer is kept across episodes, so an actor may wait
+    on the free queue of a position while holding a buffer of another one.
+    The trainer thus requires at least `batch_size + num_actors` buffers.
+    '''
+
+    def __init__(self, T, free_queue, full_queue, buffers, recorder=None, position=0):
+        ''' Initialize the writer
+
+        Args:
+            T (int): The unroll length, i.e., the number of steps of a buffer
+            free_queue (Queue): The indices of the free buffers of the position
+            full_queue (Queue): The indices of the filled buffers of the position
+            buffers (dict): The shared buffers of the position, by field
+            recorder (StageRecorder): Records the waits on the free queue and the queue depths
+            position (int): The position, used by the recorder
+        '''
+        self.T = T
+        self.free_queue = free_queue
+        self.full_queue = full_queue
+        self.buffers = buffers
+        self.recorder = recorder
+        self.position = position
+        self.index = None
+        self.cursor = 0
+        self.views = None
+
+    def _acquire(self):
+        start_time = timeit.default_timer()
+        self.index = self.free_queue.get()
+        if self.index is None:
+            return False
+        if self.recorder is not None:
+            self.recorder.record('actor_free_queue_wait', timeit.default_timer() - start_time)
+            self.recorder.held[self.position] = 1
+        # The CPU buffers are written through NumPy views of the shared memory
+        self.views = {key: buffer[self.index].numpy() if buffer[self.index].device.type == 'cpu' else buffer[self.index]
+                      for key, buffer in self.buffers.items()}
+        return True
+
+    def write(self, state, action, target, episode_return, done):
+        ''' Write one step at the cursor
+
+        Args:
+            state (numpy.array): The observation
+            action (numpy.array): The action feature
+            target (float): The return of the episode, the target of the value
+            episode_return (float): The return of the episode on its last step, 0 otherwise
+            done (boolean): True on the last step of the episode
+
+        Returns:
+            (boolean): False if the free queue returned None and the step was dropped
+        '''
+        if self.index is None and not self._acquire():
+            return False
+        t = self.cursor
+        for key, value in (('state', state), ('action', action), ('target', target),
+                           ('episode_return', episode_return), ('done', done)):
+            view = self.views[key]
+            view[t] = value if isinstance(view, np.ndarray) else torch.as_tensor(value)
+        self.cursor += 1
+        if self.cursor == self.T:
+            self.full_queue.put(self.index)
+            if self.recorder is not None:
+                self.recorder.filled[self.position] += 1
+                self.recorder.held[self.position] = 0
+            self.index, self.cursor, self.views = None, 0, None
+        return True
+
+def write_episode(writer, env, steps, payoff):
+    ''' Write the steps of one player in a finished episode
+
+    Args:
+        writer (RolloutWriter): The writer of the position of the player
+        env (Env): The environment, used to get the action features
+        steps (list): The (observation, action) pairs of the player
+        payoff (float): The payoff of the player
+
+    Returns:
+        (boolean): False if the free queue returned None, i.e., the actor should stop
+    '''
+    target = float(payoff)
+    for step, (obs, action) in enumerate(steps):
+        done = step == len(steps) - 1
+        if not writer.write(obs, env.get_action_feature(action), target, target if done else 0.0, done):
+            return False
+    return True
+
+def get_available_cores():
+    ''' Get the CPU cores the process may run on
+
+    Returns:
+        (list): The sorted indices of the cores
+    '''
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count()))
+
+def allocate_cores(num_actors, num_learner_cores, cores=None):
+    ''' Split the CPU cores between the learner and the actors. The learner
+    gets the first `num_learner_cores` cores and the actors get the others,
+    one core each. If there are more actors than remaining cores, the actors
+    share them round-robin.
+
+    Args:
+        num_actors (int): The total number of actors
+        num_learner_cores (int): The number of cores reserved for the learner
+        cores (list): The cores to split. Default: all the available cores
+
+    Returns:
+        learner_cores (list): The cores of the learner
+        actor_cores (list): A list with the cores of each actor
+    '''
+    if cores is None:
+        cores = get_available_cores()
+    if num_learner_cores < 1 or num_learner_cores >= len(cores):
+        raise ValueError('Cannot reserve {} of {} cores for the learner'.format(num_learner_cores, len(cores)))
+    learner_cores, rest = cores[:num_learner_cores], cores[num_learner_cores:]
+    if num_actors > len(rest):
+        log.warning('%i actors share %i cores', num_actors, len(rest))
+    actor_cores = [[rest[i % len(rest)]] for i in range(num_actors)]
+    return learner_cores, actor_cores
+
+def run_actor(target, args, device='cpu', cores=None):
+    ''' The entry of an actor process. An actor on the CPU or pinned to some
+    cores uses a single torch thread, so that the actors and the learner do
+    not oversubscribe the CPU. Actors on a GPU keep torch's default.
+
+    Args:
+        target (callable): The actor function, e.g., `act`
+        args (tuple): The arguments of the actor function
+        device (str): The device of the actor, 'cpu' or the index of a GPU
+        cores (list): The cores to pin the actor to. Default: not pinned
+    '''
+    if str(device) == 'cpu' or cores is not None:
+        torch.set_num_threads(1)
+    if cores is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    target(*args)
+
+class WeightBroadcast(object):
+    ''' A versioned slot in shared memory through which the learner publishes
+    the weights of the positions to the actors of a device. The slot is the
+    shared actor model of the device. Each actor keeps a private copy of the
+    model and pulls the weights between episodes when a newer version has
+    been published.
+
+    The version of a position is odd while the learner writes the slot, so
+    that the actors never keep torn weights.
+    '''
+
+    def __init__(self, num_actors, num_players):
+        ''' Initialize the broadcast
+
+        Args:
+            num_actors (int): The number of actors of the device
+            num_players (int): The number of positions
+        '''
+        self.versions = torch.zeros(num_players, dtype=torch.int64).share_memory_()
+        self.steps = torch.zeros(num_players, dtype=torch.int64).share_memory_()
+        self.publish_times = torch.zeros(num_players, dtype=torch.float64).share_memory_()
+        # The learner step of the weights used by each actor, and the delay of its last pull
+        self.actor_steps = torch.zeros(num_actors, num_players, dtype=torch.int64).share_memory_()
+        self.latencies = torch.zeros(num_actors, num_players, dtype=torch.float64).share_memory_()
+        self.actor_versions = {}
+
+    def publish(self, position, state_dict, slot_agent, step):
+        ''' Write the weights of the learner to the slot. Only the publisher of
+        the learner calls it, see `WeightPublisher`
+
+        Args:
+            position (int): The position
+            state_dict (dict): A snapshot of the weights of the agent of the learner
+            slot_agent (DMCAgent): The agent of the position in the shared model
+            step (int): The number of learner steps of the position
+        '''
+        self.versions[position] += 1
+        slot_agent.load_state_dict(state_dict)
+        self.steps[position] = step
+        self.publish_times[position] = time.time()
+        self.versions[position] += 1
+
+    def pull(self, actor_id, model, local_model):
+        ''' Copy the newly published weights to the private model of an actor
+
+        Args:
+            actor_id (int): The index of the actor on the device
+            model (DMCModel): The shared model, i.e., the slot
+            local_model (DMCModel): The private model of the actor
+        '''
+        versions = self.actor_versions.setdefault(actor_id, [0] * len(self.versions))
+        for position, agent in enumerate(model.get_agents()):
+            version = int(self.versions[position])
+            if version == versions[position] or version % 2 == 1:
+                continue
+            step, publish_time = int(self.steps[position]), float(self.publish_times[position])
+            local_model.get_agent(position).load_state_dict(agent.state_dict())
+            if int(self.versions[position]) != version:
+                # The learner published again during the copy, retry at the next pull
+                continue
+            versions[position] = version
+            self.actor_steps[actor_id, position] = step
+            self.latencies[actor_id, position] = time.time() - publish_time
+
+    def get_stats(self, position, step):
+        ''' Get the staleness of the weights of the actors
+
+        Args:
+            position (int): The position
+            step (int): The current number of learner steps of the position
+
+        Returns:
+            staleness (float): The average number of learner steps the weights of the actors are behind
+            latency (float): The average delay in seconds between a publish and the pulls
+        '''
+        staleness = step - self.actor_steps[:, position].double().mean().item()
+        latency = self.latencies[:, position].mean().item()
+        return staleness, latency
+
+class WeightPublisher(threading.Thread):
+    ''' A background thread of the learner that publishes the weights to the
+    broadcasts of the devices. A learner thread only requests a publish, so
+    the copies to the slots are off its critical path. The publisher holds
+    the lock of the position just to snapshot the weights of the learner.
+    '''
+
+    def __init__(self, broadcasts, learner_model, models, position_locks, recorder=None):
+        ''' Initialize the publisher
+
+        Args:
+            broadcasts (dict): The broadcast of each device
+            learner_model (DMCModel): The model of the learner
+            models (dict): The shared model, i.e., the slot, of each device
+            position_locks (list): The lock of each position
+            recorder (StageRecorder): Records the publishes as `learner_weight_sync`
+        '''
+        super().__init__(name='weight-publisher', daemon=True)
+        self.broadcasts = broadcasts
+        self.learner_model = learner_model
+        self.models = models
+        self.position_locks = position_locks
+        self.recorder = recorder
+        # The latest requested step of each position waiting to be published
+        self.pending = {}
+        self.stopped = False
+        self.condition = threading.Condition()
+
+    def request(self, position, step):
+        ''' Request a publish of the weights of a position. A pending request
+        of the position is replaced, so only the latest weights are copied
+
+        Args:
+            position (int): The position
+            step (int): The number of learner steps of the position
+        '''
+        with self.condition:
+            self.pending[position] = step
+            self.condition.notify()
+
+    def stop(self):
+        ''' Publish the pending requests and stop the thread
+        '''
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.join()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                position, step = self.pending.popitem()
+            start_time = timeit.default_timer()
+            with self.position_locks[position]:
+                state_dict = {k: v.detach().clone() for k, v in self.learner_model.get_agent(position).state_dict().items()}
+            for device, broadcast in self.broadcasts.items():
+                broadcast.publish(position, state_dict, self.models[device].get_agent(position), step)
+            if self.recorder is not None:
+                self.recorder.record('learner_weight_sync', timeit.default_timer() - start_time)
+
+def copy_model(model):
+    ''' Copy the shared model to get the private model of an actor. Only the
+    networks are copied, the agents of the copy keep referencing the shared
+    action features, which are read-only
+
+    Args:
+        model (DMCModel): The shared model
+
+    Returns:
+        (DMCModel): The private model
+    '''
+    memo = {}
+    for agent in model.get_agents():
+        if getattr(agent, 'action_features', None) is not None:
+            memo[id(agent.action_features)] = agent.action_features
+    return copy.deepcopy(model, memo)
+
+def copy_env(env):
+    ''' Copy an environment for a batched actor. The copies keep referencing
+    the read-only action feature table of the environment, if it has one
+
+    Args:
+        env (Env): The environment
+
+    Returns:
+        (Env): The copy
+    '''
+    memo = {}
+    if getattr(env, '_action_features', None) is not None:
+        memo[id(env._action_features)] = env._action_features
+    return copy.deepcopy(env, memo)
+
+def sync_weights(broadcast, actor_id, shared_model, model, recorder=None):
+    ''' Pull the latest weights and record the time as `actor_weight_sync`
+    '''
+    start_time = timeit.default_timer()
+    broadcast.pull(actor_id, shared_model, model)
+    if recorder is not None:
+        recorder.record('actor_weight_sync', timeit.default_timer() - start_time)
+
+class FPSMeter(object):
+    ''' Count the frames written by an actor and log its FPS every `ACTOR_LOG_INTERVAL` seconds
+    '''
+
+    def __init__(self, actor_id):
+        self.actor_id = actor_id
+        self.frames = 0
+        self.last_frames = 0
+        self.last_time = timeit.default_timer()
+
+    def update(self, frames):
+        self.frames += frames
+        now = timeit.default_timer()
+        if now - self.last_time >= ACTOR_LOG_INTERVAL:
+            log.info('Actor %i: %.1f fps', self.actor_id, (self.frames - self.last_frames) / (now - self.last_time))
+            self.last_frames, self.last_time = self.frames, now
+
 def act(
     i,
     device,
@@ -102,57 +463,121 @@ def act(
     full_queue,
     model,
     buffers,
-    env
+    env,
+    broadcast=None,
+    recorder=None
 ):
     try:
         log.info('Device %s Actor %i started.', str(device), i)
 
+        # With a broadcast, the actor plays with a private copy of the model
+        if broadcast is not None:
+            model, shared_model = copy_model(model), model
+
         # Configure environment
         env.seed(i)
-        env.set_agents(model.get_agents())
+        agents = model.get_agents()
+        if recorder is not None:
+            agents = [TimedAgent(agent, recorder) for agent in agents]
+        env.set_agents(agents)
 
-        done_buf = [[] for _ in range(env.num_players)]
-        episode_return_buf = [[] for _ in range(env.num_players)]
-        target_buf = [[] for _ in range(env.num_players)]
-        state_buf = [[] for _ in range(env.num_players)]
-        action_buf = [[] for _ in range(env.num_players)]
-        size = [0 for _ in range(env.num_players)]
+        writers = [RolloutWriter(T, free_queue[p], full_queue[p], buffers[p], recorder, p) for p in range(env.num_players)]
+        fps_meter = FPSMeter(i)
 
         while True:
+            if broadcast is not None:
+                sync_weights(broadcast, i, shared_model, model, recorder)
+            start_time = timeit.default_timer()
             trajectories, payoffs = env.run(is_training=True)
+            if recorder is not None:
+                # The time of the episode not spent in the agents is spent in the environment
+                num_decisions = sum(len(trajectory) // 2 for trajectory in trajectories)
+                env_time = timeit.default_timer() - start_time - sum(agent.inference_time for agent in agents)
+                recorder.record('actor_env_step', env_time / max(num_decisions, 1), num_decisions)
+                for agent in agents:
+                    agent.inference_time = 0.0
+            for p in range(env.num_players):
+                num_steps = len(trajectories[p][:-1]) // 2
+                steps = [(trajectories[p][2*step]['obs'], trajectories[p][2*step+1]) for step in range(num_steps)]
+                if not write_episode(writers[p], env, steps, payoffs[p]):
+                    return
+                fps_meter.update(num_steps)
+
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        log.error('Exception in worker process %i', i)
+        traceback.print_exc()
+        print()
+        raise e
+
+def act_batched(
+    i,
+    device,
+    T,
+    free_queue,
+    full_queue,
+    model,
+    buffers,
+    env,
+    num_envs,
+    broadcast=None,
+    recorder=None
+):
+    ''' Run `num_envs` copies of the environment in one actor. In every sweep,
+    the copies waiting for the same position are grouped and the agent of the
+    position chooses all their actions with one forward pass. Like `act`, the
+    actor stops when a free queue returns None and, with a broadcast, pulls
+    the weights after the episodes ended in a sweep
+    '''
+    try:
+        log.info('Device %s Actor %i started with %i environments.', str(device), i, num_envs)
+
+        if broadcast is not None:
+            model, shared_model = copy_model(model), model
+
+        # Configure environments
+        envs = [copy_env(env) for _ in range(num_envs)]
+        for k, _env in enumerate(envs):
+            _env.seed(i * num_envs + k)
+        agents = model.get_agents()
+
+        writers = [RolloutWriter(T, free_queue[p], full_queue[p], buffers[p], recorder, p) for p in range(env.num_players)]
+        fps_meter = FPSMeter(i)
+
+        episodes = [[[] for _ in range(env.num_players)] for _ in range(num_envs)]
+        states, player_ids = map(list, zip(*[_env.reset() for _env in envs]))
+
+        while True:
+            episode_ended = False
             for p in range(env.num_players):
-                size[p] += len(trajectories[p][:-1]) // 2
-                diff = size[p] - len(target_buf[p])
-                if diff > 0:
-                    done_buf[p].extend([False for _ in range(diff-1)])
-                    done_buf[p].append(True)
-                    episode_return_buf[p].extend([0.0 for _ in range(diff-1)])
-                    episode_return_buf[p].append(float(payoffs[p]))
-                    target_buf[p].extend([float(payoffs[p]) for _ in range(diff)])
-                    # State and action
-                    for i in range(0, len(trajectories[p])-2, 2):
-                        state = trajectories[p][i]['obs']
-                        action = env.get_action_feature(trajectories[p][i+1])
-                        state_buf[p].append(torch.from_numpy(state))
-                        action_buf[p].append(torch.from_numpy(action))
-                
-                while size[p] > T:
-                    index = free_queue[p].get()
-                    if index is None:
-                        break
-                    for t in range(T):
-                        buffers[p]['done'][index][t, ...] = done_buf[p][t]
-                        buffers[p]['episode_return'][index][t, ...] = episode_return_buf[p][t]
-                        buffers[p]['target'][index][t, ...] = target_buf[p][t]
-                        buffers[p]['state'][index][t, ...] = state_buf[p][t]
-                        buffers[p]['action'][index][t, ...] = action_buf[p][t]
-                    full_queue[p].put(index)
-                    done_buf[p] = done_buf[p][T:]
-                    episode_return_buf[p] = episode_return_buf[p][T:]
-                    target_buf[p] = target_buf[p][T:]
-                    state_buf[p] = state_buf[p][T:]
-                    action_buf[p] = action_buf[p][T:]
-                    size[p] -= T
+                pending = [k for k in range(num_envs) if player_ids[k] == p]
+                if not pending:
+                    continue
+                start_time = timeit.default_timer()
+                actions = agents[p].batch_step([states[k] for k in pending])
+                inference_time, env_time = timeit.default_timer() - start_time, 0.0
+                for k, action in zip(pending, actions):
+                    _env = envs[k]
+                    episodes[k][p].append((states[k]['obs'], action))
+                    start_time = timeit.default_timer()
+                    states[k], player_ids[k] = _env.step(action, agents[p].use_raw)
+                    env_time += timeit.default_timer() - start_time
+                    if _env.is_over():
+                        payoffs = _env.get_payoffs()
+                        for q in range(env.num_players):
+                            if not write_episode(writers[q], _env, episodes[k][q], payoffs[q]):
+                                return
+                            fps_meter.update(len(episodes[k][q]))
+                        episodes[k] = [[] for _ in range(env.num_players)]
+                        states[k], player_ids[k] = _env.reset()
+                        episode_ended = True
+                if recorder is not None:
+                    # Per decision, the batched forward pass is shared by the pending environments
+                    recorder.record('actor_inference', inference_time / len(pending), len(pending))
+                    recorder.record('actor_env_step', env_time / len(pending), len(pending))
+            if episode_ended and broadcast is not None:
+                sync_weights(broadcast, i, shared_model, model, recorder)
 
     except KeyboardInterrupt:
         pass
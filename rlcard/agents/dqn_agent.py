@@ -32,7 +32,7 @@ import torch.nn as nn
 from collections import namedtuple
 from copy import deepcopy
 
-from rlcard.utils.utils import remove_illegal
+from rlcard.utils.utils import remove_illegal, stack_states
 
 Transition = namedtuple('Transition', ['state', 'action', 'reward', 'next_state', 'legal_actions', 'done'])
 
@@ -56,7 +56,12 @@ class DQNAgent(object):
                  train_every=1,
                  mlp_layers=None,
                  learning_rate=0.00005,
-                 device=None):
+                 device=None,
+                 prioritized_replay=False,
+                 priority_alpha=0.6,
+                 priority_beta_start=0.4,
+                 priority_beta_end=1.0,
+                 priority_beta_steps=20000):
 
         '''
         Q-Learning algorithm for off-policy TD control using Function Approximation.
@@ -81,6 +86,13 @@ class DQNAgent(object):
             mlp_layers (list): The layer number and the dimension of each layer in MLP
             learning_rate (float): The learning rate of the DQN agent.
             device (torch.device): whether to use the cpu or gpu
+            prioritized_replay (bool): Sample the transitions in proportion to their TD errors
+              instead of uniformly
+            priority_alpha (float): How much the TD errors are used in the priorities, 0 is uniform
+            priority_beta_start (float): The start value of the exponent of the importance-sampling
+              weights, which correct the bias of the prioritized sampling
+            priority_beta_end (float): The final value of the exponent after annealing
+            priority_beta_steps (int): Number of steps to anneal the exponent over
         '''
         self.use_raw = False
         self.replay_memory_init_size = replay_memory_init_size
@@ -90,6 +102,7 @@ class DQNAgent(object):
         self.batch_size = batch_size
         self.num_actions = num_actions
         self.train_every = train_every
+        self.prioritized_replay = prioritized_replay
 
         # Torch device
         if device is None:
@@ -106,6 +119,9 @@ class DQNAgent(object):
         # The epsilon decay scheduler
         self.epsilons = np.linspace(epsilon_start, epsilon_end, epsilon_decay_steps)
 
+        # The annealing of the importance-sampling exponent
+        self.priority_betas = np.linspace(priority_beta_start, priority_beta_end, max(priority_beta_steps, 1))
+
         # Create estimators
         self.q_estimator = Estimator(num_actions=num_actions, learning_rate=learning_rate, state_shape=state_shape, \
             mlp_layers=mlp_layers, device=self.device)
@@ -113,7 +129,10 @@ class DQNAgent(object):
             mlp_layers=mlp_layers, device=self.device)
 
         # Create replay memory
-        self.memory = Memory(replay_memory_size, batch_size)
+        if prioritized_replay:
+            self.memory = PrioritizedMemory(replay_memory_size, batch_size, num_actions, alpha=priority_alpha)
+        else:
+            self.memory = Memory(replay_memory_size, batch_size, num_actions)
 
     def feed(self, ts):
         ''' Store data in to replay buffer and train the agent. There are two stages.
@@ -185,22 +204,77 @@ class DQNAgent(object):
 
         return masked_q_values
 
+    def batch_step(self, obs, legal_mask=None):
+        ''' Batched counterpart of `step` with one forward pass for all the states
+
+        Args:
+            obs (numpy.array or list): The stacked observations, or a list of states
+            legal_mask (numpy.array): A boolean (batch, num_actions) legal-action mask.
+              Not needed if `obs` is a list of states
+
+        Returns:
+            actions (numpy.array): The epsilon-greedy actions
+        '''
+        if legal_mask is None:
+            obs, legal_mask = stack_states(obs, self.num_actions)
+        best_actions, _ = self.batch_predict(obs, legal_mask)
+        epsilon = self.epsilons[min(self.total_t, self.epsilon_decay_steps-1)]
+        random_actions = np.argmax(np.where(legal_mask, np.random.random_sample(legal_mask.shape), -1), axis=1)
+        explore = np.random.random_sample(len(best_actions)) < epsilon
+        return np.where(explore, random_actions, best_actions)
+
+    def batch_eval_step(self, obs, legal_mask=None):
+        ''' Batched counterpart of `eval_step` with one forward pass for all the states
+
+        Args:
+            obs (numpy.array or list): The stacked observations, or a list of states
+            legal_mask (numpy.array): A boolean (batch, num_actions) legal-action mask.
+              Not needed if `obs` is a list of states
+
+        Returns:
+            actions (numpy.array): The greedy actions
+            q_values (numpy.array): The (batch, num_actions) Q-values, -inf for the illegal actions
+        '''
+        if legal_mask is None:
+            obs, legal_mask = stack_states(obs, self.num_actions)
+        return self.batch_predict(obs, legal_mask)
+
+    def batch_predict(self, obs, legal_mask):
+        ''' Predict the masked Q-values of a batch of states. The masking and
+            the argmax are done on the device
+
+        Args:
+            obs (numpy.array): The stacked observations
+            legal_mask (numpy.array): A boolean (batch, num_actions) legal-action mask
+
+        Returns:
+            best_actions (numpy.array): The legal actions with the highest Q-values
+            q_values (numpy.array): The (batch, num_actions) Q-values, -inf for the illegal actions
+        '''
+        with torch.no_grad():
+            obs = torch.from_numpy(np.asarray(obs)).float().to(self.device)
+            legal_mask = torch.from_numpy(np.asarray(legal_mask, dtype=bool)).to(self.device)
+            q_values = self.q_estimator.qnet(obs).masked_fill(~legal_mask, -np.inf)
+            best_actions = q_values.argmax(dim=1)
+        return best_actions.cpu().numpy(), q_values.cpu().numpy()
+
     def train(self):
         ''' Train the network
 
         Returns:
             loss (float): The loss of the current batch.
         '''
-        state_batch, action_batch, reward_batch, next_state_batch, legal_actions_batch, done_batch = self.memory.sample()
+        if self.prioritized_replay:
+            beta = self.priority_betas[min(self.total_t, len(self.priority_betas)-1)]
+            state_batch, action_batch, reward_batch, next_state_batch, legal_actions_batch, done_batch, \
+                indices, weights = self.memory.sample(beta)
+        else:
+            state_batch, action_batch, reward_batch, next_state_batch, legal_actions_batch, done_batch = self.memory.sample()
+            weights = None
 
         # Calculate best next actions using Q-network (Double DQN)
         q_values_next = self.q_estimator.predict_nograd(next_state_batch)
-        legal_actions = []
-        for b in range(self.batch_size):
-            legal_actions.extend([i + b * self.num_actions for i in legal_actions_batch[b]])
-        masked_q_values = -np.inf * np.ones(self.num_actions * self.batch_size, dtype=float)
-        masked_q_values[legal_actions] = q_values_next.flatten()[legal_actions]
-        masked_q_values = masked_q_values.reshape((self.batch_size, self.num_actions))
+        masked_q_values = np.where(legal_actions_batch, q_values_next, -np.inf)
         best_actions = np.argmax(masked_q_values, axis=1)
 
         # Evaluate best next actions using Target-network (Double DQN)
@@ -209,9 +283,9 @@ class DQNAgent(object):
             self.discount_factor * q_values_next_target[np.arange(self.batch_size), best_actions]
 
         # Perform gradient descent update
-        state_batch = np.array(state_batch)
-
-        loss = self.q_estimator.update(state_batch, action_batch, target_batch)
+        loss = self.q_estimator.update(state_batch, action_batch, target_batch, weights)
+        if self.prioritized_replay:
+            self.memory.update_priorities(indices, self.q_estimator.td_errors)
         print('\rINFO - Step {}, rl-loss: {}'.format(self.total_t, loss), end='')
 
         # Update the target estimator
@@ -277,6 +351,9 @@ class Estimator(object):
         # set up loss function
         self.mse_loss = nn.MSELoss(reduction='mean')
 
+        # The TD errors of the last updated batch
+        self.td_errors = None
+
         # set up optimizer
         self.optimizer =  torch.optim.Adam(self.qnet.parameters(), lr=self.learning_rate)
 
@@ -297,7 +374,7 @@ class Estimator(object):
             q_as = self.qnet(s).cpu().numpy()
         return q_as
 
-    def update(self, s, a, y):
+    def update(self, s, a, y, weights=None):
         ''' Updates the estimator towards the given targets.
             In this case y is the target-network estimated
             value of the Q-network optimal actions, which
@@ -307,9 +384,10 @@ class Estimator(object):
           s (np.ndarray): (batch, state_shape) state representation
           a (np.ndarray): (batch,) integer sampled actions
           y (np.ndarray): (batch,) value of optimal actions according to Q-target
+          weights (np.ndarray): (batch,) optional importance-sampling weights of the squared errors
 
         Returns:
-          The calculated loss on the batch.
+          The calculated loss on the batch. The TD errors y - Q of the batch are kept in `td_errors`.
         '''
         self.optimizer.zero_grad()
 
@@ -326,7 +404,12 @@ class Estimator(object):
         Q = torch.gather(q_as, dim=-1, index=a.unsqueeze(-1)).squeeze(-1)
 
         # update model
-        batch_loss = self.mse_loss(Q, y)
+        if weights is None:
+            batch_loss = self.mse_loss(Q, y)
+        else:
+            weights = torch.from_numpy(weights).float().to(self.device)
+            batch_loss = (weights * (Q - y) ** 2).mean()
+        self.td_errors = (y - Q).detach().cpu().numpy()
         batch_loss.backward()
         self.optimizer.step()
         batch_loss = batch_loss.item()
@@ -374,20 +457,43 @@ class EstimatorNetwork(nn.Module):
         return self.fc_layers(s)
 
 class Memory(object):
-    ''' Memory for saving transitions
+    ''' Memory for saving transitions. The transitions are stored in
+    preallocated arrays, one per field, that are written in a circular way.
+    The arrays are allocated on the first save, when the shape and the type
+    of the states are known.
     '''
 
-    def __init__(self, memory_size, batch_size):
+    def __init__(self, memory_size, batch_size, num_actions=None):
         ''' Initialize
         Args:
             memory_size (int): the size of the memroy buffer
+            batch_size (int): the size of the sampled minibatches
+            num_actions (int): the number of actions, i.e., the size of the legal action masks.
+                If None, the masks are as wide as the largest legal action saved so far
         '''
         self.memory_size = memory_size
         self.batch_size = batch_size
-        self.memory = []
+        self.num_actions = num_actions
+        self.size = 0
+        self.position = 0
+        self.states = None
+
+    def __len__(self):
+        return self.size
+
+    def _allocate(self, state):
+        state = np.asarray(state)
+        shape = (self.memory_size,) + state.shape
+        self.states = np.empty(shape, dtype=state.dtype)
+        self.next_states = np.empty(shape, dtype=state.dtype)
+        self.actions = np.empty(self.memory_size, dtype=np.int64)
+        self.rewards = np.empty(self.memory_size, dtype=np.float32)
+        self.legal_actions = np.zeros((self.memory_size, self.num_actions or 0), dtype=bool)
+        self.dones = np.empty(self.memory_size, dtype=bool)
 
     def save(self, state, action, reward, next_state, legal_actions, done):
-        ''' Save transition into memory
+        ''' Save transition into memory. The oldest transition is overwritten
+        when the memory is full
 
         Args:
             state (numpy.array): the current state
@@ -397,20 +503,173 @@ class Memory(object):
             legal_actions (list): the legal actions of the next state
             done (boolean): whether the episode is finished
         '''
-        if len(self.memory) == self.memory_size:
-            self.memory.pop(0)
-        transition = Transition(state, action, reward, next_state, legal_actions, done)
-        self.memory.append(transition)
+        if self.states is None:
+            self._allocate(state)
+        if self.num_actions is None and len(legal_actions) > 0 and max(legal_actions) >= self.legal_actions.shape[1]:
+            # Widen the masks to the largest legal action
+            padding = np.zeros((self.memory_size, max(legal_actions) + 1 - self.legal_actions.shape[1]), dtype=bool)
+            self.legal_actions = np.concatenate([self.legal_actions, padding], axis=1)
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.legal_actions[i] = False
+        self.legal_actions[i, legal_actions] = True
+        self.dones[i] = done
+        self.position = (i + 1) % self.memory_size
+        self.size = min(self.size + 1, self.memory_size)
 
     def sample(self):
-        ''' Sample a minibatch from the replay memory
+        ''' Sample a minibatch from the replay memory, without replacement
+
+        Returns:
+            state_batch (numpy.array): a batch of states
+            action_batch (numpy.array): a batch of actions
+            reward_batch (numpy.array): a batch of rewards
+            next_state_batch (numpy.array): a batch of states
+            legal_actions_batch (numpy.array): a batch of boolean masks of the legal actions
+                of the next states, of shape (batch_size, num_actions)
+            done_batch (numpy.array): a batch of dones
+        '''
+        indices = np.array(random.sample(range(self.size), self.batch_size))
+        return (self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.legal_actions[indices], self.dones[indices])
+
+class SumTree(object):
+    ''' A binary tree whose leaves hold the priorities and whose inner nodes hold the
+    sums of their children, stored in a flat array with the root at index 1. Updating
+    and sampling a batch take O(log n) vectorized operations.
+    '''
+
+    def __init__(self, capacity):
+        ''' Initialize
+        Args:
+            capacity (int): the number of leaves
+        '''
+        self.capacity = capacity
+        self.num_leaves = 1
+        while self.num_leaves < capacity:
+            self.num_leaves *= 2
+        self.tree = np.zeros(2 * self.num_leaves, dtype=np.float64)
+
+    def total(self):
+        ''' Get the sum of all the priorities
+        '''
+        return self.tree[1]
+
+    def set(self, index, priority):
+        ''' Set the priority of one leaf and update the sums above it
+
+        Args:
+            index (int): the index of the leaf
+            priority (float): the new priority
+        '''
+        tree = self.tree
+        node = index + self.num_leaves
+        change = priority - tree[node]
+        while node >= 1:
+            tree[node] += change
+            node //= 2
+
+    def update(self, indices, priorities):
+        ''' Set the priorities of some leaves and update the sums above them
+
+        Args:
+            indices (numpy.array): the indices of the leaves
+            priorities (numpy.array): the new priorities
+        '''
+        tree = self.tree
+        nodes = np.asarray(indices) + self.num_leaves
+        tree[nodes] = priorities
+        # The sums are recomputed from the children, so repeated nodes are harmless
+        nodes = nodes // 2
+        while nodes[0] >= 1:
+            tree[nodes] = tree[2 * nodes] + tree[2 * nodes + 1]
+            nodes //= 2
+
+    def find(self, values):
+        ''' Find the leaves where some prefix sums of the priorities fall
+
+        Args:
+            values (numpy.array): prefix sums in [0, total)
+
+        Returns:
+            (numpy.array): the indices of the leaves, which all have a positive priority
+        '''
+        tree = self.tree
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.num_leaves:
+            nodes *= 2
+            left = tree[nodes]
+            # Never go right into a subtree without priority, where rounding errors
+            # near the total would otherwise lead to the empty leaves
+            go_right = (values >= left) & (tree[nodes + 1] > 0)
+            values -= left * go_right
+            nodes += go_right
+        return nodes - self.num_leaves
+
+    def __getitem__(self, indices):
+        return self.tree[np.asarray(indices) + self.num_leaves]
+
+class PrioritizedMemory(Memory):
+    ''' Memory that samples the transitions in proportion to their priorities,
+    the absolute TD errors to the power alpha, see Schaul et al., "Prioritized
+    Experience Replay" (ICLR 2016). The new transitions get the largest priority
+    so far, so that they are replayed at least once.
+    '''
+
+    def __init__(self, memory_size, batch_size, num_actions=None, alpha=0.6, epsilon=1e-6):
+        ''' Initialize
+        Args:
+            memory_size (int): the size of the memroy buffer
+            batch_size (int): the size of the sampled minibatches
+            num_actions (int): the number of actions, i.e., the size of the legal action masks, see `Memory`
+            alpha (float): how much the TD errors are used, 0 is uniform sampling
+            epsilon (float): a small priority added to the TD errors so that every transition can be sampled
+        '''
+        super().__init__(memory_size, batch_size, num_actions)
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(memory_size)
+
+    def save(self, state, action, reward, next_state, legal_actions, done):
+        ''' Save transition into memory with the largest priority, see `Memory.save`
+        '''
+        self.tree.set(self.position, self.max_priority)
+        super().save(state, action, reward, next_state, legal_actions, done)
+
+    def sample(self, beta=0.4):
+        ''' Sample a minibatch in proportion to the priorities. The range of the
+        priorities is split in batch_size segments with one sample in each.
+
+        Args:
+            beta (float): the exponent of the importance-sampling weights, 1 fully corrects
+                the bias of the sampling
 
         Returns:
-            state_batch (list): a batch of states
-            action_batch (list): a batch of actions
-            reward_batch (list): a batch of rewards
-            next_state_batch (list): a batch of states
-            done_batch (list): a batch of dones
+            The six batches of `Memory.sample` followed by
+            indices (numpy.array): the indices of the sampled transitions, see `update_priorities`
+            weights (numpy.array): the importance-sampling weights, divided by their maximum
+        '''
+        segment = self.tree.total() / self.batch_size
+        values = (np.arange(self.batch_size) + np.random.rand(self.batch_size)) * segment
+        indices = self.tree.find(values)
+        probs = self.tree[indices] / self.tree.total()
+        weights = (self.size * probs) ** (-beta)
+        weights = (weights / weights.max()).astype(np.float32)
+        return (self.states[indices], self.actions[indices], self.rewards[indices], self.next_states[indices],
+                self.legal_actions[indices], self.dones[indices], indices, weights)
+
+    def update_priorities(self, indices, td_errors):
+        ''' Update the priorities of sampled transitions
+
+        Args:
+            indices (numpy.array): the indices returned by `sample`
+            td_errors (numpy.array): the new TD errors of the transitions
         '''
-        samples = random.sample(self.memory, self.batch_size)
-        return map(np.array, zip(*samples))
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, priorities.max())
@@ -0,0 +1,142 @@
+''' Monte Carlo CFR (MCCFR) agents
+
+See Lanctot et al., "Monte Carlo Sampling for Regret Minimization in
+Extensive Games" (NIPS 2009) for more details.
+'''
+import numpy as np
+
+from rlcard.agents.array_cfr_agent import ArrayCFRAgent
+
+class ExternalSamplingMCCFRAgent(ArrayCFRAgent):
+    ''' Implement external-sampling MCCFR. In each traversal, all the actions of
+    the traversing player are explored while the actions of the other players
+    are sampled from their current strategies. The chance outcomes are sampled
+    by the environment. The table and the save/load layout are the ones of
+    `ArrayCFRAgent`.
+    '''
+
+    def run_traversals(self):
+        ''' Do one external-sampling traversal for each player
+        '''
+        for player_id in range(self.env.num_players):
+            self.env.reset()
+            self.traverse_tree(player_id)
+
+    def update_policy(self):
+        ''' The strategy is recomputed from the regrets when a set is visited
+        '''
+
+    def traverse_tree(self, player_id):
+        ''' Traverse the sampled game tree, update the regrets
+
+        Args:
+            player_id: The player to update the value
+
+        Returns:
+            utility (float): The sampled utility of the traversing player
+        '''
+        if self.env.is_over():
+            return self.env.get_payoffs()[player_id]
+
+        current_player = self.env.get_player_id()
+        obs, legal_actions = self.get_state(current_player)
+        infoset_id = self.table.get_id(obs, legal_actions)
+        action_probs = self.table.current_strategy(infoset_id, legal_actions)
+
+        if current_player != player_id:
+            # Sample one action and update the average strategy of the other player
+            self.table.strategy_sums[infoset_id, legal_actions] += action_probs
+            action = legal_actions[np.random.choice(len(legal_actions), p=action_probs)]
+            self.env.step(action)
+            utility = self.traverse_tree(player_id)
+            self.env.step_back()
+            return utility
+
+        action_utilities = np.zeros(len(legal_actions))
+        for i, action in enumerate(legal_actions):
+            self.env.step(action)
+            action_utilities[i] = self.traverse_tree(player_id)
+            self.env.step_back()
+
+        state_utility = action_probs @ action_utilities
+        self.table.regrets[infoset_id, legal_actions] += action_utilities - state_utility
+        return state_utility
+
+class OutcomeSamplingMCCFRAgent(ArrayCFRAgent):
+    ''' Implement outcome-sampling MCCFR. In each traversal, a single trajectory
+    is sampled. The traversing player samples from an epsilon-exploring version
+    of its current strategy and the regrets are corrected by importance sampling.
+    The table and the save/load layout are the ones of `ArrayCFRAgent`.
+    '''
+
+    def __init__(self, env, model_path='./cfr_model', chunk_size=4096, epsilon=0.6):
+        ''' Initilize Agent
+
+        Args:
+            env (Env): Env class
+            model_path (str): The directory to save/load the model
+            chunk_size (int): The number of rows added when the table is full
+            epsilon (float): The exploration rate of the traversing player
+        '''
+        super().__init__(env, model_path, chunk_size)
+        self.epsilon = epsilon
+
+    def run_traversals(self):
+        ''' Sample one trajectory for each player
+        '''
+        for player_id in range(self.env.num_players):
+            self.env.reset()
+            self.traverse_tree(player_id, 1.0, 1.0, 1.0)
+
+    def update_policy(self):
+        ''' The strategy is recomputed from the regrets when a set is visited
+        '''
+
+    def traverse_tree(self, player_id, player_prob, others_prob, sample_prob):
+        ''' Sample a trajectory, update the regrets and the average strategy
+
+        Args:
+            player_id: The player to update the value
+            player_prob (float): The reach probability of the traversing player
+            others_prob (float): The reach probability of the other players
+            sample_prob (float): The probability of sampling the trajectory so far
+
+        Returns:
+            (tuple) that contains:
+                utility (float): The utility of the traversing player divided by the
+                                 probability of sampling the whole trajectory
+                tail_prob (float): The probability of reaching the terminal from
+                                   the current node under the current strategies
+        '''
+        if self.env.is_over():
+            return self.env.get_payoffs()[player_id] / sample_prob, 1.0
+
+        current_player = self.env.get_player_id()
+        obs, legal_actions = self.get_state(current_player)
+        infoset_id = self.table.get_id(obs, legal_actions)
+        action_probs = self.table.current_strategy(infoset_id, legal_actions)
+
+        if current_player == player_id:
+            sampling_probs = self.epsilon / len(legal_actions) + (1 - self.epsilon) * action_probs
+        else:
+            sampling_probs = action_probs
+        i = np.random.choice(len(legal_actions), p=sampling_probs)
+
+        self.env.step(legal_actions[i])
+        if current_player == player_id:
+            utility, tail_prob = self.traverse_tree(player_id, player_prob * action_probs[i],
+                                                    others_prob, sample_prob * sampling_probs[i])
+        else:
+            utility, tail_prob = self.traverse_tree(player_id, player_prob,
+                                                    others_prob * action_probs[i], sample_prob * sampling_probs[i])
+        self.env.step_back()
+
+        if current_player == player_id:
+            weighted_utility = utility * others_prob
+            regrets = -weighted_utility * tail_prob * action_probs[i] * np.ones(len(legal_actions))
+            regrets[i] = weighted_utility * tail_prob * (1 - action_probs[i])
+            self.table.regrets[infoset_id, legal_actions] += regrets
+        else:
+            self.table.strategy_sums[infoset_id, legal_actions] += others_prob / sample_prob * action_probs
+
+        return utility, tail_prob * action_probs[i]
@@ -19,6 +19,7 @@
 See the paper https://arxiv.org/abs/1603.01121 for more details.
 '''
 
+import os
 import random
 import collections
 import enum
@@ -28,7 +29,7 @@ import torch.nn as nn
 import torch.nn.functional as F
 
 from rlcard.agents.dqn_agent import DQNAgent
-from rlcard.utils.utils import remove_illegal
+from rlcard.utils.utils import remove_illegal, stack_states, sample_masked
 
 Transition = collections.namedtuple('Transition', 'info_state action_probs')
 
@@ -62,7 +63,9 @@ class NFSPAgent(object):
                  q_train_every=1,
                  q_mlp_layers=None,
                  evaluate_with='average_policy',
-                 device=None):
+                 device=None,
+                 reservoir_buffer_state_dtype=None,
+                 reservoir_buffer_path=None):
         ''' Initialize the NFSP agent.
 
         Args:
@@ -89,6 +92,11 @@ class NFSPAgent(object):
             q_train_step (int): Train the model every X steps.
             q_mlp_layers (list): The layer sizes of inner DQN agent.
             device (torch.device): Whether to use the cpu or gpu
+            reservoir_buffer_state_dtype (numpy.dtype): The type of the states in the buffer for
+              average policy, e.g., np.int8 for the binary observations of the card games.
+              Defaults to the type of the first state
+            reservoir_buffer_path (str): If set, the buffer for average policy is stored in
+              memory-mapped files in this directory instead of RAM
         '''
         self.use_raw = False
         self._num_actions = num_actions
@@ -100,7 +108,8 @@ class NFSPAgent(object):
         self._anticipatory_param = anticipatory_param
         self._min_buffer_size_to_learn = min_buffer_size_to_learn
 
-        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity)
+        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity, state_dtype=reservoir_buffer_state_dtype,
+                                                 path=reservoir_buffer_path)
         self._prev_timestep = None
         self._prev_action = None
         self.evaluate_with = evaluate_with
@@ -205,6 +214,50 @@ class NFSPAgent(object):
             raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
         return action, info
 
+    def batch_step(self, obs, legal_mask=None):
+        ''' Batched counterpart of `step` with one forward pass for all the states.
+            All the states are played with the policy of the current episode
+
+        Args:
+            obs (numpy.array or list): The stacked observations, or a list of states
+            legal_mask (numpy.array): A boolean (batch, num_actions) legal-action mask.
+              Not needed if `obs` is a list of states
+
+        Returns:
+            actions (numpy.array): The actions
+        '''
+        if legal_mask is None:
+            obs, legal_mask = stack_states(obs, self._num_actions)
+        if self._mode == 'best_response':
+            actions = self._rl_agent.batch_step(obs, legal_mask)
+            for info_state, one_hot in zip(obs, np.eye(self._num_actions)[actions]):
+                self._add_transition(info_state, one_hot)
+        elif self._mode == 'average_policy':
+            actions, _ = self._batch_act(obs, legal_mask)
+        return actions
+
+    def batch_eval_step(self, obs, legal_mask=None):
+        ''' Batched counterpart of `eval_step` with one forward pass for all the states
+
+        Args:
+            obs (numpy.array or list): The stacked observations, or a list of states
+            legal_mask (numpy.array): A boolean (batch, num_actions) legal-action mask.
+              Not needed if `obs` is a list of states
+
+        Returns:
+            actions (numpy.array): The actions
+            values (numpy.array): The (batch, num_actions) probabilities of the average policy,
+              or the Q-values of the best response
+        '''
+        if legal_mask is None:
+            obs, legal_mask = stack_states(obs, self._num_actions)
+        if self.evaluate_with == 'best_response':
+            return self._rl_agent.batch_eval_step(obs, legal_mask)
+        elif self.evaluate_with == 'average_policy':
+            return self._batch_act(obs, legal_mask)
+        else:
+            raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
+
     def sample_episode_policy(self):
         ''' Sample average/best_response policy
         '''
@@ -232,6 +285,24 @@ class NFSPAgent(object):
 
         return action_probs
 
+    def _batch_act(self, obs, legal_mask):
+        ''' Sample the actions of the average policy for a batch of states. The
+            illegal actions are masked on the device
+
+        Args:
+            obs (numpy.array): The stacked observations
+            legal_mask (numpy.array): A boolean (batch, num_actions) legal-action mask
+
+        Returns:
+            actions (numpy.array): The sampled actions
+            action_probs (numpy.array): The probabilities of the legal actions
+        '''
+        with torch.no_grad():
+            info_states = torch.from_numpy(np.asarray(obs)).float().to(self.device)
+            mask = torch.from_numpy(np.asarray(legal_mask, dtype=bool)).to(self.device)
+            action_probs = self.policy_network(info_states).exp().masked_fill(~mask, 0)
+        return sample_masked(action_probs.cpu().numpy(), legal_mask)
+
     def _add_transition(self, state, probs):
         ''' Adds the new transition to the reservoir buffer.
 
@@ -259,18 +330,16 @@ class NFSPAgent(object):
                 len(self._reservoir_buffer) < self._min_buffer_size_to_learn):
             return None
 
-        transitions = self._reservoir_buffer.sample(self._batch_size)
-        info_states = [t.info_state for t in transitions]
-        action_probs = [t.action_probs for t in transitions]
+        info_states, action_probs = self._reservoir_buffer.sample(self._batch_size)
 
         self.policy_network_optimizer.zero_grad()
         self.policy_network.train()
 
         # (batch, state_size)
-        info_states = torch.from_numpy(np.array(info_states)).float().to(self.device)
+        info_states = torch.from_numpy(info_states).float().to(self.device)
 
         # (batch, num_actions)
-        eval_action_probs = torch.from_numpy(np.array(action_probs)).float().to(self.device)
+        eval_action_probs = torch.from_numpy(action_probs).float().to(self.device)
 
         # (batch, num_actions)
         log_forecast_action_probs = self.policy_network(info_states)
@@ -337,31 +406,68 @@ class AveragePolicyNetwork(nn.Module):
 class ReservoirBuffer(object):
     ''' Allows uniform sampling over a stream of data.
 
-    This class supports the storage of arbitrary elements, such as observation
-    tensors, integer actions, etc.
+    This class stores the transitions of the average policy, i.e., the states
+    and the action probabilities, in two preallocated arrays that are allocated
+    when the first transition is added. The probabilities are stored in half
+    precision and the states in `state_dtype`. The arrays can be memory-mapped
+    files so that the capacity is not bounded by the RAM.
 
     See https://en.wikipedia.org/wiki/Reservoir_sampling for more details.
     '''
 
-    def __init__(self, reservoir_buffer_capacity):
+    def __init__(self, reservoir_buffer_capacity, state_dtype=None, probs_dtype=np.float16, path=None):
         ''' Initialize the buffer.
+
+        Args:
+            reservoir_buffer_capacity (int): The maximum number of transitions
+            state_dtype (numpy.dtype): The type of the stored states. Defaults to the type
+                of the first state
+            probs_dtype (numpy.dtype): The type of the stored action probabilities
+            path (str): If set, the arrays are memory-mapped to `info_states.npy` and
+                `action_probs.npy` in this directory
         '''
         self._reservoir_buffer_capacity = reservoir_buffer_capacity
-        self._data = []
+        self._state_dtype = state_dtype
+        self._probs_dtype = probs_dtype
+        self._path = path
+        self._info_states = None
+        self._action_probs = None
+        self._size = 0
         self._add_calls = 0
 
+    def _allocate(self, info_state, action_probs):
+        info_state, action_probs = np.asarray(info_state), np.asarray(action_probs)
+        state_dtype = self._state_dtype if self._state_dtype is not None else info_state.dtype
+        states_shape = (self._reservoir_buffer_capacity,) + info_state.shape
+        probs_shape = (self._reservoir_buffer_capacity,) + action_probs.shape
+        if self._path is None:
+            self._info_states = np.empty(states_shape, dtype=state_dtype)
+            self._action_probs = np.empty(probs_shape, dtype=self._probs_dtype)
+        else:
+            os.makedirs(self._path, exist_ok=True)
+            self._info_states = np.lib.format.open_memmap(os.path.join(self._path, 'info_states.npy'),
+                                                          mode='w+', dtype=state_dtype, shape=states_shape)
+            self._action_probs = np.lib.format.open_memmap(os.path.join(self._path, 'action_probs.npy'),
+                                                           mode='w+', dtype=self._probs_dtype, shape=probs_shape)
+
     def add(self, element):
         ''' Potentially adds `element` to the reservoir buffer.
 
         Args:
-            element (object): data to be added to the reservoir buffer.
+            element (Transition): The state and the action probabilities to be added
+                to the reservoir buffer.
         '''
-        if len(self._data) < self._reservoir_buffer_capacity:
-            self._data.append(element)
+        info_state, action_probs = element
+        if self._info_states is None:
+            self._allocate(info_state, action_probs)
+        if self._size < self._reservoir_buffer_capacity:
+            idx = self._size
+            self._size += 1
         else:
             idx = np.random.randint(0, self._add_calls + 1)
-            if idx < self._reservoir_buffer_capacity:
-                self._data[idx] = element
+        if idx < self._reservoir_buffer_capacity:
+            self._info_states[idx] = info_state
+            self._action_probs[idx] = action_probs
         self._add_calls += 1
 
     def sample(self, num_samples):
@@ -371,25 +477,28 @@ class ReservoirBuffer(object):
             num_samples (int): The number of samples to draw.
 
         Returns:
-            An iterable over `num_samples` random elements of the buffer.
+            (tuple) that contains:
+                info_states (numpy.array): The sampled states, of shape (num_samples, state_shape)
+                action_probs (numpy.array): Their action probabilities, of shape (num_samples, num_actions)
 
         Raises:
             ValueError: If there are less than `num_samples` elements in the buffer
         '''
-        if len(self._data) < num_samples:
+        if self._size < num_samples:
             raise ValueError("{} elements could not be sampled from size {}".format(
-                    num_samples, len(self._data)))
-        return random.sample(self._data, num_samples)
+                    num_samples, self._size))
+        indices = np.array(random.sample(range(self._size), num_samples), dtype=np.int64)
+        return self._info_states[indices], self._action_probs[indices]
 
     def clear(self):
         ''' Clear the buffer
         '''
-        self._data = []
+        self._size = 0
         self._add_calls = 0
 
     def __len__(self):
-        return len(self._data)
+        return self._size
 
     def __iter__(self):
-        return iter(self._data)
-
+        for i in range(self._size):
+            yield Transition(info_state=self._info_states[i], action_probs=self._action_probs[i])
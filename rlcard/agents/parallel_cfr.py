@@ -0,0 +1,143 @@
+''' Run the traversals of CFR and MCCFR in worker processes
+'''
+import time
+import multiprocessing
+import numpy as np
+
+import rlcard
+from rlcard.agents.array_cfr_agent import ArrayCFRAgent, InfoSetTable
+from rlcard.utils import seeding
+
+def _cfr_worker(conn, env_id, config, agent_class, agent_kwargs):
+    ''' Keep a replica of the table and run traversals on demand. Every
+    command carries the merged changes of the previous iteration, which
+    are applied before traversing so that all the replicas stay identical.
+    '''
+    env = rlcard.make(env_id, config)
+    agent = agent_class(env, **agent_kwargs)
+    while True:
+        command, args = conn.recv()
+        if command == 'close':
+            break
+        iteration, seeds, merged_delta = args
+        if merged_delta is not None:
+            agent.table.apply_delta(merged_delta)
+            agent.update_policy()
+
+        agent.iteration = iteration
+        snapshot = agent.table.snapshot()
+        for seed in seeds:
+            env.seed(seed)
+            np.random.seed(seed)
+            agent.run_traversals()
+        conn.send(agent.table.pop_delta(snapshot))
+    conn.close()
+
+class ParallelCFRTrainer(object):
+    ''' Train a CFR agent (`ArrayCFRAgent` or one of the MCCFR agents) with
+    several worker processes. In each iteration, every worker runs
+    `traversals_per_worker` sampled traversals for each player against the
+    current strategy on its own replica of the table. The changes of the
+    regrets and the strategy sums are sent back, summed by the trainer and
+    broadcast to all the workers with the next command. Only the information
+    sets touched in an iteration are transferred.
+    '''
+
+    def __init__(self, env_id, agent_class=ArrayCFRAgent, num_workers=None, traversals_per_worker=1,
+                 config={}, seed=0, model_path='./cfr_model', agent_kwargs={}):
+        ''' Initialize the trainer and start the workers
+
+        Args:
+            env_id (string): The name of the environment
+            agent_class (class): `ArrayCFRAgent` or a subclass of it
+            num_workers (int): The number of processes. Defaults to the number of CPUs
+            traversals_per_worker (int): The number of traversals of each worker per iteration
+            config (dict): A dictionary of the environment settings
+            seed (int): The seed used to derive the seeds of the traversals
+            model_path (str): The directory to save/load the model
+            agent_kwargs (dict): Extra arguments of the agent class
+        '''
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        self.num_workers = num_workers
+        self.traversals_per_worker = traversals_per_worker
+        self.seed = seed
+
+        config = dict(config)
+        config['allow_step_back'] = True
+        self.agent = agent_class(rlcard.make(env_id, config), model_path=model_path, **agent_kwargs)
+
+        self._merged_delta = None
+        self._conns = []
+        self._workers = []
+        for _ in range(num_workers):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_cfr_worker,
+                                             args=(child_conn, env_id, config, agent_class, agent_kwargs),
+                                             daemon=True)
+            worker.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._workers.append(worker)
+
+    def train(self):
+        ''' Do one iteration with all the workers
+        '''
+        start = time.perf_counter()
+        agent = self.agent
+        agent.iteration += 1
+        for worker_id, conn in enumerate(self._conns):
+            seeds = [seeding.hash_seed((self.seed, agent.iteration, worker_id, k), max_bytes=4)
+                     for k in range(self.traversals_per_worker)]
+            conn.send(('train', (agent.iteration, seeds, self._merged_delta)))
+
+        # Sum the changes of the workers in a fixed order
+        merged = InfoSetTable(agent.table.num_actions, agent.table.chunk_size)
+        empty = merged.snapshot()
+        for conn in self._conns:
+            merged.apply_delta(conn.recv())
+        self._merged_delta = merged.pop_delta(empty)
+
+        agent.table.apply_delta(self._merged_delta)
+        agent.update_policy()
+        agent.train_time += time.perf_counter() - start
+
+    def load(self):
+        ''' Load the model of the agent and send it to the workers. This should
+        be called before the first iteration
+        '''
+        self.agent.load()
+        table = self.agent.table
+        self._merged_delta = (list(table.keys), table.legal_mask[:len(table)], table.regrets[:len(table)],
+                              table.strategy_sums[:len(table)], table.reach_sums[:len(table)])
+
+    def save(self):
+        ''' Save the model of the agent
+        '''
+        self.agent.save()
+
+    def stats(self):
+        ''' Report the training speed and the memory footprint
+
+        Returns:
+            (dict): The statistics of the agent and the traversals per second
+        '''
+        stats = self.agent.stats()
+        stats['traversals_per_second'] = stats['iterations_per_second'] * self.num_workers * self.traversals_per_worker
+        return stats
+
+    def close(self):
+        ''' Stop the workers
+        '''
+        for conn in self._conns:
+            conn.send(('close', None))
+            conn.close()
+        for worker in self._workers:
+            worker.join()
+        self._conns, self._workers = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
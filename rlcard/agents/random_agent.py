@@ -45,3 +45,31 @@ class RandomAgent(object):
         info['probs'] = {state['raw_legal_actions'][i]: probs[list(state['legal_actions'].keys())[i]] for i in range(len(state['legal_actions']))}
 
         return self.step(state), info
+
+    @staticmethod
+    def batch_step(obs, legal_mask):
+        ''' Randomly choose one legal action for each state of a batch
+
+        Args:
+            obs (numpy.array): The stacked observations. Not used
+            legal_mask (numpy.array): A boolean (batch, num_actions) legal-action mask
+
+        Returns:
+            actions (numpy.array): The actions chosen by the random agent
+        '''
+        scores = np.where(legal_mask, np.random.random_sample(legal_mask.shape), -1)
+        return np.argmax(scores, axis=1)
+
+    def batch_eval_step(self, obs, legal_mask):
+        ''' Batched counterpart of `eval_step`
+
+        Args:
+            obs (numpy.array): The stacked observations. Not used
+            legal_mask (numpy.array): A boolean (batch, num_actions) legal-action mask
+
+        Returns:
+            actions (numpy.array): The actions chosen by the random agent
+            probs (numpy.array): A (batch, num_actions) array of action probabilities
+        '''
+        probs = legal_mask / legal_mask.sum(axis=1, keepdims=True)
+        return self.batch_step(obs, legal_mask), probs
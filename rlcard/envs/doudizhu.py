@@ -1,4 +1,5 @@
-from collections import Counter, OrderedDict
+from collections import OrderedDict
+import functools
 import numpy as np
 
 from rlcard.envs import Env
@@ -9,14 +10,15 @@ class DoudizhuEnv(Env):
     '''
 
     def __init__(self, config):
-        from rlcard.games.doudizhu.utils import ACTION_2_ID, ID_2_ACTION
+        from rlcard.games.doudizhu.utils import ACTION_2_ID, ID_2_ACTION, ACTION_COUNTS
         from rlcard.games.doudizhu.utils import cards2str, cards2str_with_suit
         from rlcard.games.doudizhu import Game
         self._cards2str = cards2str
         self._cards2str_with_suit = cards2str_with_suit
         self._ACTION_2_ID = ACTION_2_ID
         self._ID_2_ACTION = ID_2_ACTION
-        
+        self._action_features = _get_action_features(ACTION_COUNTS)
+
         self.name = 'doudizhu'
         self.game = Game()
         super().__init__(config)
@@ -40,21 +42,21 @@ class DoudizhuEnv(Env):
                 last_action = state['trace'][-1][1]
         last_action = _cards2array(last_action)
 
-        last_9_actions = _action_seq2array(_process_action_seq(state['trace']))
+        last_9_actions = [_cards2array(cards) for cards in _process_action_seq(state['trace'])]
 
         if state['self'] == 0: # landlord
             landlord_up_played_cards = _cards2array(state['played_cards'][2])
             landlord_down_played_cards = _cards2array(state['played_cards'][1])
-            landlord_up_num_cards_left = _get_one_hot_array(state['num_cards_left'][2], 17) 
+            landlord_up_num_cards_left = _get_one_hot_array(state['num_cards_left'][2], 17)
             landlord_down_num_cards_left = _get_one_hot_array(state['num_cards_left'][1], 17)
-            obs = np.concatenate((current_hand,
-                                  others_hand,
-                                  last_action,
-                                  last_9_actions,
-                                  landlord_up_played_cards,
-                                  landlord_down_played_cards,
-                                  landlord_up_num_cards_left,
-                                  landlord_down_num_cards_left))
+            obs = [current_hand,
+                   others_hand,
+                   last_action,
+                   *last_9_actions,
+                   landlord_up_played_cards,
+                   landlord_down_played_cards,
+                   landlord_up_num_cards_left,
+                   landlord_down_num_cards_left]
         else:
             landlord_played_cards = _cards2array(state['played_cards'][0])
             for i, action in reversed(state['trace']):
@@ -71,23 +73,28 @@ class DoudizhuEnv(Env):
                     last_teammate_action = action
             last_teammate_action = _cards2array(last_teammate_action)
             teammate_num_cards_left = _get_one_hot_array(state['num_cards_left'][teammate_id], 17)
-            obs = np.concatenate((current_hand,
-                                  others_hand,
-                                  last_action,
-                                  last_9_actions,
-                                  landlord_played_cards,
-                                  teammate_played_cards,
-                                  last_landlord_action,
-                                  last_teammate_action,
-                                  landlord_num_cards_left,
-                                  teammate_num_cards_left))
-
-        extracted_state = OrderedDict({'obs': obs, 'legal_actions': self._get_legal_actions()})
+            obs = [current_hand,
+                   others_hand,
+                   last_action,
+                   *last_9_actions,
+                   landlord_played_cards,
+                   teammate_played_cards,
+                   last_landlord_action,
+                   last_teammate_action,
+                   landlord_num_cards_left,
+                   teammate_num_cards_left]
+        # The parts are copied once into the observation, which is kept in the
+        # trajectories and so can not be shared between the steps
+        obs = np.concatenate(obs, out=np.empty(self.state_shape[state['self']][0], dtype=np.int8))
+
+        action_ids, action_features = self._get_legal_action_features()
+        extracted_state = OrderedDict({'obs': obs, 'legal_actions': OrderedDict(zip(action_ids, action_features))})
+        extracted_state['legal_action_features'] = action_features
         extracted_state['raw_obs'] = state
         extracted_state['raw_legal_actions'] = [a for a in state['actions']]
         extracted_state['action_record'] = self.action_recorder
         return extracted_state
-            
+
     def get_payoffs(self):
         ''' Get the payoffs of players. Must be implemented in the child class.
 
@@ -113,9 +120,19 @@ class DoudizhuEnv(Env):
         Returns:
             legal_actions (list): a list of legal actions' id
         '''
-        legal_actions = self.game.state['actions']
-        legal_actions = {self._ACTION_2_ID[action]: _cards2array(action) for action in legal_actions}
-        return legal_actions
+        action_ids, action_features = self._get_legal_action_features()
+        return OrderedDict(zip(action_ids, action_features))
+
+    def _get_legal_action_features(self):
+        ''' Get the ids and the stacked features of the legal actions
+
+        Returns:
+            (tuple) that contains:
+                action_ids (list): The ids of the legal actions
+                action_features (numpy.array): The (num_legal_actions, 54) features
+        '''
+        action_ids = [self._ACTION_2_ID[action] for action in self.game.state['actions']]
+        return action_ids, self._action_features[action_ids]
 
     def get_perfect_information(self):
         ''' Get the perfect information of the current state
@@ -137,45 +154,66 @@ class DoudizhuEnv(Env):
         Returns:
             (numpy.array): The action features
         '''
-        return _cards2array(self._decode_action(action))
+        return self._action_features[action].copy()
+
+    def get_action_features(self):
+        ''' Get the features of all the actions at once
+
+        Returns:
+            (numpy.array): The read-only (num_actions, 54) table shared by the environments
+        '''
+        return self._action_features
 
 Card2Column = {'3': 0, '4': 1, '5': 2, '6': 3, '7': 4, '8': 5, '9': 6, 'T': 7,
-               'J': 8, 'Q': 9, 'K': 10, 'A': 11, '2': 12}
+               'J': 8, 'Q': 9, 'K': 10, 'A': 11, '2': 12, 'B': 13, 'R': 14}
 
-NumOnes2Array = {0: np.array([0, 0, 0, 0]),
-                 1: np.array([1, 0, 0, 0]),
-                 2: np.array([1, 1, 0, 0]),
-                 3: np.array([1, 1, 1, 0]),
-                 4: np.array([1, 1, 1, 1])}
+# The cache of `_cards2array`. The hands and the played cards take many more
+# values than the actions, so the cache is bounded
+CARDS_CACHE_SIZE = 100000
 
-def _cards2array(cards):
-    if cards == 'pass':
-        return np.zeros(54, dtype=np.int8)
-
-    matrix = np.zeros([4, 13], dtype=np.int8)
-    jokers = np.zeros(2, dtype=np.int8)
-    counter = Counter(cards)
-    for card, num_times in counter.items():
-        if card == 'B':
-            jokers[0] = 1
-        elif card == 'R':
-            jokers[1] = 1
-        else:
-            matrix[:, Card2Column[card]] = NumOnes2Array[num_times]
-    return np.concatenate((matrix.flatten('F'), jokers))
+_action_features = None
 
-def _get_one_hot_array(num_left_cards, max_num_cards):
-    one_hot = np.zeros(max_num_cards, dtype=np.int8)
-    one_hot[num_left_cards - 1] = 1
+def _counts2array(counts):
+    ''' Encode the count vectors of cards, in the order of CARD_RANK_STR
+
+    Args:
+        counts (numpy.array): An array of shape (..., 15)
+
+    Returns:
+        (numpy.array): An int8 array of shape (..., 54). The first 52 entries are the
+            4 x 13 matrix of the ranks, flattened by column, and the last two are the jokers
+    '''
+    matrix = counts[..., :13, np.newaxis] > np.arange(4)
+    jokers = counts[..., 13:] > 0
+    return np.concatenate((matrix.reshape(counts.shape[:-1] + (52,)), jokers), axis=-1).astype(np.int8)
 
-    return one_hot
+def _get_action_features(action_counts):
+    ''' Get the features of all the actions, computed once and shared by the environments
+    '''
+    global _action_features
+    if _action_features is None:
+        _action_features = _counts2array(action_counts)
+        _action_features.setflags(write=False)
+    return _action_features
 
-def _action_seq2array(action_seq_list):
-    action_seq_array = np.zeros((len(action_seq_list), 54), np.int8)
-    for row, cards in enumerate(action_seq_list):
-        action_seq_array[row, :] = _cards2array(cards)
-    action_seq_array = action_seq_array.flatten()
-    return action_seq_array
+@functools.lru_cache(maxsize=CARDS_CACHE_SIZE)
+def _cards2array(cards):
+    ''' Encode a string of cards. The arrays are cached and read-only
+    '''
+    counts = np.zeros(15, dtype=np.int8)
+    if cards != 'pass':
+        for card in cards:
+            counts[Card2Column[card]] += 1
+    array = _counts2array(counts)
+    array.setflags(write=False)
+    return array
+
+_one_hot_arrays = {max_num_cards: np.eye(max_num_cards, dtype=np.int8) for max_num_cards in (17, 20)}
+for _array in _one_hot_arrays.values():
+    _array.setflags(write=False)
+
+def _get_one_hot_array(num_left_cards, max_num_cards):
+    return _one_hot_arrays[max_num_cards][num_left_cards - 1]
 
 def _process_action_seq(sequence, length=9):
     sequence = [action[1] for action in sequence[-length:]]
@@ -225,6 +225,15 @@ class Env(object):
         feature[action] = 1
         return feature
 
+    def get_action_features(self):
+        ''' Get the features of all the actions at once
+
+        Returns:
+            (numpy.array): A (num_actions, feature_size) array whose rows are the
+                features returned by `get_action_feature`
+        '''
+        return np.stack([self.get_action_feature(action) for action in range(self.num_actions)])
+
     def seed(self, seed=None):
         self.np_random, seed = seeding.np_random(seed)
         self.game.np_random = self.np_random
@@ -4,7 +4,7 @@ from collections import OrderedDict
 from rlcard.envs import Env
 from rlcard.games.mahjong import Game
 from rlcard.games.mahjong import Card
-from rlcard.games.mahjong.utils import card_encoding_dict, encode_cards, pile2list
+from rlcard.games.mahjong.utils import card_encoding_dict, encode_counts, get_tile_counts, pile2list
 
 class MahjongEnv(Env):
     ''' Mahjong Environment
@@ -33,15 +33,10 @@ class MahjongEnv(Env):
                              the union of all played cards
         '''
         players_pile = state['players_pile']
-        hand_rep = encode_cards(state['current_hand'])
-        piles_rep = []
+        counts = [get_tile_counts(state['current_hand']), get_tile_counts(state['table'])]
         for p in players_pile.keys():
-            piles_rep.append(encode_cards(pile2list(players_pile[p])))
-        piles_rep = np.array(piles_rep)
-        table_rep = encode_cards(state['table'])
-        rep = [hand_rep, table_rep]
-        rep.extend(piles_rep)
-        obs = np.array(rep)
+            counts.append(get_tile_counts(pile2list(players_pile[p])))
+        obs = encode_counts(np.stack(counts))
 
         extracted_state = {'obs': obs, 'legal_actions': self._get_legal_actions()}
         extracted_state['raw_obs'] = state
@@ -77,7 +72,7 @@ class MahjongEnv(Env):
         if action_id < 34:
             candidates = self.game.get_legal_actions(self.game.get_state(self.game.round.current_player))
             for card in candidates:
-                if card.get_str() == action:
+                if card.tile == action_id:
                     action = card
                     break
         return action
@@ -97,8 +92,9 @@ class MahjongEnv(Env):
         if legal_actions:
             for action in legal_actions:
                 if isinstance(action, Card):
-                    action = action.get_str()
-                action_id = self.action_id[action]
+                    action_id = action.tile
+                else:
+                    action_id = self.action_id[action]
                 legal_action_id[action_id] = None
         else:
             print("##########################")
@@ -0,0 +1,157 @@
+''' Vectorized environment that steps several copies of a game in lock-step
+'''
+import numpy as np
+
+from rlcard.envs.registration import make
+from rlcard.utils.utils import stack_states
+
+
+class VecEnv(object):
+    ''' A wrapper that holds `num_envs` independent copies of a game created
+    with `rlcard.make`. All the copies are stepped together, the observations
+    and the legal actions are returned as stacked NumPy batches, and finished
+    games are reset automatically.
+    '''
+
+    def __init__(self, env_id, num_envs, config={}):
+        ''' Initialize the vectorized environment
+
+        Args:
+            env_id (string): The name of the environment
+            num_envs (int): The number of copies of the game
+            config (dict): A dictionary of the environment settings. If a
+                'seed' is given, the i-th copy is seeded with `seed + i`
+        '''
+        if num_envs < 1:
+            raise ValueError('num_envs should be a positive integer, got {}'.format(num_envs))
+        self.env_id = env_id
+        self.num_envs = num_envs
+
+        self.envs = []
+        for i in range(num_envs):
+            _config = config.copy()
+            if _config.get('seed') is not None:
+                _config['seed'] = _config['seed'] + i
+            self.envs.append(make(env_id, _config))
+
+        self.num_players = self.envs[0].num_players
+        self.num_actions = self.envs[0].num_actions
+        self.state_shape = self.envs[0].state_shape
+        self.action_shape = self.envs[0].action_shape
+
+        self.states = [None for _ in range(num_envs)]
+        self.player_ids = np.zeros(num_envs, dtype=np.int64)
+        self.timestep = 0
+
+    def set_agents(self, agents):
+        ''' Set the agents that will interact with the environments.
+        This function must be called before `run`.
+
+        Args:
+            agents (list): List of Agent classes
+        '''
+        self.agents = agents
+
+    def reset(self):
+        ''' Start a new game in every copy
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (numpy.array or list): The stacked observations
+                (numpy.array): A boolean (num_envs, num_actions) legal-action mask
+                (numpy.array): The ids of the current players
+        '''
+        for i, env in enumerate(self.envs):
+            self.states[i], self.player_ids[i] = env.reset()
+        return self._stack_states(range(self.num_envs)) + (self.player_ids.copy(),)
+
+    def step(self, actions, raw_action=False):
+        ''' Step every copy forward with one action each. The copies whose game
+        is over are reset, so the returned observations of these copies are the
+        beginning states of new games.
+
+        Args:
+            actions (list or numpy.array): One action per copy
+            raw_action (boolean): True if the actions are raw actions
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (numpy.array or list): The stacked observations
+                (numpy.array): A boolean (num_envs, num_actions) legal-action mask
+                (numpy.array): The ids of the current players
+                (numpy.array): A (num_envs, num_players) array of payoffs. The rows
+                               of the copies that are not done are zeros
+                (numpy.array): A boolean array indicating the finished copies
+        '''
+        if len(actions) != self.num_envs:
+            raise ValueError('Expected {} actions, got {}'.format(self.num_envs, len(actions)))
+        payoffs, dones = self._step_envs(range(self.num_envs), actions, [raw_action] * self.num_envs)
+        return self._stack_states(range(self.num_envs)) + (self.player_ids.copy(), payoffs, dones)
+
+    def run(self, num_games, is_training=False):
+        ''' Play `num_games` complete games with the agents set by `set_agents`.
+        In every lock-step, the copies waiting for the same player are grouped
+        and the agent is queried once for the whole group if it implements
+        `batch_eval_step` (or `batch_step` when training). Otherwise, the agent's
+        `eval_step`/`step` is called for each copy.
+
+        Args:
+            num_games (int): The number of games to play
+            is_training (boolean): True if for training purpose.
+
+        Returns:
+            (numpy.array): A (num_games, num_players) array of payoffs
+        '''
+        results = []
+        self.reset()
+        while len(results) < num_games:
+            actions = [None for _ in range(self.num_envs)]
+            raw_actions = [False for _ in range(self.num_envs)]
+            for player_id in range(self.num_players):
+                indices = np.flatnonzero(self.player_ids == player_id)
+                if len(indices) == 0:
+                    continue
+                agent = self.agents[player_id]
+                for i, action in zip(indices, self._query_agent(agent, indices, is_training)):
+                    actions[i] = action
+                    raw_actions[i] = agent.use_raw
+            payoffs, dones = self._step_envs(range(self.num_envs), actions, raw_actions)
+            results.extend(payoffs[dones])
+        return np.array(results[:num_games])
+
+    def _query_agent(self, agent, indices, is_training):
+        ''' Get the actions of an agent for a group of copies
+        '''
+        if not agent.use_raw:
+            batch_fn = 'batch_step' if is_training else 'batch_eval_step'
+            if hasattr(agent, batch_fn):
+                actions = getattr(agent, batch_fn)(*self._stack_states(indices))
+                if not is_training:
+                    actions = actions[0]
+                return actions
+        if is_training:
+            return [agent.step(self.states[i]) for i in indices]
+        return [agent.eval_step(self.states[i])[0] for i in indices]
+
+    def _step_envs(self, indices, actions, raw_actions):
+        ''' Step the given copies and reset the finished ones
+        '''
+        payoffs = np.zeros((self.num_envs, self.num_players))
+        dones = np.zeros(self.num_envs, dtype=bool)
+        for i in indices:
+            env = self.envs[i]
+            self.states[i], self.player_ids[i] = env.step(actions[i], raw_actions[i])
+            if env.is_over():
+                payoffs[i] = env.get_payoffs()
+                dones[i] = True
+                self.states[i], self.player_ids[i] = env.reset()
+        self.timestep += len(indices)
+        return payoffs, dones
+
+    def _stack_states(self, indices):
+        ''' Stack the observations and build the legal-action mask of the
+        given copies, see `stack_states`
+        '''
+        return stack_states([self.states[i] for i in indices], self.num_actions)
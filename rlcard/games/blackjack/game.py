@@ -1,4 +1,4 @@
-from copy import deepcopy
+from copy import copy
 import numpy as np
 
 from rlcard.games.blackjack import Dealer
@@ -64,10 +64,12 @@ class BlackjackGame:
             int: next plater's id
         '''
         if self.allow_step_back:
-            p = deepcopy(self.players[self.game_pointer])
-            d = deepcopy(self.dealer)
-            w = deepcopy(self.winner)
-            self.history.append((d, p, w))
+            # Record the fields that the action can change. Only the current
+            # player and the dealer receive cards
+            p = self.players[self.game_pointer]
+            d = self.dealer
+            self.history.append((self.game_pointer, len(p.hand), p.status, p.score,
+                                 len(d.hand), d.status, d.score, copy(d.deck), copy(self.winner)))
 
         next_state = {}
         # Play hit
@@ -130,7 +132,12 @@ class BlackjackGame:
         '''
         #while len(self.history) > 0:
         if len(self.history) > 0:
-            self.dealer, self.players[self.game_pointer], self.winner = self.history.pop()
+            (self.game_pointer, num_cards, status, score,
+             num_dealer_cards, self.dealer.status, self.dealer.score, self.dealer.deck, self.winner) = self.history.pop()
+            p = self.players[self.game_pointer]
+            p.status, p.score = status, score
+            del p.hand[num_cards:]
+            del self.dealer.hand[num_dealer_cards:]
             return True
         return False
 
@@ -4,6 +4,7 @@
     Date created: 11/25/2021
 '''
 
+from copy import copy
 from typing import List
 
 import numpy as np
@@ -11,6 +12,7 @@ import numpy as np
 from .judger import BridgeJudger
 from .round import BridgeRound
 from .utils.action_event import ActionEvent, CallActionEvent, PlayCardAction
+from .utils.move import PlayCardMove
 
 
 class BridgeGame:
@@ -25,6 +27,7 @@ class BridgeGame:
         self.judger: BridgeJudger = BridgeJudger(game=self)
         self.actions: [ActionEvent] = []  # must reset in init_game
         self.round: BridgeRound or None = None  # must reset in init_game
+        self.history: list = []  # the fields changed by each step besides the move_sheet, must reset in init_game
         self.num_players: int = 4
 
     def init_game(self):
@@ -32,6 +35,7 @@ class BridgeGame:
         '''
         board_id = self.np_random.choice([1, 2, 3, 4])
         self.actions: List[ActionEvent] = []
+        self.history = []
         self.round = BridgeRound(num_players=self.num_players, board_id=board_id, np_random=self.np_random)
         for player_id in range(4):
             player = self.round.players[player_id]
@@ -43,6 +47,12 @@ class BridgeGame:
     def step(self, action: ActionEvent):
         ''' Perform game action and return next player number, and the state for next player
         '''
+        if self.allow_step_back:
+            # Record the fields that the action can change besides the move_sheet and the play_card_count.
+            # Only the current player changes his hand, by playing one card
+            r = self.round
+            self.history.append((r.current_player_id, r.doubling_cube, r.contract_bid_move, copy(r.won_trick_counts),
+                                 copy(r.players[r.current_player_id].hand)))
         if isinstance(action, CallActionEvent):
             self.round.make_call(action=action)
         elif isinstance(action, PlayCardAction):
@@ -54,6 +64,23 @@ class BridgeGame:
         next_state = self.get_state(player_id=next_player_id)
         return next_state, next_player_id
 
+    def step_back(self) -> bool:
+        ''' Takes one step backward and restore to the last state
+
+        Returns:
+            (bool): True if the game steps back successfully
+        '''
+        if not self.history:
+            return False
+        r = self.round
+        (r.current_player_id, r.doubling_cube, r.contract_bid_move, r.won_trick_counts, hand) = self.history.pop()
+        r.players[r.current_player_id].hand[:] = hand
+        self.actions.pop()
+        move = r.move_sheet.pop()
+        if isinstance(move, PlayCardMove):
+            r.play_card_count -= 1
+        return True
+
     def get_num_players(self) -> int:
         ''' Return the number of players in the game
         '''
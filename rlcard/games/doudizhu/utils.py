@@ -5,6 +5,7 @@ import json
 from collections import OrderedDict
 import threading
 import collections
+import numpy as np
 
 import rlcard
 
@@ -53,6 +54,75 @@ INDEX = {'3': 0, '4': 1, '5': 2, '6': 3, '7': 4,
 INDEX = OrderedDict(sorted(INDEX.items(), key=lambda t: t[1]))
 
 
+def cards2counts(cards):
+    ''' Get the count-vector representation of cards
+
+    Args:
+        cards (str): string of cards. Eg: '33345'
+
+    Returns:
+        numpy.array: the number of cards of each rank in CARD_RANK_STR
+    '''
+    counts = np.zeros(15, dtype=np.int8)
+    for card in cards:
+        counts[CARD_RANK_STR_INDEX[card]] += 1
+    return counts
+
+def cards2mask(cards):
+    ''' Get the bitmask representation of cards. The bit `k * 15 + rank` is
+    set if there are more than k cards of the rank, so that the cards of a
+    target are contained in the cards of a candidate if and only if
+    `target_mask & ~candidate_mask == 0`
+
+    Args:
+        cards (str): string of cards. Eg: '33345'
+
+    Returns:
+        int: the bitmask, which fits in 60 bits
+    '''
+    mask = 0
+    for card in cards:
+        bit = 1 << CARD_RANK_STR_INDEX[card]
+        while mask & bit:
+            bit <<= 15
+        mask |= bit
+    return mask
+
+# Count vectors and bitmasks of the actions, indexed by action id
+ACTION_COUNTS = np.zeros((len(ID_2_ACTION), 15), dtype=np.int8)
+ACTION_MASKS = np.zeros(len(ID_2_ACTION), dtype=np.int64)
+for _action_id, _action in enumerate(ID_2_ACTION):
+    if _action != 'pass':
+        ACTION_COUNTS[_action_id] = cards2counts(_action)
+        ACTION_MASKS[_action_id] = cards2mask(_action)
+
+# Action ids, weights and bitmasks of each card type, in the order of TYPE_CARD
+TYPE_ACTIONS = {}
+for _card_type, _candidates in TYPE_CARD.items():
+    _ids = [ACTION_2_ID[cards] for cards_list in _candidates.values() for cards in cards_list]
+    _weights = [int(weight) for weight, cards_list in _candidates.items() for _ in cards_list]
+    TYPE_ACTIONS[_card_type] = (np.array(_ids), np.array(_weights), ACTION_MASKS[_ids])
+
+def contained_actions(cards_mask, action_ids=None, action_masks=None):
+    ''' Find the actions whose cards are contained in some cards
+
+    Args:
+        cards_mask (int): the bitmask of the cards, see `cards2mask`
+        action_ids (numpy.array): the candidate action ids. Defaults to the
+            whole action space except 'pass'
+        action_masks (numpy.array): the bitmasks of the candidates, if already known
+
+    Returns:
+        numpy.array: the ids of the contained actions, in the order of the candidates
+    '''
+    if action_ids is None:
+        action_ids = np.arange(len(ID_2_ACTION) - 1)
+        action_masks = ACTION_MASKS[:-1]
+    elif action_masks is None:
+        action_masks = ACTION_MASKS[action_ids]
+    return action_ids[(action_masks & np.int64(~cards_mask)) == 0]
+
+
 def doudizhu_sort_str(card_1, card_2):
     ''' Compare the rank of two cards of str representation
 
@@ -240,23 +310,15 @@ def get_gt_cards(player, greater_player):
     gt_cards = ['pass']
     current_hand = cards2str(player.current_hand)
     target_cards = greater_player.played_cards
-    target_types = CARD_TYPE[0][target_cards]
-    type_dict = {}
-    for card_type, weight in target_types:
-        if card_type not in type_dict:
-            type_dict[card_type] = weight
-    if 'rocket' in type_dict:
+    target_type, target_weight = CARD_TYPE[0][target_cards][0]
+    if target_type == 'rocket':
         return gt_cards
-    type_dict['rocket'] = -1
+    type_dict = {target_type: int(target_weight), 'rocket': -1}
     if 'bomb' not in type_dict:
         type_dict['bomb'] = -1
+    hand_mask = cards2mask(current_hand)
     for card_type, weight in type_dict.items():
-        candidate = TYPE_CARD[card_type]
-        for can_weight, cards_list in candidate.items():
-            if int(can_weight) > int(weight):
-                for cards in cards_list:
-                    # TODO: improve efficiency
-                    if cards not in gt_cards and contains_cards(current_hand, cards):
-                        # if self.contains_cards(current_hand, cards):
-                        gt_cards.append(cards)
+        ids, weights, masks = TYPE_ACTIONS[card_type]
+        greater = weights > weight
+        gt_cards.extend(ID_2_ACTION[i] for i in contained_actions(hand_mask, ids[greater], masks[greater]))
     return gt_cards
@@ -4,6 +4,8 @@
     Date created: 2/12/2020
 '''
 
+from copy import copy
+
 import numpy as np
 
 from .player import GinRummyPlayer
@@ -12,6 +14,7 @@ from .judge import GinRummyJudge
 from .utils.settings import Settings, DealerForRound
 
 from .utils.action_event import *
+from .utils.move import DrawCardMove, PickupDiscardMove, DiscardMove, ScoreSouthMove
 
 
 class GinRummyGame:
@@ -27,6 +30,7 @@ class GinRummyGame:
         self.settings = Settings()
         self.actions = None  # type: List[ActionEvent] or None # must reset in init_game
         self.round = None  # round: GinRummyRound or None, must reset in init_game
+        self.history = []  # the fields changed by each step besides the move_sheet, must reset in init_game
         self.num_players = 2
 
     def init_game(self):
@@ -38,6 +42,7 @@ class GinRummyGame:
         elif self.settings.dealer_for_round == DealerForRound.South:
             dealer_id = 1
         self.actions = []
+        self.history = []
         self.round = GinRummyRound(dealer_id=dealer_id, np_random=self.np_random)
         for i in range(2):
             num = 11 if i == 0 else 10
@@ -50,6 +55,13 @@ class GinRummyGame:
     def step(self, action: ActionEvent):
         ''' Perform game action and return next player number, and the state for next player
         '''
+        if self.allow_step_back:
+            # Record the fields that the action can change besides the move_sheet.
+            # Only the current player changes his hand, gaining or losing one card of the piles
+            r = self.round
+            current_player = r.players[r.current_player_id]
+            self.history.append((r.current_player_id, r.going_out_action, r.going_out_player_id,
+                                 copy(current_player.hand), copy(current_player.known_cards), current_player.hand_mask))
         if isinstance(action, ScoreNorthPlayerAction):
             self.round.score_player_0(action)
         elif isinstance(action, ScoreSouthPlayerAction):
@@ -75,8 +87,30 @@ class GinRummyGame:
 
     def step_back(self):
         ''' Takes one step backward and restore to the last state
+
+        Returns:
+            (bool): True if the game steps back successfully
         '''
-        raise NotImplementedError
+        if not self.history:
+            return False
+        r = self.round
+        (r.current_player_id, r.going_out_action, r.going_out_player_id,
+         hand, known_cards, hand_mask) = self.history.pop()
+        current_player = r.players[r.current_player_id]
+        current_player.hand[:] = hand
+        current_player.known_cards[:] = known_cards
+        current_player.hand_mask = hand_mask
+        self.actions.pop()
+        move = r.move_sheet.pop()
+        if isinstance(move, DrawCardMove):
+            r.dealer.stock_pile.append(move.card)
+        elif isinstance(move, PickupDiscardMove):
+            r.dealer.discard_pile.append(move.card)
+        elif isinstance(move, DiscardMove):
+            r.dealer.discard_pile.pop()
+        elif isinstance(move, ScoreSouthMove):
+            r.is_over = False
+        return True
 
     def get_num_players(self):
         ''' Return the number of players in the game
@@ -8,7 +8,8 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .game import GinRummyGame
 
-from typing import List, Tuple
+import functools
+from typing import Iterable, List, Tuple
 
 from .utils.action_event import *
 from .utils.scorers import GinRummyScorer
@@ -43,10 +44,12 @@ class GinRummyJudge:
             current_player = self.game.get_current_player()
             going_out_deadwood_count = self.game.settings.going_out_deadwood_count
             hand = current_player.hand
-            meld_clusters = current_player.get_meld_clusters()  # improve speed 2020-Apr
-            knock_cards, gin_cards = _get_going_out_cards(meld_clusters=meld_clusters,
-                                                          hand=hand,
-                                                          going_out_deadwood_count=going_out_deadwood_count)
+            if not len(hand) == 11:
+                raise GinRummyProgramError("len(hand) is {}: should be 11.".format(len(hand)))
+            knock_mask, gin_mask = _get_going_out_masks(hand_mask=current_player.hand_mask,
+                                                        going_out_deadwood_count=going_out_deadwood_count)
+            knock_cards = utils.get_cards_from_mask(knock_mask)
+            gin_cards = utils.get_cards_from_mask(gin_mask)
             if self.game.settings.is_allowed_gin and gin_cards:
                 legal_actions = [GinAction()]
             else:
@@ -105,11 +108,9 @@ def get_going_out_cards(hand: List[Card], going_out_deadwood_count: int) -> Tupl
     '''
     if not len(hand) == 11:
         raise GinRummyProgramError("len(hand) is {}: should be 11.".format(len(hand)))
-    meld_clusters = melding.get_meld_clusters(hand=hand)
-    knock_cards, gin_cards = _get_going_out_cards(meld_clusters=meld_clusters,
-                                                  hand=hand,
-                                                  going_out_deadwood_count=going_out_deadwood_count)
-    return list(knock_cards), list(gin_cards)
+    knock_mask, gin_mask = _get_going_out_masks(hand_mask=utils.get_card_mask(hand),
+                                                going_out_deadwood_count=going_out_deadwood_count)
+    return utils.get_cards_from_mask(knock_mask), utils.get_cards_from_mask(gin_mask)
 
 
 #
@@ -127,29 +128,61 @@ def _get_going_out_cards(meld_clusters: List[List[List[Card]]],
     '''
     if not len(hand) == 11:
         raise GinRummyProgramError("len(hand) is {}: should be 11.".format(len(hand)))
-    knock_cards = set()
-    gin_cards = set()
-    for meld_cluster in meld_clusters:
-        meld_cards = [card for meld_pile in meld_cluster for card in meld_pile]
-        hand_deadwood = [card for card in hand if card not in meld_cards]  # hand has 11 cards
-        if len(hand_deadwood) == 0:
+    meld_cluster_masks = [tuple(utils.get_card_mask(meld_pile) for meld_pile in meld_cluster)
+                          for meld_cluster in meld_clusters]
+    knock_mask, gin_mask = _get_going_out_masks_of_clusters(meld_cluster_masks=meld_cluster_masks,
+                                                            hand_mask=utils.get_card_mask(hand),
+                                                            going_out_deadwood_count=going_out_deadwood_count)
+    return utils.get_cards_from_mask(knock_mask), utils.get_cards_from_mask(gin_mask)
+
+
+@functools.lru_cache(maxsize=melding.MELD_CACHE_SIZE)
+def _get_going_out_masks(hand_mask: int, going_out_deadwood_count: int) -> Tuple[int, int]:
+    '''
+    :param hand_mask: int -- the bitboard of a hand with 11 cards
+    :param going_out_deadwood_count: int
+    :return int, int: bitboards of the cards in hand that can be knocked, and that can be ginned
+    '''
+    return _get_going_out_masks_of_clusters(meld_cluster_masks=melding.get_meld_cluster_masks(hand_mask),
+                                            hand_mask=hand_mask,
+                                            going_out_deadwood_count=going_out_deadwood_count)
+
+
+def _get_going_out_masks_of_clusters(meld_cluster_masks: Iterable[Tuple[int, ...]],
+                                     hand_mask: int,
+                                     going_out_deadwood_count: int) -> Tuple[int, int]:
+    '''
+    :param meld_cluster_masks: the meld clusters as tuples of meld masks
+    :param hand_mask: int -- the bitboard of a hand with 11 cards
+    :param going_out_deadwood_count: int
+    :return int, int: bitboards of the cards in hand that can be knocked, and that can be ginned
+    '''
+    knock_mask = 0
+    gin_mask = 0
+    for meld_cluster in meld_cluster_masks:
+        meld_mask = 0
+        for meld in meld_cluster:
+            meld_mask |= meld
+        deadwood_mask = hand_mask & ~meld_mask
+        deadwood_card_count = utils.get_card_count_of_mask(deadwood_mask)
+        if deadwood_card_count == 0:
             # all 11 cards are melded;
             # take gin_card as first card of first 4+ meld;
             # could also take gin_card as last card of 4+ meld, but won't do this.
-            for meld_pile in meld_cluster:
-                if len(meld_pile) >= 4:
-                    gin_cards.add(meld_pile[0])
+            for meld in meld_cluster:
+                if utils.get_card_count_of_mask(meld) >= 4:
+                    gin_mask |= meld & -meld
                     break
-        elif len(hand_deadwood) == 1:
-            card = hand_deadwood[0]
-            gin_cards.add(card)
+        elif deadwood_card_count == 1:
+            gin_mask |= deadwood_mask
         else:
-            hand_deadwood_values = [utils.get_deadwood_value(card) for card in hand_deadwood]
+            deadwood_cards = utils.get_cards_from_mask(deadwood_mask)
+            hand_deadwood_values = [utils.get_deadwood_value(card) for card in deadwood_cards]
             hand_deadwood_count = sum(hand_deadwood_values)
             max_hand_deadwood_value = max(hand_deadwood_values, default=0)
             if hand_deadwood_count <= 10 + max_hand_deadwood_value:
-                for card in hand_deadwood:
-                    next_deadwood_count = hand_deadwood_count - utils.get_deadwood_value(card)
+                for card, deadwood_value in zip(deadwood_cards, hand_deadwood_values):
+                    next_deadwood_count = hand_deadwood_count - deadwood_value
                     if next_deadwood_count <= going_out_deadwood_count:
-                        knock_cards.add(card)
-    return list(knock_cards), list(gin_cards)
+                        knock_mask |= 1 << utils.get_card_id(card)
+    return knock_mask, gin_mask
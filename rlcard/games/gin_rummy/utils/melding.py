@@ -4,7 +4,8 @@
     Date created: 2/12/2020
 '''
 
-from typing import List
+import functools
+from typing import List, Tuple
 
 from rlcard.games.base import Card
 
@@ -19,51 +20,125 @@ from rlcard.games.gin_rummy.utils.gin_rummy_error import GinRummyProgramError
 #        meld_piles - a list of meld_pile
 #        meld_cluster - same as meld_piles, but usually with the piles being mutually disjoint
 #        meld_clusters - a list of meld_cluster
+#        meld_mask - the bitboard of a meld_pile (see utils.get_card_mask)
 # ===============================================================
 
+# The maximum number of hands whose meld clusters are cached
+MELD_CACHE_SIZE = 100000
 
-def get_meld_clusters(hand: List[Card]) -> List[List[List[Card]]]:
-    result = []  # type: List[List[List[Card]]]
-    all_run_melds = [frozenset(x) for x in get_all_run_melds(hand)]
-    all_set_melds = [frozenset(x) for x in get_all_set_melds(hand)]
-    all_melds = all_run_melds + all_set_melds
+
+def _get_run_meld_masks() -> List[int]:
+    result = []
+    for suit_id in range(4):
+        for first_rank_id in range(11):
+            for end_rank_id in range(first_rank_id + 3, 14):
+                result.append(sum(1 << (rank_id + 13 * suit_id) for rank_id in range(first_rank_id, end_rank_id)))
+    return result
+
+
+def _get_set_meld_masks() -> List[int]:
+    result = []
+    for rank_id in range(13):
+        max_set_meld = sum(1 << (rank_id + 13 * suit_id) for suit_id in range(4))
+        result.append(max_set_meld)
+        for suit_id in range(4):
+            result.append(max_set_meld ^ (1 << (rank_id + 13 * suit_id)))
+    return result
+
+
+# The meld masks of every possible meld
+run_meld_masks = _get_run_meld_masks()
+set_meld_masks = _get_set_meld_masks()
+meld_masks = run_meld_masks + set_meld_masks
+
+# The meld masks by the card_id of their lowest card, since a meld in hand starts with a card in hand
+_meld_masks_by_card_id = [[] for _ in range(52)]  # type: List[List[int]]
+for _meld in meld_masks:
+    _meld_masks_by_card_id[(_meld & -_meld).bit_length() - 1].append(_meld)
+
+
+@functools.lru_cache(maxsize=MELD_CACHE_SIZE)
+def get_meld_cluster_masks(hand_mask: int) -> Tuple[Tuple[int, ...], ...]:
+    ''' Get the meld clusters of 1, 2 or 3 mutually disjoint melds of a hand
+
+    Args:
+        hand_mask: the bitboard of the hand
+
+    Returns:
+        the meld clusters as tuples of meld masks
+    '''
+    all_melds = []  # type: List[int]
+    mask = hand_mask
+    while mask:
+        low_bit = mask & -mask
+        mask ^= low_bit
+        for meld in _meld_masks_by_card_id[low_bit.bit_length() - 1]:
+            if meld & hand_mask == meld:
+                all_melds.append(meld)
     all_melds_count = len(all_melds)
+    result = []  # type: List[Tuple[int, ...]]
     for i in range(0, all_melds_count):
         first_meld = all_melds[i]
-        first_meld_list = list(first_meld)
-        meld_cluster_1 = [first_meld_list]
-        result.append(meld_cluster_1)
+        result.append((first_meld,))
         for j in range(i + 1, all_melds_count):
             second_meld = all_melds[j]
-            second_meld_list = list(second_meld)
-            if not second_meld.isdisjoint(first_meld):
+            if second_meld & first_meld:
                 continue
-            meld_cluster_2 = [first_meld_list, second_meld_list]
-            result.append(meld_cluster_2)
+            result.append((first_meld, second_meld))
+            first_two_melds = first_meld | second_meld
             for k in range(j + 1, all_melds_count):
                 third_meld = all_melds[k]
-                third_meld_list = list(third_meld)
-                if not third_meld.isdisjoint(first_meld) or not third_meld.isdisjoint(second_meld):
+                if third_meld & first_two_melds:
                     continue
-                meld_cluster_3 = [first_meld_list, second_meld_list, third_meld_list]
-                result.append(meld_cluster_3)
-    return result
+                result.append((first_meld, second_meld, third_meld))
+    return tuple(result)
+
+
+@functools.lru_cache(maxsize=MELD_CACHE_SIZE)
+def get_best_meld_cluster_masks(hand_mask: int) -> Tuple[int, Tuple[Tuple[int, ...], ...]]:
+    ''' Get the meld clusters of a hand with the least deadwood count
+
+    Args:
+        hand_mask: the bitboard of the hand
+
+    Returns:
+        the least deadwood count, and the meld clusters with this deadwood count,
+        which are empty if the hand has no meld
+    '''
+    best_deadwood_count = utils.get_deadwood_count_of_mask(hand_mask)
+    best_meld_clusters = []  # type: List[Tuple[int, ...]]
+    for meld_cluster in get_meld_cluster_masks(hand_mask):
+        meld_mask = 0
+        for meld in meld_cluster:
+            meld_mask |= meld
+        deadwood_count = utils.get_deadwood_count_of_mask(hand_mask & ~meld_mask)
+        if deadwood_count < best_deadwood_count or not best_meld_clusters:
+            best_deadwood_count = deadwood_count
+            best_meld_clusters = [meld_cluster]
+        elif deadwood_count == best_deadwood_count:
+            best_meld_clusters.append(meld_cluster)
+    return best_deadwood_count, tuple(best_meld_clusters)
+
+
+def get_meld_clusters_of_mask(hand_mask: int) -> List[List[List[Card]]]:
+    return [[utils.get_cards_from_mask(meld) for meld in meld_cluster]
+            for meld_cluster in get_meld_cluster_masks(hand_mask)]
+
+
+def get_meld_clusters(hand: List[Card]) -> List[List[List[Card]]]:
+    return get_meld_clusters_of_mask(utils.get_card_mask(hand))
 
 
 def get_best_meld_clusters(hand: List[Card]) -> List[List[List[Card]]]:
     if len(hand) != 10:
         raise GinRummyProgramError("Hand contain {} cards: should be 10 cards.".format(len(hand)))
-    result = []  # type: List[List[List[Card]]]
-    meld_clusters = get_meld_clusters(hand=hand)  # type: List[List[List[Card]]]
-    meld_clusters_count = len(meld_clusters)
-    if meld_clusters_count > 0:
-        deadwood_counts = [utils.get_deadwood_count(hand=hand, meld_cluster=meld_cluster)
-                           for meld_cluster in meld_clusters]
-        best_deadwood_count = min(deadwood_counts)
-        for i in range(meld_clusters_count):
-            if deadwood_counts[i] == best_deadwood_count:
-                result.append(meld_clusters[i])
-    return result
+    _, best_meld_clusters = get_best_meld_cluster_masks(utils.get_card_mask(hand))
+    return [[utils.get_cards_from_mask(meld) for meld in meld_cluster] for meld_cluster in best_meld_clusters]
+
+
+def get_best_deadwood_count(hand: List[Card]) -> int:
+    best_deadwood_count, _ = get_best_meld_cluster_masks(utils.get_card_mask(hand))
+    return best_deadwood_count
 
 
 def get_all_run_melds(hand: List[Card]) -> List[List[Card]]:
@@ -72,6 +72,46 @@ def get_deadwood_value(card: Card) -> int:
     return deadwood_value
 
 
+# ===============================================================
+#    A set of cards is also represented as a bitboard: a 52-bit int
+#    whose bit card_id is set if the card is in the set.
+#    Disjointness and inclusion checks are then bitwise operations.
+# ===============================================================
+
+_deadwood_values = [get_deadwood_value(card) for card in _deck]
+
+
+def get_card_mask(cards: Iterable[Card]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << get_card_id(card)
+    return mask
+
+
+def get_cards_from_mask(mask: int) -> List[Card]:
+    ''' Make the cards of a bitboard, in order of card_id
+    '''
+    result = []  # type: List[Card]
+    while mask:
+        low_bit = mask & -mask
+        result.append(_deck[low_bit.bit_length() - 1])
+        mask ^= low_bit
+    return result
+
+
+def get_card_count_of_mask(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def get_deadwood_count_of_mask(mask: int) -> int:
+    deadwood_count = 0
+    while mask:
+        low_bit = mask & -mask
+        deadwood_count += _deadwood_values[low_bit.bit_length() - 1]
+        mask ^= low_bit
+    return deadwood_count
+
+
 def get_deadwood(hand: Iterable[Card], meld_cluster: List[Iterable[Card]]) -> List[Card]:
     if len(list(hand)) != 10:
         raise GinRummyProgramError("Hand contain {} cards: should be 10 cards.".format(len(list(hand))))
@@ -83,9 +123,8 @@ def get_deadwood(hand: Iterable[Card], meld_cluster: List[Iterable[Card]]) -> Li
 def get_deadwood_count(hand: List[Card], meld_cluster: List[Iterable[Card]]) -> int:
     if len(hand) != 10:
         raise GinRummyProgramError("Hand contain {} cards: should be 10 cards.".format(len(hand)))
-    deadwood = get_deadwood(hand=hand, meld_cluster=meld_cluster)
-    deadwood_values = [get_deadwood_value(card) for card in deadwood]
-    return sum(deadwood_values)
+    meld_mask = get_card_mask(card for meld_pile in meld_cluster for card in meld_pile)
+    return get_deadwood_count_of_mask(get_card_mask(hand) & ~meld_mask)
 
 
 def decode_cards(env_cards: np.ndarray) -> List[Card]:
@@ -107,16 +107,13 @@ class LeducholdemGame(Game):
                 (int): next plater's id
         '''
         if self.allow_step_back:
-            # First snapshot the current state
-            r = copy(self.round)
-            r_raised = copy(self.round.raised)
-            gp = self.game_pointer
-            r_c = self.round_counter
-            d_deck = copy(self.dealer.deck)
-            p = copy(self.public_card)
-            ps = [copy(self.players[i]) for i in range(self.num_players)]
-            ps_hand = [copy(self.players[i].hand) for i in range(self.num_players)]
-            self.history.append((r, r_raised, gp, r_c, d_deck, p, ps, ps_hand))
+            # Record the fields that the action can change
+            r = self.round
+            player = self.players[self.game_pointer]
+            self.history.append((self.game_pointer, self.round_counter, self.public_card,
+                                 player.in_chips, player.status,
+                                 r.game_pointer, r.have_raised, r.not_raise_num, copy(r.raised),
+                                 r.player_folded, r.raise_amount))
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -184,10 +181,14 @@ class LeducholdemGame(Game):
             (bool): True if the game steps back successfully
         '''
         if len(self.history) > 0:
-            self.round, r_raised, self.game_pointer, self.round_counter, d_deck, self.public_card, self.players, ps_hand = self.history.pop()
-            self.round.raised = r_raised
-            self.dealer.deck = d_deck
-            for i, hand in enumerate(ps_hand):
-                self.players[i].hand = hand
+            r = self.round
+            if self.public_card is not None and self.history[-1][2] is None:
+                # The public card was popped from the deck
+                self.dealer.deck.append(self.public_card)
+            (self.game_pointer, self.round_counter, self.public_card, in_chips, status,
+             r.game_pointer, r.have_raised, r.not_raise_num, r.raised,
+             r.player_folded, r.raise_amount) = self.history.pop()
+            player = self.players[self.game_pointer]
+            player.in_chips, player.status = in_chips, status
             return True
         return False
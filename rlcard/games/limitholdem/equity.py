@@ -0,0 +1,159 @@
+''' All-in equity of hold'em hands
+
+The equity of a player is the expected share of the pot when all the cards
+are dealt and nobody folds: a win counts 1 and a tie between k players counts
+1/k. The runouts (the missing public cards and the hole cards of the
+opponents) are enumerated when there are few enough of them and sampled
+otherwise, and the showdowns are evaluated in batches with `evaluate_batch`.
+'''
+import math
+import itertools
+import numpy as np
+
+from rlcard.games.limitholdem.evaluator import cards_to_ids, evaluate_batch
+
+_SUIT_PERMUTATIONS = list(itertools.permutations(range(4)))
+
+def _comb(n, k):
+    if k < 0 or k > n:
+        return 0
+    return math.factorial(n) // (math.factorial(k) * math.factorial(n - k))
+
+def canonical_key(hole_cards, public_cards):
+    ''' Get a key that is shared by all the suit-isomorphic versions of a hand.
+    The equity does not change if the suits are relabeled or if the hole
+    cards or the public cards are reordered.
+
+    Args:
+        hole_cards (list): The integer ids of the hole cards
+        public_cards (list): The integer ids of the public cards
+
+    Returns:
+        (tuple): The smallest (hole_cards, public_cards) over the 24 relabelings of the suits
+    '''
+    key = None
+    for permutation in _SUIT_PERMUTATIONS:
+        relabeled = (tuple(sorted(permutation[card // 13] * 13 + card % 13 for card in hole_cards)),
+                     tuple(sorted(permutation[card // 13] * 13 + card % 13 for card in public_cards)))
+        if key is None or relabeled < key:
+            key = relabeled
+    return key
+
+def _showdown_shares(args):
+    ''' Sum the shares of the pot won by the player over a chunk of runouts.
+    Each row holds the five public cards followed by the hole cards of the opponents
+    '''
+    hole_cards, runouts = args
+    boards = runouts[:, :5]
+    num_opponents = (runouts.shape[1] - 5) // 2
+    player = evaluate_batch(np.hstack([np.broadcast_to(hole_cards, (len(runouts), 2)), boards]))
+    opponents = np.stack([evaluate_batch(np.hstack([runouts[:, 5+2*i:7+2*i], boards]))
+                          for i in range(num_opponents)], axis=1)
+    best = opponents.max(axis=1)
+    num_tied = (opponents == best[:, None]).sum(axis=1)
+    shares = np.where(player > best, 1.0, 0.0) + np.where(player == best, 1.0 / (num_tied + 1), 0.0)
+    return shares.sum()
+
+def _enumerate_runouts(deck, num_board, num_opponents):
+    ''' All the ways to deal `num_board` public cards then two cards to each opponent
+    '''
+    boards = list(itertools.combinations(deck, num_board))
+    runouts = np.array(boards, dtype=np.int64).reshape(len(boards), num_board)
+    pairs = np.array(list(itertools.combinations(deck, 2)), dtype=np.int64)
+    for _ in range(num_opponents):
+        runouts = np.hstack([np.repeat(runouts, len(pairs), axis=0), np.tile(pairs, (len(runouts), 1))])
+        dealt = (runouts[:, -2:, None] == runouts[:, None, :-2]).any(axis=(1, 2))
+        runouts = runouts[~dealt]
+    return runouts
+
+class EquityCalculator(object):
+    ''' Compute the all-in equity of hold'em hands against random opponent hands.
+    The results are cached by the suit-isomorphic form of the hand, so the
+    repeated queries are dictionary lookups.
+    '''
+
+    def __init__(self, num_samples=10000, max_enumeration=200000, chunk_size=20000, pool=None, seed=None):
+        ''' Initialize the calculator
+
+        Args:
+            num_samples (int): The number of sampled runouts when enumerating is too expensive
+            max_enumeration (int): The largest number of runouts that is enumerated exactly
+            chunk_size (int): The number of runouts evaluated in one batch
+            pool (multiprocessing.Pool): An optional pool of workers. The chunks are
+                dispatched with `pool.map`, and the results do not depend on it
+            seed (int): The seed of the sampling
+        '''
+        self.num_samples = num_samples
+        self.max_enumeration = max_enumeration
+        self.chunk_size = chunk_size
+        self.pool = pool
+        self.np_random = np.random.RandomState(seed)
+        self.cache = {}
+
+    def equity(self, hole_cards, public_cards=[], num_opponents=1):
+        ''' Compute the equity of the hole cards
+
+        Args:
+            hole_cards (list): The two hole cards, as strings such as 'SA', ids or Card objects
+            public_cards (list): The zero to five public cards
+            num_opponents (int): The number of opponents with unknown hole cards
+
+        Returns:
+            (float): The expected share of the pot, in [0, 1]
+        '''
+        hole_cards = cards_to_ids(hole_cards)
+        public_cards = cards_to_ids(public_cards)
+        if len(hole_cards) != 2 or len(public_cards) > 5:
+            raise ValueError('Expected 2 hole cards and at most 5 public cards, got {} and {}'.format(
+                len(hole_cards), len(public_cards)))
+        if len(set(hole_cards + public_cards)) != len(hole_cards) + len(public_cards):
+            raise ValueError('The same card is dealt twice')
+        if num_opponents < 1:
+            raise ValueError('num_opponents should be a positive integer, got {}'.format(num_opponents))
+
+        key = canonical_key(hole_cards, public_cards) + (num_opponents,)
+        if key not in self.cache:
+            self.cache[key] = self._compute(*key)
+        return self.cache[key]
+
+    def state_equity(self, state, num_opponents=None):
+        ''' Compute the equity of the current player in a limit or no-limit
+        hold'em state
+
+        Args:
+            state (dict): A state returned by the environment or the raw
+                observation of the game, with the 'hand' and 'public_cards' keys
+            num_opponents (int): The number of opponents. By default, all the other
+                players are counted, whether they have folded or not
+
+        Returns:
+            (float): The expected share of the pot, in [0, 1]
+        '''
+        raw_obs = state.get('raw_obs', state)
+        if num_opponents is None:
+            num_opponents = len(raw_obs['all_chips']) - 1
+        return self.equity(raw_obs['hand'], raw_obs['public_cards'], num_opponents)
+
+    def _compute(self, hole_cards, public_cards, num_opponents):
+        ''' Enumerate or sample the runouts and evaluate them in chunks
+        '''
+        dealt = set(hole_cards) | set(public_cards)
+        deck = np.array([card for card in range(52) if card not in dealt], dtype=np.int64)
+        num_board = 5 - len(public_cards)
+
+        num_runouts = _comb(len(deck), num_board)
+        for i in range(num_opponents):
+            num_runouts *= _comb(len(deck) - num_board - 2 * i, 2)
+        if num_runouts <= self.max_enumeration:
+            runouts = _enumerate_runouts(deck, num_board, num_opponents)
+        else:
+            num_drawn = num_board + 2 * num_opponents
+            draws = np.argsort(self.np_random.rand(self.num_samples, len(deck)), axis=1)[:, :num_drawn]
+            runouts = deck[draws]
+        runouts = np.hstack([np.tile(np.array(public_cards, dtype=np.int64), (len(runouts), 1)), runouts])
+
+        hole_cards = np.array(hole_cards, dtype=np.int64)
+        chunks = [(hole_cards, runouts[start:start+self.chunk_size])
+                  for start in range(0, len(runouts), self.chunk_size)]
+        map_fn = self.pool.map if self.pool is not None else map
+        return float(sum(map_fn(_showdown_shares, chunks)) / len(runouts))
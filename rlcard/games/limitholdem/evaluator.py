@@ -0,0 +1,230 @@
+''' Table-driven evaluator of 5 to 7 card hold'em hands
+
+Cards are encoded as integers with the layout of `card2index.json`, i.e.,
+`suit * 13 + rank` where the suits are S, H, D, C and the ranks go from A to K.
+The strength of a hand is an integer, higher is better. Its bits 20 and above
+hold the category of the hand (1: High Card, ..., 9: Straight Flush, the same
+numbering as `Hand.category`) and the five 4-bit fields below hold the ranks
+that break the ties, from the most to the least important one.
+
+Two tables are built on the first use:
+    - the flush table, indexed by the 13-bit mask of the ranks of the flush
+      suit, gives the best flush or straight flush
+    - the rank table gives the best hand of a multiset of ranks. The multiset
+      is keyed by `sum(5 ** rank)`, the counts written in base 5
+'''
+import os
+import json
+import itertools
+import numpy as np
+
+from rlcard.games.base import Card
+
+with open(os.path.join(os.path.dirname(__file__), 'card2index.json'), 'r') as file:
+    CARD_TO_ID = json.load(file)
+ID_TO_CARD = {v: k for k, v in CARD_TO_ID.items()}
+
+CATEGORY_SHIFT = 20
+
+# Per-card lookups. The ranks are shifted so that 2 is 0 and A is 12
+_RANK_OF = [(card_id % 13 - 1) % 13 for card_id in range(52)]
+_SUIT_OF = [card_id // 13 for card_id in range(52)]
+_BIT_OF = [1 << rank for rank in _RANK_OF]
+_POW5_OF = [5 ** rank for rank in _RANK_OF]
+
+_tables = None
+
+def card_to_id(card):
+    ''' Get the integer encoding of a card
+
+    Args:
+        card (str or int or Card): A card such as 'SA', an integer or a Card object
+
+    Returns:
+        (int): The integer in [0, 52)
+    '''
+    if isinstance(card, Card):
+        card = card.get_index()
+    if isinstance(card, str):
+        return CARD_TO_ID[card]
+    return int(card)
+
+def cards_to_ids(cards):
+    ''' Get the integer encoding of a list of cards
+
+    Args:
+        cards (list): A list of cards, see `card_to_id`
+
+    Returns:
+        (list): A list of integers
+    '''
+    return [card_to_id(card) for card in cards]
+
+def get_category(strength):
+    ''' Get the category of a hand from its strength
+
+    Args:
+        strength (int or numpy.array): The strength(s) returned by the evaluator
+
+    Returns:
+        (int or numpy.array): 1 for High Card, ..., 9 for Straight Flush
+    '''
+    return strength >> CATEGORY_SHIFT
+
+def _encode(category, ranks):
+    ''' Pack a category and up to five tie-breaking ranks into a strength
+    '''
+    strength = category
+    for i in range(5):
+        strength = (strength << 4) | (ranks[i] if i < len(ranks) else 0)
+    return strength
+
+def _straight_top(mask):
+    ''' Get the highest rank of the best straight in a 13-bit rank mask, or -1
+    '''
+    for top in range(12, 3, -1):
+        window = 0b11111 << (top - 4)
+        if mask & window == window:
+            return top
+    if mask & 0b1000000001111 == 0b1000000001111:
+        return 3  # A-2-3-4-5
+    return -1
+
+def _flush_value(mask):
+    ''' The best flush or straight flush made of the ranks in mask
+    '''
+    top = _straight_top(mask)
+    if top >= 0:
+        return _encode(9, [top])
+    ranks = [rank for rank in range(12, -1, -1) if mask >> rank & 1]
+    return _encode(6, ranks[:5])
+
+def _rank_value(counts):
+    ''' The best hand (without flush) of a multiset of ranks given by its counts
+    '''
+    ranks = [rank for rank in range(12, -1, -1) if counts[rank] > 0]
+    quads = [rank for rank in ranks if counts[rank] == 4]
+    trips = [rank for rank in ranks if counts[rank] == 3]
+    pairs = [rank for rank in ranks if counts[rank] == 2]
+
+    if quads:
+        kickers = [rank for rank in ranks if rank != quads[0]]
+        return _encode(8, [quads[0], kickers[0]])
+    if trips and len(trips) + len(pairs) >= 2:
+        pair = max(trips[1:] + pairs)
+        return _encode(7, [trips[0], pair])
+    mask = sum(1 << rank for rank in ranks)
+    top = _straight_top(mask)
+    if top >= 0:
+        return _encode(5, [top])
+    if trips:
+        kickers = [rank for rank in ranks if rank != trips[0]]
+        return _encode(4, [trips[0]] + kickers[:2])
+    if len(pairs) >= 2:
+        kickers = [rank for rank in ranks if rank not in pairs[:2]]
+        return _encode(3, pairs[:2] + kickers[:1])
+    if pairs:
+        kickers = [rank for rank in ranks if rank != pairs[0]]
+        return _encode(2, [pairs[0]] + kickers[:3])
+    return _encode(1, ranks[:5])
+
+def _build_tables():
+    ''' Build the flush table and the rank table
+    '''
+    flush_table = np.zeros(1 << 13, dtype=np.int32)
+    for mask in range(1 << 13):
+        if 5 <= bin(mask).count('1') <= 7:
+            flush_table[mask] = _flush_value(mask)
+
+    rank_table = {}
+    for num_cards in range(5, 8):
+        for ranks in itertools.combinations_with_replacement(range(13), num_cards):
+            counts = [0] * 13
+            for rank in ranks:
+                counts[rank] += 1
+            if max(counts) > 4:
+                continue
+            rank_table[sum(5 ** rank for rank in ranks)] = _rank_value(counts)
+
+    rank_keys = np.array(sorted(rank_table), dtype=np.int64)
+    rank_values = np.array([rank_table[key] for key in rank_keys], dtype=np.int32)
+    return flush_table.tolist(), flush_table, rank_table, rank_keys, rank_values
+
+def _get_tables():
+    global _tables
+    if _tables is None:
+        _tables = _build_tables()
+    return _tables
+
+def evaluate(card_ids):
+    ''' Evaluate the best five-card hand among 5 to 7 cards
+
+    Args:
+        card_ids (list): The integer encoding of the cards
+
+    Returns:
+        (int): The strength of the hand, higher is better
+    '''
+    if not 5 <= len(card_ids) <= 7:
+        raise ValueError('Expected 5 to 7 cards, got {}'.format(len(card_ids)))
+    flush_list, _, rank_table, _, _ = _get_tables()
+    suit_counts = [0, 0, 0, 0]
+    key = 0
+    for card_id in card_ids:
+        suit_counts[_SUIT_OF[card_id]] += 1
+        key += _POW5_OF[card_id]
+    strength = rank_table[key]
+    for suit in range(4):
+        if suit_counts[suit] >= 5:
+            mask = 0
+            for card_id in card_ids:
+                if _SUIT_OF[card_id] == suit:
+                    mask |= _BIT_OF[card_id]
+            strength = max(strength, flush_list[mask])
+    return strength
+
+def evaluate_batch(card_ids):
+    ''' Evaluate many hands at once
+
+    Args:
+        card_ids (numpy.array): An integer array of shape (num_hands, num_cards)
+            with 5 to 7 cards per hand
+
+    Returns:
+        (numpy.array): The strengths of the hands, an int32 array of shape (num_hands,)
+    '''
+    card_ids = np.asarray(card_ids, dtype=np.int64)
+    if card_ids.ndim != 2 or not 5 <= card_ids.shape[1] <= 7:
+        raise ValueError('Expected an array of shape (num_hands, 5 to 7), got {}'.format(card_ids.shape))
+    _, flush_table, _, rank_keys, rank_values = _get_tables()
+    ranks = (card_ids % 13 - 1) % 13
+    suits = card_ids // 13
+
+    keys = (5 ** ranks).sum(axis=1)
+    strengths = rank_values[np.searchsorted(rank_keys, keys)]
+
+    # At most one suit can have five cards or more
+    suit_counts = (suits[:, :, None] == np.arange(4)).sum(axis=1)
+    flush_suits = suit_counts.argmax(axis=1)
+    masks = np.where(suits == flush_suits[:, None], 1 << ranks, 0).sum(axis=1)
+    return np.maximum(strengths, flush_table[masks])
+
+def compare_hands(hands):
+    ''' Find the winners among the players who didn't fold. This is a drop-in
+    replacement of `rlcard.games.limitholdem.utils.compare_hands`
+
+    Args:
+        hands (list): The seven cards of each player, or None if the player has folded
+        e.g. hands = [['CT', 'ST', 'H9', 'D9', 'C2', 'C8', 'C7'], None]
+
+    Returns:
+        [0, 1, 0]: player1 wins
+        [1, 0, 0]: player0 wins
+        [1, 1, 1]: draw
+        [1, 1, 0]: player1 and player0 draws
+    '''
+    if sum(hand is not None for hand in hands) == 1:
+        return [1 if hand is not None else 0 for hand in hands]
+    strengths = [evaluate(cards_to_ids(hand)) if hand is not None else -1 for hand in hands]
+    best = max(strengths)
+    return [1 if strength == best else 0 for strength in strengths]
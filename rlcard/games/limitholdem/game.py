@@ -1,4 +1,4 @@
-from copy import deepcopy, copy
+from copy import copy
 import numpy as np
 
 from rlcard.games.limitholdem import Dealer
@@ -116,15 +116,14 @@ class LimitHoldemGame:
                 (int): next player id
         """
         if self.allow_step_back:
-            # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            rn = copy(self.history_raise_nums)
-            self.history.append((r, b, r_c, d, p, ps, rn))
+            # Record the fields that the action can change. Only the current player
+            # acts, and the dealt cards are restored from the public cards
+            r = self.round
+            player = self.players[self.game_pointer]
+            self.history.append((self.game_pointer, self.round_counter, copy(self.history_raise_nums),
+                                 len(self.public_cards), player.in_chips, player.status,
+                                 r.game_pointer, r.have_raised, r.not_raise_num, copy(r.raised),
+                                 r.player_folded, r.raise_amount))
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -163,8 +162,15 @@ class LimitHoldemGame:
             (bool): True if the game steps back successfully
         """
         if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, \
-                self.players, self.history_raises_nums = self.history.pop()
+            r = self.round
+            (self.game_pointer, self.round_counter, self.history_raise_nums, num_public_cards,
+             in_chips, status, r.game_pointer, r.have_raised, r.not_raise_num, r.raised,
+             r.player_folded, r.raise_amount) = self.history.pop()
+            player = self.players[self.game_pointer]
+            player.in_chips, player.status = in_chips, status
+            # The cards were popped from the deck, put them back in reverse order
+            self.dealer.deck.extend(reversed(self.public_cards[num_public_cards:]))
+            del self.public_cards[num_public_cards:]
             return True
         return False
 
@@ -1,4 +1,4 @@
-from rlcard.games.limitholdem.utils import compare_hands
+from rlcard.games.limitholdem.evaluator import compare_hands, cards_to_ids
 import numpy as np
 
 
@@ -19,8 +19,8 @@ class LimitHoldemJudger:
         Returns:
             (list): Each entry of the list corresponds to one entry of the
         """
-        # Convert the hands into card indexes
-        hands = [[card.get_index() for card in hand] if hand is not None else None for hand in hands]
+        # Convert the hands into integer card ids
+        hands = [cards_to_ids(hand) if hand is not None else None for hand in hands]
 
         winners = compare_hands(hands)
 
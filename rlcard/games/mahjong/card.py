@@ -5,6 +5,11 @@ class MahjongCard:
             'trait': ['1', '2', '3', '4', '5', '6', '7', '8', '9', 'green', 'red', 'white', 'east', 'west', 'north', 'south']
             }
 
+    # The first tile of each type. The 34 tiles are numbered like the encoding of the
+    # environment: bamboo, characters and dots from 1 to 9, then the dragons and the winds
+    tile_offsets = {'bamboo': 0, 'characters': 9, 'dots': 18, 'dragons': 27, 'winds': 30}
+    trait_indices = {'green': 0, 'red': 1, 'white': 2, 'east': 0, 'west': 1, 'north': 2, 'south': 3}
+
     def __init__(self, card_type, trait):
         ''' Initialize the class of MahjongCard
 
@@ -15,6 +20,9 @@ class MahjongCard:
         self.type = card_type
         self.trait = trait
         self.index_num = 0
+        # The tile of the card, an integer in [0, 34)
+        trait_index = int(trait) - 1 if trait.isdigit() else self.trait_indices[trait]
+        self.tile = self.tile_offsets[card_type] + trait_index
 
     def get_str(self):
         ''' Get the string representation of card
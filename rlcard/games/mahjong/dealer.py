@@ -23,7 +23,7 @@ class MahjongDealer:
             num (int): The number of cards to be dealed
         '''
         for _ in range(num):
-            player.hand.append(self.deck.pop())
+            player.add_card(self.deck.pop())
 
 
 ## For test
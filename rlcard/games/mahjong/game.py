@@ -1,5 +1,5 @@
 import numpy as np
-from copy import deepcopy
+from copy import copy
 
 from rlcard.games.mahjong import Dealer
 from rlcard.games.mahjong import Player
@@ -59,12 +59,15 @@ class MahjongGame:
                 (dict): next player's state
                 (int): next plater's id
         '''
-        # First snapshot the current state
         if self.allow_step_back:
-            hist_dealer = deepcopy(self.dealer)
-            hist_round = deepcopy(self.round)
-            hist_players = deepcopy(self.players)
-            self.history.append((hist_dealer, hist_players, hist_round))
+            # Record the fields that the action can change. At most one card is
+            # dealt from the deck and one card is played on or taken from the table
+            r = self.round
+            self.history.append((r.current_player, r.last_player, r.player_before_act, r.valid_act, r.last_cards,
+                                 len(self.dealer.deck), self.dealer.deck[-1:],
+                                 len(self.dealer.table), self.dealer.table[-1:],
+                                 [(copy(player.hand), player.counts.copy()) for player in self.players],
+                                 [len(player.pile) for player in self.players], self.cur_state))
         self.round.proceed_round(self.players, action)
         state = self.get_state(self.round.current_player)
         self.cur_state = state
@@ -78,7 +81,17 @@ class MahjongGame:
         '''
         if not self.history:
             return False
-        self.dealer, self.players, self.round = self.history.pop()
+        r = self.round
+        (r.current_player, r.last_player, r.player_before_act, r.valid_act, r.last_cards,
+         num_deck, deck_top, num_table, table_top, hands, num_piles, self.cur_state) = self.history.pop()
+        del self.dealer.deck[max(num_deck - 1, 0):]
+        self.dealer.deck.extend(deck_top)
+        del self.dealer.table[max(num_table - 1, 0):]
+        self.dealer.table.extend(table_top)
+        for player, (hand, counts), num_pile in zip(self.players, hands, num_piles):
+            player.hand[:] = hand
+            player.counts[:] = counts
+            del player.pile[num_pile:]
         return True
 
     def get_state(self, player_id):
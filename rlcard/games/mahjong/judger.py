@@ -2,8 +2,14 @@
 ''' Implement Mahjong Judger class
 '''
 from collections import defaultdict
+import functools
 import numpy as np
 
+from rlcard.games.mahjong.utils import card_decoding_dict
+
+# The maximum number of hands whose win detection is cached
+HU_CACHE_SIZE = 100000
+
 class MahjongJudger:
     ''' Determine what cards a player can play
     '''
@@ -23,22 +29,15 @@ class MahjongJudger:
 
         '''
         last_card = dealer.table[-1]
-        last_card_str = last_card.get_str()
-        #last_card_value = last_card_str.split("-")[-1]
-        #last_card_type = last_card_str.split("-")[0]
-        for player in players:
-            hand = [card.get_str() for card in player.hand]
-            hand_dict = defaultdict(list)
-            for card in hand:
-                hand_dict[card.split("-")[0]].append(card.split("-")[1])
-            #pile = player.pile
-            # check gong
-            if hand.count(last_card_str) == 3 and last_player != player.player_id:
-                return 'gong', player, [last_card]*4
-            # check pong
-            if hand.count(last_card_str) == 2 and last_player != player.player_id:
-                return 'pong', player, [last_card]*3
-        return False, None, None
+        # The number of copies of the last card in the hand of every player
+        tile_counts = np.stack([player.counts for player in players])[:, last_card.tile]
+        claims = (tile_counts >= 2) & (np.array([player.player_id for player in players]) != last_player)
+        if not claims.any():
+            return False, None, None
+        index = int(np.argmax(claims))
+        if tile_counts[index] == 3:
+            return 'gong', players[index], [last_card]*4
+        return 'pong', players[index], [last_card]*3
 
     def judge_chow(self, dealer, players, last_player):
         ''' Judge which player has chow
@@ -49,22 +48,19 @@ class MahjongJudger:
         '''
 
         last_card = dealer.table[-1]
-        last_card_str = last_card.get_str()
-        last_card_type = last_card_str.split("-")[0]
+        if last_card.type == 'dragons' or last_card.type == 'winds':
+            return False, None, None
         last_card_index = last_card.index_num
+        # The first tile of the type of the last card
+        offset = last_card.tile - last_card_index
         for player in players:
-            if last_card_type != "dragons" and last_card_type != "winds" and last_player == player.get_player_id() - 1:
-                # Create 9 dimensional vector where each dimension represent a specific card with the type same as last_card_type
+            if last_player == player.get_player_id() - 1:
+                # 9 dimensional vector where each dimension represent a specific card with the type same as last_card_type
                 # Numbers in each dimension represent how many of that card the player has it in hand
                 # If the last_card_type is 'characters' for example, and the player has cards: characters_3, characters_6, characters_3,
                 # The hand_list vector looks like: [0,0,2,0,0,1,0,0,0]
-                hand_list = np.zeros(9)
-
-                for card in player.hand:
-                    if card.get_str().split("-")[0] == last_card_type:
-                        hand_list[card.index_num] = hand_list[card.index_num]+1
+                hand_list = player.counts[offset:offset+9]
 
-                #pile = player.pile
                 #check chow
                 test_cases = []
                 if last_card_index == 0:
@@ -78,13 +74,13 @@ class MahjongJudger:
                         test_cases.append([last_card_index-1, last_card_index+1])
 
                 if not test_cases:
-                    continue        
+                    continue
 
                 for l in test_cases:
                     cards = []
                     for i in l:
                         for card in player.hand:
-                            if card.index_num == i and card.get_str().split("-")[0] == last_card_type:
+                            if card.index_num == i and card.tile == offset + i:
                                 cards.append(card)
                                 break
                     cards.append(last_card)
@@ -112,7 +108,10 @@ class MahjongJudger:
             return False, win_player, players_val
 
     def judge_hu(self, player):
-        ''' Judge whether the player has win the game
+        ''' Judge whether the player has win the game. The result only depends on
+        the tile counts of the hand and the number of sets in the pile, so it is
+        looked up in a cache keyed on them
+
         Args:
             player (object): Target player
 
@@ -120,10 +119,21 @@ class MahjongJudger:
             Result (bool): Win or not
             Maximum_score (int): Set count score of the player
         '''
-        set_count = 0
-        hand = [card.get_str() for card in player.hand]
+        return _judge_counts(player.counts.tobytes(), len(player.pile))
+
+    @staticmethod
+    def judge_hand(hand, set_count):
+        ''' Judge whether a hand wins by searching its sets for every pair
+
+        Args:
+            hand (list): The string representations of the cards in hand
+            set_count (int): The number of sets in the pile
+
+        Return:
+            Result (bool): Win or not
+            Maximum_score (int): Set count score of the player
+        '''
         count_dict = {card: hand.count(card) for card in hand}
-        set_count = len(player.pile)
         if set_count >= 4:
             return True, set_count
         used = []
@@ -136,15 +146,11 @@ class MahjongJudger:
             if count_dict[each] == 2:
                 for _ in range(count_dict[each]):
                     tmp_hand.pop(tmp_hand.index(each))
-                tmp_set_count, _set = self.cal_set(tmp_hand)
+                tmp_set_count, _set = MahjongJudger.cal_set(tmp_hand)
                 used.extend(_set)
                 if tmp_set_count + set_count > maximum:
                     maximum = tmp_set_count + set_count
                 if tmp_set_count + set_count >= 4:
-                    #print(player.get_player_id(), sorted([card.get_str() for card in player.hand]))
-                    #print([[c.get_str() for c in s] for s in player.pile])
-                    #print(len(player.hand), sum([len(s) for s in player.pile]))
-                    #exit()
                     return True, maximum
         return False, maximum
 
@@ -162,7 +168,8 @@ class MahjongJudger:
             return True
         return False
 
-    def cal_set(self, cards):
+    @staticmethod
+    def cal_set(cards):
         ''' Calculate the set for given cards
         Args:
             Cards (list): List of cards.
@@ -201,7 +208,7 @@ class MahjongJudger:
                         test_case = [values[index-2], values[index-1], values[index]]
                     else:
                         test_case = [values[index-1], values[index], values[index+1]]
-                    if self.check_consecutive(test_case):
+                    if MahjongJudger.check_consecutive(test_case):
                         set_count += 1
                         for each in test_case:
                             values.pop(values.index(each))
@@ -211,6 +218,21 @@ class MahjongJudger:
                                 tmp_cards.pop(tmp_cards.index(c))
         return set_count, sets
 
+@functools.lru_cache(maxsize=HU_CACHE_SIZE)
+def _judge_counts(counts, set_count):
+    ''' Judge a hand given by its tile counts, with the tiles in encoding order
+
+    Args:
+        counts (bytes): The 34 tile counts of the hand, as int8
+        set_count (int): The number of sets in the pile
+
+    Return:
+        Result (bool): Win or not
+        Maximum_score (int): Set count score of the player
+    '''
+    hand = [card_decoding_dict[index] for index, count in enumerate(np.frombuffer(counts, dtype=np.int8)) for _ in range(count)]
+    return MahjongJudger.judge_hand(hand, set_count)
+
 #if __name__ == "__main__":
 #    judger = MahjongJudger()
 #    player = Player(0)
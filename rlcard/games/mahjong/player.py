@@ -1,3 +1,4 @@
+import numpy as np
 
 class MahjongPlayer:
 
@@ -11,6 +12,9 @@ class MahjongPlayer:
         self.player_id = player_id
         self.hand = []
         self.pile = []
+        # The number of each tile in hand, indexed by `MahjongCard.tile`.
+        # The hand is only changed through `add_card` and `remove_card` to keep it up to date
+        self.counts = np.zeros(34, dtype=np.int8)
 
     def get_player_id(self):
         ''' Return the id of the player
@@ -28,13 +32,33 @@ class MahjongPlayer:
         '''
         print([[c.get_str() for c in s]for s in self.pile])
 
+    def add_card(self, card):
+        ''' Add a card to the hand
+        Args:
+            card (object): The card
+        '''
+        self.hand.append(card)
+        self.counts[card.tile] += 1
+
+    def remove_card(self, index):
+        ''' Remove a card from the hand
+        Args:
+            index (int): The index of the card in hand
+
+        Returns:
+            (object): The removed card
+        '''
+        card = self.hand.pop(index)
+        self.counts[card.tile] -= 1
+        return card
+
     def play_card(self, dealer, card):
         ''' Play one card
         Args:
             dealer (object): Dealer
             Card (object): The card to be play.
         '''
-        card = self.hand.pop(self.hand.index(card))
+        card = self.remove_card(self.hand.index(card))
         dealer.table.append(card)
 
     def chow(self, dealer, cards):
@@ -46,7 +70,7 @@ class MahjongPlayer:
         last_card = dealer.table.pop(-1)
         for card in cards:
             if card in self.hand and card != last_card:
-                self.hand.pop(self.hand.index(card))
+                self.remove_card(self.hand.index(card))
         self.pile.append(cards)
 
     def gong(self, dealer, cards):
@@ -57,7 +81,7 @@ class MahjongPlayer:
         '''
         for card in cards:
             if card in self.hand:
-                self.hand.pop(self.hand.index(card))
+                self.remove_card(self.hand.index(card))
         self.pile.append(cards)
 
     def pong(self, dealer, cards):
@@ -68,5 +92,5 @@ class MahjongPlayer:
         '''
         for card in cards:
             if card in self.hand:
-                self.hand.pop(self.hand.index(card))
+                self.remove_card(self.hand.index(card))
         self.pile.append(cards)
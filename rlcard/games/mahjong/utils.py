@@ -65,11 +65,27 @@ def cards2list(cards):
     return cards_list
 
 
+def get_tile_counts(cards):
+    ''' Count the cards of each tile
+
+    Args:
+        cards (list): List of MahjongCard objects
+
+    Returns:
+        (numpy.array): The 34 counts, indexed by `MahjongCard.tile`
+    '''
+    return np.bincount(np.fromiter((card.tile for card in cards), dtype=np.int64, count=len(cards)), minlength=34)
+
+def encode_counts(counts):
+    ''' Encode tile counts as planes, where the first `count` entries of each tile are 1
+
+    Args:
+        counts (numpy.array): The counts of the tiles, in the last dimension
+
+    Returns:
+        (numpy.array): The planes, with an extra last dimension of 4
+    '''
+    return (np.arange(4) < counts[..., None]).astype(int)
+
 def encode_cards(cards):
-    plane = np.zeros((34,4), dtype=int)
-    cards = cards2list(cards)
-    for card in list(set(cards)):
-        index = card_encoding_dict[card]
-        num = cards.count(card)
-        plane[index][:num] = 1
-    return plane
+    return encode_counts(get_tile_counts(cards))
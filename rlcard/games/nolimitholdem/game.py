@@ -1,7 +1,7 @@
 from enum import Enum
 
 import numpy as np
-from copy import deepcopy
+from copy import copy
 from rlcard.games.limitholdem import Game
 from rlcard.games.limitholdem import PlayerStatus
 
@@ -133,14 +133,13 @@ class NolimitholdemGame(Game):
             raise Exception('Action not allowed')
 
         if self.allow_step_back:
-            # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            self.history.append((r, b, r_c, d, p, ps))
+            # Record the fields that the action can change. Only the current player
+            # bets, and the dealt cards are restored from the public cards
+            r = self.round
+            player = self.players[self.game_pointer]
+            self.history.append((self.game_pointer, self.round_counter, self.stage, len(self.public_cards),
+                                 self.dealer.pot, player.in_chips, player.remained_chips, player.status,
+                                 r.game_pointer, r.not_raise_num, r.not_playing_num, copy(r.raised)))
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
@@ -216,8 +215,15 @@ class NolimitholdemGame(Game):
             (bool): True if the game steps back successfully
         """
         if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, self.players = self.history.pop()
-            self.stage = Stage(self.round_counter)
+            r = self.round
+            (self.game_pointer, self.round_counter, self.stage, num_public_cards,
+             self.dealer.pot, in_chips, remained_chips, status,
+             r.game_pointer, r.not_raise_num, r.not_playing_num, r.raised) = self.history.pop()
+            player = self.players[self.game_pointer]
+            player.in_chips, player.remained_chips, player.status = in_chips, remained_chips, status
+            # The cards were popped from the deck, put them back in reverse order
+            self.dealer.deck.extend(reversed(self.public_cards[num_public_cards:]))
+            del self.public_cards[num_public_cards:]
             return True
         return False
 
@@ -1,4 +1,4 @@
-from copy import deepcopy
+from copy import copy
 import numpy as np
 
 from rlcard.games.uno import Dealer
@@ -69,11 +69,20 @@ class UnoGame:
         '''
 
         if self.allow_step_back:
-            # First snapshot the current state
-            his_dealer = deepcopy(self.dealer)
-            his_round = deepcopy(self.round)
-            his_players = deepcopy(self.players)
-            self.history.append((his_dealer, his_players, his_round))
+            # Record the fields that the action can change. The played cards are
+            # only appended, unless the deck is replaced, which swaps the list
+            r = self.round
+            deck = None
+            wild_colors = []
+            if action == 'draw' or action.endswith('draw_2') or action.endswith('draw_4'):
+                deck = copy(self.dealer.deck)
+            if action == 'draw':
+                # A drawn wild card gets a random color
+                drawable = self.dealer.deck[-1:] or r.played_cards
+                wild_colors = [(card, card.color) for card in drawable if card.type == 'wild']
+            self.history.append((r.target, r.current_player, r.direction, r.is_over, r.winner,
+                                 r.played_cards, len(r.played_cards), deck, wild_colors,
+                                 [copy(player.hand) for player in self.players]))
 
         self.round.proceed_round(self.players, action)
         player_id = self.round.current_player
@@ -88,7 +97,16 @@ class UnoGame:
         '''
         if not self.history:
             return False
-        self.dealer, self.players, self.round = self.history.pop()
+        r = self.round
+        (r.target, r.current_player, r.direction, r.is_over, r.winner,
+         r.played_cards, num_played_cards, deck, wild_colors, hands) = self.history.pop()
+        del r.played_cards[num_played_cards:]
+        if deck is not None:
+            self.dealer.deck[:] = deck
+        for card, color in wild_colors:
+            card.color = color
+        for player, hand in zip(self.players, hands):
+            player.hand[:] = hand
         return True
 
     def get_state(self, player_id):
@@ -0,0 +1,246 @@
+''' Exact best responses and exploitability in small games
+'''
+import numpy as np
+
+TERMINAL, CHANCE, DECISION = 0, 1, 2
+
+SUPPORTED_GAMES = ('leduc-holdem',)
+
+class GameTree(object):
+    ''' The game tree of a small two-player zero-sum game, enumerated once
+    with `step` and `step_back`. The tree does not depend on the policies,
+    so it is built once and reused to evaluate any number of agents. The
+    reach probabilities and the best responses are computed level by level
+    with array operations.
+
+    The chance events are the deal and the public cards, which are dealt
+    one at a time from the end of the deck of the dealer. This is the case
+    of Leduc Hold'em, the only supported game for now.
+    '''
+
+    def __init__(self, env):
+        ''' Enumerate the game tree
+
+        Args:
+            env (Env): The environment, created with `allow_step_back`
+        '''
+        if env.name not in SUPPORTED_GAMES:
+            raise ValueError('The game tree of {} cannot be enumerated. Supported games: {}'.format(env.name, SUPPORTED_GAMES))
+        if not env.allow_step_back:
+            raise ValueError('GameTree requires an environment created with allow_step_back')
+        self.env = env
+        self.num_players = env.num_players
+
+        # The nodes, in depth-first order, so that the parents come before their children
+        self._parents, self._kinds, self._players, self._depths = [], [], [], []
+        self._edge_probs, self._edge_slots = [], []
+        self._policy_infosets, self._br_infosets, self._payoffs = [], [], []
+        # One state and legal actions per distinct observation of the acting player, to query the agents
+        self.states, self._policy_keys = [], {}
+        # The information sets of the best responses: the observation and the history of actions
+        self._br_keys = {}
+        self._build()
+
+        self.parents = np.array(self._parents, dtype=np.int64)
+        self.kinds = np.array(self._kinds, dtype=np.int8)
+        self.players = np.array(self._players, dtype=np.int64)
+        self.depths = np.array(self._depths, dtype=np.int64)
+        self.edge_probs = np.array(self._edge_probs, dtype=np.float64)
+        self.edge_slots = np.array(self._edge_slots, dtype=np.int64)
+        self.policy_infosets = np.array(self._policy_infosets, dtype=np.int64)
+        self.br_infosets = np.array(self._br_infosets, dtype=np.int64)
+        self.payoffs = np.array(self._payoffs, dtype=np.float64)
+        self.num_slots = max(len(state['legal_actions']) for state in self.states)
+        self.num_br_infosets = len(self._br_keys)
+
+        # The non-root nodes of each depth
+        order = np.argsort(self.depths[1:], kind='stable') + 1
+        bounds = np.searchsorted(self.depths[order], np.arange(1, self.depths.max() + 2))
+        self.levels = [order[bounds[d]:bounds[d+1]] for d in range(len(bounds) - 1)]
+
+        # The information sets of the best responses must lie on a single depth
+        br_nodes = self.br_infosets >= 0
+        infoset_depths = np.full(self.num_br_infosets, -1)
+        infoset_depths[self.br_infosets[br_nodes]] = self.depths[br_nodes]
+        if np.any(infoset_depths[self.br_infosets[br_nodes]] != self.depths[br_nodes]):
+            raise ValueError('An information set spans several depths of the tree')
+
+        del self._parents, self._kinds, self._players, self._depths, self._edge_probs, self._edge_slots
+        del self._policy_infosets, self._br_infosets, self._payoffs
+
+    @property
+    def num_nodes(self):
+        return len(self.parents)
+
+    def _add_node(self, parent, kind, depth, edge_prob=1.0, edge_slot=-1):
+        self._parents.append(parent)
+        self._kinds.append(kind)
+        self._depths.append(depth)
+        self._players.append(-1)
+        self._edge_probs.append(edge_prob)
+        self._edge_slots.append(edge_slot)
+        self._policy_infosets.append(-1)
+        self._br_infosets.append(-1)
+        self._payoffs.append([0.0] * self.num_players)
+        return len(self._parents) - 1
+
+    def _build(self):
+        env = self.env
+        root = self._add_node(-1, CHANCE, 0)
+        deals = _get_leduc_deals(env)
+        for deal in deals:
+            _set_leduc_deal(env, *deal)
+            self._expand(root, 1, 1.0 / len(deals), -1, [])
+
+    def _expand(self, parent, depth, edge_prob, edge_slot, history):
+        ''' Add the subtree below the current state of the environment
+        '''
+        env = self.env
+        if env.is_over():
+            node = self._add_node(parent, TERMINAL, depth, edge_prob, edge_slot)
+            self._payoffs[node] = list(env.get_payoffs())
+            return
+
+        node = self._add_node(parent, DECISION, depth, edge_prob, edge_slot)
+        player_id = env.get_player_id()
+        state = env.get_state(player_id)
+        legal_actions = list(state['legal_actions'].keys())
+        obs = state['obs'].tobytes()
+        self._players[node] = player_id
+        self._policy_infosets[node] = self._policy_keys.setdefault((obs, tuple(legal_actions)), len(self._policy_keys))
+        if self._policy_infosets[node] == len(self.states):
+            self.states.append(state)
+        self._br_infosets[node] = self._br_keys.setdefault((player_id, obs, tuple(history)), len(self._br_keys))
+
+        deck = env.game.dealer.deck
+        for slot, action in enumerate(legal_actions):
+            num_cards = len(deck)
+            env.step(action)
+            if len(env.game.dealer.deck) < num_cards:
+                # A public card was dealt, enumerate the cards of the deck instead
+                env.step_back()
+                cards = list(env.game.dealer.deck)
+                chance = self._add_node(node, CHANCE, depth + 1, 1.0, slot)
+                for i, card in enumerate(cards):
+                    env.game.dealer.deck = cards[:i] + cards[i+1:] + [card]
+                    env.step(action)
+                    self._expand(chance, depth + 2, 1.0 / len(cards), -1, history + [(player_id, action)])
+                    env.step_back()
+                env.game.dealer.deck = cards
+            else:
+                self._expand(node, depth + 1, 1.0, slot, history + [(player_id, action)])
+                env.step_back()
+
+    def get_policy(self, agent):
+        ''' Query the policy of an agent at every distinct state of the tree
+
+        Args:
+            agent (object): An agent with `eval_step`. If its info has no `probs`,
+                the action of `eval_step` is played with probability 1
+
+        Returns:
+            (numpy.array): The probabilities of the legal actions of every state, in the
+                order of the legal actions, padded with zeros
+        '''
+        policy = np.zeros((len(self.states), self.num_slots))
+        for index, state in enumerate(self.states):
+            action, info = agent.eval_step(state)
+            if 'probs' in info:
+                policy[index, :len(state['raw_legal_actions'])] = [info['probs'][raw_action] for raw_action in state['raw_legal_actions']]
+            else:
+                policy[index, list(state['legal_actions'].keys()).index(action)] = 1.0
+        return policy
+
+    def best_response_value(self, policy, player_id):
+        ''' Compute the value of the best response of a player against a policy
+
+        Args:
+            policy (numpy.array): The policy of the opponents, see `get_policy`
+            player_id (int): The best-responding player
+
+        Returns:
+            (float): The expected payoff of the best response
+        '''
+        parents, slots = self.parents, self.edge_slots
+        # The probability of every edge, except the own actions of the player
+        edge_probs = self.edge_probs.copy()
+        opponent = np.zeros(self.num_nodes, dtype=bool)
+        opponent[1:] = (self.kinds[parents[1:]] == DECISION) & (self.players[parents[1:]] != player_id) & (slots[1:] >= 0)
+        edge_probs[opponent] = policy[self.policy_infosets[parents[opponent]], slots[opponent]]
+
+        # Top-down: the probability of reaching each node by chance and the opponents
+        reach = np.zeros(self.num_nodes)
+        reach[0] = 1.0
+        for level in self.levels:
+            reach[level] = reach[parents[level]] * edge_probs[level]
+
+        # Bottom-up: the reach-weighted values, choosing the best action of every information set
+        values = np.where(self.kinds == TERMINAL, self.payoffs[:, player_id] * reach, 0.0)
+        for level in reversed(self.levels):
+            level_parents = parents[level]
+            own = (self.players[level_parents] == player_id) & (slots[level] >= 0)
+            np.add.at(values, level_parents[~own], values[level[~own]])
+
+            children = level[own]
+            if len(children) == 0:
+                continue
+            infosets = self.br_infosets[parents[children]]
+            action_values = np.full((self.num_br_infosets, self.num_slots), -np.inf)
+            action_values[infosets, slots[children]] = 0.0
+            np.add.at(action_values, (infosets, slots[children]), values[children])
+            best_slots = np.argmax(action_values, axis=1)
+            best = children[slots[children] == best_slots[infosets]]
+            np.add.at(values, parents[best], values[best])
+        return float(values[0])
+
+    def exploitability(self, agent):
+        ''' Compute the exploitability of an agent playing all the positions
+
+        Args:
+            agent (object): The agent, see `get_policy`
+
+        Returns:
+            (float): The average payoff of the best responses against the agent
+        '''
+        policy = self.get_policy(agent)
+        return sum(self.best_response_value(policy, player_id) for player_id in range(self.num_players)) / self.num_players
+
+def exploitability(env, agent):
+    ''' Compute the exploitability of an agent. To evaluate many agents,
+    build the `GameTree` once and call its `exploitability`
+
+    Args:
+        env (Env): The environment, created with `allow_step_back`
+        agent (object): The agent, see `GameTree.get_policy`
+
+    Returns:
+        (float): The average payoff of the best responses against the agent
+    '''
+    return GameTree(env).exploitability(agent)
+
+def _get_leduc_deals(env):
+    ''' Get every deal of Leduc Hold'em, i.e., the private cards and the small blind
+    '''
+    env.reset()
+    cards = env.game.dealer.deck + [player.hand for player in env.game.players]
+    deals = []
+    for small_blind in range(env.num_players):
+        for i, card_0 in enumerate(cards):
+            for j, card_1 in enumerate(cards):
+                if i != j:
+                    deals.append(([card_0, card_1], small_blind))
+    return deals
+
+def _set_leduc_deal(env, hands, small_blind):
+    ''' Reset Leduc Hold'em with the given private cards and small blind
+    '''
+    env.reset()
+    game = env.game
+    hand_indices = [hand.get_index() for hand in hands]
+    game.dealer.deck = [card for card in game.dealer.deck + [p.hand for p in game.players]
+                        if card.get_index() not in hand_indices]
+    for player, hand in zip(game.players, hands):
+        player.hand = hand
+        player.in_chips = game.small_blind if player.player_id == small_blind else game.big_blind
+    game.game_pointer = small_blind
+    game.round.start_new_round(game_pointer=small_blind, raised=[p.in_chips for p in game.players])
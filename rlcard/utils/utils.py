@@ -194,6 +194,56 @@ def remove_illegal(action_probs, legal_actions):
         probs /= sum(probs)
     return probs
 
+def stack_states(states, num_actions):
+    ''' Stack the observations and the legal actions of a list of states. If
+    the observation shapes differ (e.g., the landlord and the peasants in
+    Dou Dizhu), the observations are returned as a list of arrays instead
+
+    Args:
+        states (list): A list of states returned by the environment
+        num_actions (int): The number of actions
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (numpy.array or list): The stacked observations
+            (numpy.array): A boolean (num_states, num_actions) legal-action mask
+    '''
+    obs = [state['obs'] for state in states]
+    if len(set(o.shape for o in obs)) <= 1:
+        obs = np.stack(obs)
+    legal_mask = np.zeros((len(states), num_actions), dtype=bool)
+    for row, state in enumerate(states):
+        legal_mask[row, list(state['legal_actions'].keys())] = True
+    return obs, legal_mask
+
+def sample_masked(probs, legal_mask):
+    ''' Sample one action per row of a batch of action probabilities. This is the
+    batched counterpart of `remove_illegal` followed by `np.random.choice`: the
+    probabilities are restricted to the legal actions and normalized, or uniform
+    over the legal actions if they are all zero
+
+    Args:
+        probs (numpy.array): A (batch, num_actions) array of action probabilities
+        legal_mask (numpy.array): A boolean (batch, num_actions) legal-action mask
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (numpy.array): The sampled actions
+            (numpy.array): The normalized probabilities
+    '''
+    probs = np.where(legal_mask, probs, 0)
+    totals = probs.sum(axis=1, keepdims=True)
+    uniform = legal_mask / legal_mask.sum(axis=1, keepdims=True)
+    probs = np.where(totals > 0, probs / np.where(totals > 0, totals, 1), uniform)
+    cumulative = np.cumsum(probs, axis=1)
+    samples = np.random.random_sample((len(probs), 1)) * cumulative[:, -1:]
+    actions = (cumulative <= samples).sum(axis=1)
+    # Rounding errors must not lead past the last legal action
+    last_legal = legal_mask.shape[1] - 1 - np.argmax(legal_mask[:, ::-1], axis=1)
+    return np.minimum(actions, last_legal), probs
+
 def tournament(env, num):
     ''' Evaluate he performance of the agents in the environment
 
@@ -221,6 +271,161 @@ def tournament(env, num):
         payoffs[i] /= counter
     return payoffs
 
+# Env and agents of a parallel tournament worker, set by `_init_tournament_worker`
+_tournament_worker = {}
+
+def _init_tournament_worker(env_id, config, agents):
+    ''' Keep the env settings and the agents in the worker so that they are
+        pickled once per worker instead of once per shard
+    '''
+    _tournament_worker['env_id'] = env_id
+    _tournament_worker['config'] = config
+    _tournament_worker['agents'] = agents
+
+def _run_tournament_shard(args):
+    ''' Play one shard of a parallel tournament
+
+    Args:
+        args (tuple): The index of the shard, its number of games and its seed
+
+    Returns:
+        (tuple): The index of the shard, the number of games, the sums and
+                 the sums of squares of the payoffs
+    '''
+    import random
+    import sys
+    import rlcard
+
+    shard, num, shard_seed = args
+    np.random.seed(shard_seed)
+    random.seed(shard_seed)
+    if 'torch' in sys.modules:
+        sys.modules['torch'].manual_seed(shard_seed)
+
+    config = dict(_tournament_worker['config'])
+    config['seed'] = shard_seed
+    env = rlcard.make(_tournament_worker['env_id'], config)
+    env.set_agents(_tournament_worker['agents'])
+
+    payoff_sums = np.zeros(env.num_players)
+    payoff_squares = np.zeros(env.num_players)
+    for _ in range(num):
+        _, _payoffs = env.run(is_training=False)
+        _payoffs = np.asarray(_payoffs, dtype=np.float64)
+        payoff_sums += _payoffs
+        payoff_squares += _payoffs ** 2
+    return shard, num, payoff_sums, payoff_squares
+
+def _get_normal_quantile(p):
+    ''' Get the quantile of the standard normal distribution, by bisection on its cdf
+
+    Args:
+        p (float): The probability, between 0 and 1
+
+    Returns:
+        (float): The value whose cdf is p
+    '''
+    import math
+    low, high = -40.0, 40.0
+    for _ in range(100):
+        mid = (low + high) / 2
+        if 0.5 * (1 + math.erf(mid / math.sqrt(2))) < p:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+def _get_rng_states():
+    ''' Get the states of the global random number generators
+    '''
+    import random
+    import sys
+    torch_state = sys.modules['torch'].get_rng_state() if 'torch' in sys.modules else None
+    return np.random.get_state(), random.getstate(), torch_state
+
+def _set_rng_states(states):
+    ''' Restore the states of the global random number generators, see `_get_rng_states`
+    '''
+    import random
+    import sys
+    np_state, random_state, torch_state = states
+    np.random.set_state(np_state)
+    random.setstate(random_state)
+    if torch_state is not None:
+        sys.modules['torch'].set_rng_state(torch_state)
+
+def parallel_tournament(env_id, agents, num, config={}, seed=0, num_workers=None, shard_size=100, confidence=0.95):
+    ''' Evaluate the performance of the agents by sharding the games across
+        a process pool. Each shard rebuilds the environment from its registry
+        id and gets its own seed derived from `seed` with `seeding.hash_seed`.
+        Since the shards do not depend on the number of workers and their
+        partial sums are reduced in shard order, the results are identical
+        for a fixed seed whatever the number of workers.
+
+    Args:
+        env_id (string): The name of the environment
+        agents (list): List of Agent classes. They must be picklable
+        num (int): The number of games to play
+        config (dict): A dictionary of the environment settings
+        seed (int): The seed of the tournament
+        num_workers (int): The number of processes. Defaults to the number of CPUs.
+            With one worker, the games are played in the current process, whose
+            random number generators are restored afterwards
+        shard_size (int): The number of games in each shard
+        confidence (float): The confidence level of the intervals
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (list): A list of average payoffs for each player
+            (list): A list of the half-widths of the confidence intervals
+                    of the average payoffs
+    '''
+    import multiprocessing
+    from rlcard.utils import seeding
+
+    shards = []
+    for shard, start in enumerate(range(0, num, shard_size)):
+        shard_seed = seeding.hash_seed((seed, shard), max_bytes=4)
+        shards.append((shard, min(shard_size, num - start), shard_seed))
+
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    num_workers = max(1, min(num_workers, len(shards)))
+
+    pool, rng_states = None, None
+    if num_workers == 1:
+        # The shards seed the global generators, which belong to the caller here
+        rng_states = _get_rng_states()
+        _init_tournament_worker(env_id, config, agents)
+        results = map(_run_tournament_shard, shards)
+    else:
+        pool = multiprocessing.Pool(num_workers, initializer=_init_tournament_worker, initargs=(env_id, config, agents))
+        # imap streams the partial sums back in shard order
+        results = pool.imap(_run_tournament_shard, shards)
+
+    payoff_sums, payoff_squares, counter = 0, 0, 0
+    try:
+        for _, _num, _sums, _squares in results:
+            payoff_sums = payoff_sums + _sums
+            payoff_squares = payoff_squares + _squares
+            counter += _num
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if rng_states is not None:
+            _set_rng_states(rng_states)
+
+    means = payoff_sums / counter
+    if counter > 1:
+        variances = np.maximum(payoff_squares - counter * means ** 2, 0) / (counter - 1)
+    else:
+        variances = np.zeros_like(means)
+    z = _get_normal_quantile(0.5 + confidence / 2)
+    intervals = z * np.sqrt(variances / counter)
+    return means.tolist(), intervals.tolist()
+
 def plot_curve(csv_path, save_path, algorithm):
     ''' Read data from csv file and plot the results
     '''
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.cfr_agent import CFRAgent
+from rlcard.agents.array_cfr_agent import ArrayCFRAgent, InfoSetTable
+
+class TestArrayCFR(unittest.TestCase):
+
+    def test_train(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        agent = ArrayCFRAgent(env, model_path='experiments/array_cfr_model')
+
+        for _ in range(100):
+            agent.train()
+
+        state = {'obs': np.array([1., 1., 0., 0., 0., 0.]), 'legal_actions': {0: None,2: None}, 'raw_legal_actions': ['call', 'fold']}
+        action, _ = agent.eval_step(state)
+        self.assertIn(action, [0, 2])
+
+        stats = agent.stats()
+        self.assertGreater(stats['iterations_per_second'], 0)
+        self.assertEqual(stats['num_infosets'], len(agent.table))
+        self.assertGreater(stats['bytes_per_infoset'], 0)
+
+    def test_same_regrets_as_cfr_agent(self):
+        agent = CFRAgent(rlcard.make('leduc-holdem', config={'allow_step_back':True, 'seed': 0}))
+        array_agent = ArrayCFRAgent(rlcard.make('leduc-holdem', config={'allow_step_back':True, 'seed': 0}))
+
+        for _ in range(20):
+            agent.train()
+            array_agent.train()
+
+        for obs, regret in agent.regrets.items():
+            infoset_id = array_agent.table.index[obs]
+            np.testing.assert_allclose(array_agent.table.regrets[infoset_id], regret, atol=1e-9)
+
+    def test_table_grows_in_chunks(self):
+        table = InfoSetTable(num_actions=3, chunk_size=2)
+        for i in range(5):
+            self.assertEqual(table.get_id(str(i), [0, 2]), i)
+        self.assertEqual(table.get_id('0', [1]), 0)
+        self.assertEqual(table.capacity, 6)
+        self.assertEqual(table.legal_mask[0].tolist(), [True, True, True])
+
+        table.regrets[1] = [2., 0., -1.]
+        table.regret_matching()
+        np.testing.assert_allclose(table.strategy[1], [1., 0., 0.])
+        np.testing.assert_allclose(table.strategy[2], [0.5, 0., 0.5])
+
+    def test_save_and_load(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        agent = ArrayCFRAgent(env, model_path='experiments/array_cfr_model')
+
+        for _ in range(100):
+            agent.train()
+
+        agent.save()
+
+        new_agent = ArrayCFRAgent(env, model_path='experiments/array_cfr_model')
+        new_agent.load()
+        self.assertEqual(len(agent.table), len(new_agent.table))
+        self.assertEqual(agent.iteration, new_agent.iteration)
+        np.testing.assert_allclose(agent.table.strategy[:len(agent.table)], new_agent.table.strategy[:len(new_agent.table)])
+
+        cfr_agent = CFRAgent(env, model_path='experiments/array_cfr_model')
+        cfr_agent.load()
+        self.assertEqual(len(agent.table), len(cfr_agent.average_policy))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+import queue
+import tempfile
+import threading
+import unittest
+import numpy as np
+import torch
+
+import rlcard
+from rlcard.agents.dmc_agent.model import DMCNet, DMCAgent, DMCModel
+from rlcard.agents.dmc_agent.trainer import DMCTrainer
+from rlcard.agents.dmc_agent.metrics import DMCMetrics, STAGES, get_bucket, get_percentile, summarize
+from rlcard.agents.dmc_agent.utils import create_buffers, RolloutWriter, WeightBroadcast, WeightPublisher, act, act_batched, \
+    allocate_cores, run_actor, copy_model, copy_env
+
+class TestDMC(unittest.TestCase):
+
+    def test_rollout_writer(self):
+        T = 3
+        buffers = create_buffers(T, 2, [[4]], [[2]], ['cpu'])['cpu'][0]
+        free_queue, full_queue = queue.SimpleQueue(), queue.SimpleQueue()
+        for m in range(2):
+            free_queue.put(m)
+
+        writer = RolloutWriter(T, free_queue, full_queue, buffers)
+        for step in range(5):
+            done = step in (1, 4)
+            written = writer.write(np.full(4, step, dtype=np.int8), np.array([step, 1], dtype=np.int8),
+                                   float(step), -1.0 if done else 0.0, done)
+            self.assertTrue(written)
+        self.assertEqual(full_queue.get(), 0)
+        self.assertTrue(full_queue.empty())
+        self.assertEqual(writer.cursor, 2)
+
+        self.assertEqual(buffers['state'][0][:, 0].tolist(), [0, 1, 2])
+        self.assertEqual(buffers['action'][0][:, 0].tolist(), [0, 1, 2])
+        self.assertEqual(buffers['target'][0].tolist(), [0.0, 1.0, 2.0])
+        self.assertEqual(buffers['episode_return'][0].tolist(), [0.0, -1.0, 0.0])
+        self.assertEqual(buffers['done'][0].tolist(), [False, True, False])
+        self.assertEqual(buffers['state'][1][:2, 0].tolist(), [3, 4])
+
+        writer.write(np.zeros(4, dtype=np.int8), np.zeros(2, dtype=np.int8), 0.0, 0.0, False)
+        self.assertEqual(full_queue.get(), 1)
+
+        # The free queue returns None when the actors should stop
+        free_queue.put(None)
+        self.assertFalse(writer.write(np.zeros(4, dtype=np.int8), np.zeros(2, dtype=np.int8), 0.0, 0.0, False))
+
+    def test_net_broadcast(self):
+        net = DMCNet([6], [3], mlp_layers=[8, 8])
+        obs, actions = torch.rand(1, 6), torch.rand(5, 3)
+        with torch.no_grad():
+            np.testing.assert_allclose(net(obs, actions).numpy(), net(obs.repeat(5, 1), actions).numpy(), rtol=1e-5, atol=1e-6)
+
+    def test_predict_with_action_features(self):
+        for env_id in ['doudizhu', 'leduc-holdem']:
+            env = rlcard.make(env_id)
+            state, _ = env.reset()
+            action_shape = env.action_shape[0] or [env.num_actions]
+            agent = DMCAgent(env.state_shape[0], action_shape, mlp_layers=[8, 8], device='cpu',
+                             action_features=env.get_action_features())
+            agent_without_table = DMCAgent(env.state_shape[0], action_shape, mlp_layers=[8, 8], device='cpu')
+            agent_without_table.load_state_dict(agent.state_dict())
+
+            action_keys, values = agent.predict(state)
+            self.assertEqual(action_keys.tolist(), list(state['legal_actions'].keys()))
+            np.testing.assert_allclose(values, agent_without_table.predict(state)[1], rtol=1e-5, atol=1e-6)
+
+    def test_batch_predict(self):
+        env = rlcard.make('doudizhu', config={'seed': 0})
+        agent = DMCAgent(env.state_shape[0], env.action_shape[0], mlp_layers=[8, 8], device='cpu',
+                         action_features=env.get_action_features())
+        states = []
+        for _ in range(4):
+            state, _ = env.reset()
+            states.append(state)
+        for (action_keys, values), state in zip(agent.batch_predict(states), states):
+            expected_keys, expected_values = agent.predict(state)
+            self.assertEqual(action_keys.tolist(), expected_keys.tolist())
+            np.testing.assert_allclose(values, expected_values, rtol=1e-5, atol=1e-6)
+
+    def test_act(self):
+        # Seeded, with rollouts long enough for every position to fill a buffer before
+        # the actor stops, which happens when the first position runs out of free buffers
+        torch.manual_seed(0)
+        np.random.seed(0)
+        T, num_buffers = 8, 3
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        action_shape = [[env.num_actions] for _ in range(env.num_players)]
+        model = DMCModel(env.state_shape, action_shape, mlp_layers=[8, 8], device='cpu',
+                         action_features=env.get_action_features())
+        broadcast = WeightBroadcast(1, env.num_players)
+        metrics = DMCMetrics(1, env.num_players)
+        for actor, extra_args in [(act, ()), (act_batched, (4,)), (act, (broadcast,)), (act_batched, (4, broadcast)),
+                                  (act, (broadcast, metrics.get_recorder(0)))]:
+            buffers = create_buffers(T, num_buffers, env.state_shape, action_shape, ['cpu'])['cpu']
+            free_queue = [queue.SimpleQueue() for _ in range(env.num_players)]
+            full_queue = [queue.SimpleQueue() for _ in range(env.num_players)]
+            for p in range(env.num_players):
+                for m in range(num_buffers):
+                    free_queue[p].put(m)
+                free_queue[p].put(None)
+
+            # The actor returns when a free queue returns None
+            actor(0, 'cpu', T, free_queue, full_queue, model, buffers, env, *extra_args)
+            num_full = [0 for _ in range(env.num_players)]
+            for p in range(env.num_players):
+                self.assertFalse(full_queue[p].empty())
+                while not full_queue[p].empty():
+                    num_full[p] += 1
+                    index = full_queue[p].get()
+                    buffer = {key: value[index] for key, value in buffers[p].items()}
+                    self.assertEqual(buffer['action'].sum().item(), T)
+                    dones = buffer['done'].numpy()
+                    np.testing.assert_array_equal(buffer['episode_return'].numpy()[dones], buffer['target'].numpy()[dones])
+                    self.assertTrue(np.all(buffer['episode_return'].numpy()[~dones] == 0))
+
+        snapshot = metrics.snapshot()
+        for stage in ['actor_env_step', 'actor_inference', 'actor_free_queue_wait']:
+            self.assertGreater(snapshot['counts'][STAGES.index(stage)].sum(), 0)
+        self.assertEqual(snapshot['full_queue_depths'], num_full)
+
+    def test_weight_broadcast(self):
+        model = DMCModel([[4], [4]], [[2], [2]], mlp_layers=[8], device='cpu')
+        learner_model = DMCModel([[4], [4]], [[2], [2]], mlp_layers=[8], device='cpu')
+        local_model = DMCModel([[4], [4]], [[2], [2]], mlp_layers=[8], device='cpu')
+        broadcast = WeightBroadcast(num_actors=2, num_players=2)
+
+        broadcast.publish(1, learner_model.get_agent(1).state_dict(), model.get_agent(1), step=3)
+        self.assertEqual(broadcast.versions.tolist(), [0, 2])
+        broadcast.pull(0, model, local_model)
+        for key, value in learner_model.get_agent(1).state_dict().items():
+            self.assertTrue(torch.equal(local_model.get_agent(1).state_dict()[key], value))
+        self.assertEqual(broadcast.actor_steps[0].tolist(), [0, 3])
+        staleness, latency = broadcast.get_stats(1, step=5)
+        self.assertEqual(staleness, 3.5)
+        self.assertGreaterEqual(latency, 0)
+
+        # Torn weights, i.e., a publish in progress, are not pulled
+        broadcast.versions[0] = 1
+        broadcast.pull(1, model, local_model)
+        self.assertEqual(broadcast.actor_steps[1].tolist(), [0, 3])
+
+    def test_weight_publisher(self):
+        learner_model = DMCModel([[4], [4]], [[2], [2]], mlp_layers=[8], device='cpu')
+        models = {'cpu': DMCModel([[4], [4]], [[2], [2]], mlp_layers=[8], device='cpu')}
+        broadcasts = {'cpu': WeightBroadcast(num_actors=1, num_players=2)}
+        publisher = WeightPublisher(broadcasts, learner_model, models, [threading.Lock() for _ in range(2)])
+        publisher.start()
+        publisher.request(0, 1)
+        publisher.request(1, 2)
+        publisher.stop()
+        self.assertFalse(publisher.is_alive())
+        self.assertEqual(broadcasts['cpu'].versions.tolist(), [2, 2])
+        self.assertEqual(broadcasts['cpu'].steps.tolist(), [1, 2])
+        for position in range(2):
+            for key, value in learner_model.get_agent(position).state_dict().items():
+                self.assertTrue(torch.equal(models['cpu'].get_agent(position).state_dict()[key], value))
+
+    def test_copy_model(self):
+        env = rlcard.make('leduc-holdem')
+        model = DMCModel(env.state_shape, [[env.num_actions] for _ in range(env.num_players)], mlp_layers=[8],
+                         device='cpu', action_features=env.get_action_features())
+        local_model = copy_model(model)
+        for agent, local_agent in zip(model.get_agents(), local_model.get_agents()):
+            self.assertIs(local_agent.action_features, agent.action_features)
+            self.assertIsNot(local_agent.net, agent.net)
+
+    def test_copy_env(self):
+        env = rlcard.make('doudizhu')
+        env_copy = copy_env(env)
+        self.assertIs(env_copy._action_features, env._action_features)
+        self.assertIsNot(env_copy.game, env.game)
+
+    def test_metrics(self):
+        self.assertEqual(get_bucket(0.0), 0)
+        self.assertEqual(2.0 ** (get_bucket(0.3) - 20), 0.5)
+        self.assertEqual(get_percentile(np.array([0, 9, 1]), 50), 2.0 ** -19)
+        self.assertEqual(get_percentile(np.array([0, 9, 1]), 99), 2.0 ** -18)
+
+        metrics = DMCMetrics(2, 1)
+        previous = metrics.snapshot()
+        actor, learner = metrics.get_recorder(0), metrics.get_recorder(1)
+        actor.record('actor_env_step', 0.001, count=10)
+        actor.filled[0] += 3
+        learner.consumed[0] += 1
+        learner.record('learner_full_queue_wait', 0.5)
+        learner.record('learner_forward_backward', 0.1)
+        record = metrics.get_record(previous, metrics.snapshot(), 1.0, num_buffers=5)
+        self.assertEqual(record['stages']['actor_env_step']['count'], 10)
+        self.assertAlmostEqual(record['stages']['actor_env_step']['mean'], 0.001)
+        self.assertEqual(record['full_queue_depths'], [2])
+        self.assertEqual(record['free_queue_depths'], [3])
+
+        summary, bottleneck = summarize([record, record])
+        self.assertEqual(summary['actor_env_step']['count'], 20)
+        self.assertAlmostEqual(summary['learner_full_queue_wait']['share'], 0.5 / 0.6)
+        self.assertIn('actors are the bottleneck', bottleneck)
+
+    def test_allocate_cores(self):
+        learner_cores, actor_cores = allocate_cores(3, 2, cores=list(range(6)))
+        self.assertEqual(learner_cores, [0, 1])
+        self.assertEqual(actor_cores, [[2], [3], [4]])
+        learner_cores, actor_cores = allocate_cores(3, 1, cores=[0, 1, 2])
+        self.assertEqual(actor_cores, [[1], [2], [1]])
+        with self.assertRaises(ValueError):
+            allocate_cores(3, 2, cores=[0, 1])
+
+    def test_trainer_num_buffers(self):
+        env = rlcard.make('leduc-holdem')
+        with self.assertRaises(ValueError):
+            DMCTrainer(env, batch_size=32, num_buffers=50, num_actors=19)
+        with tempfile.TemporaryDirectory() as savedir:
+            trainer = DMCTrainer(env, savedir=savedir, batch_size=32, num_buffers=50, num_actors=18)
+            trainer.plogger.close()
+        self.assertEqual(trainer.num_buffers, 50)
+
+    def test_run_actor(self):
+        num_threads = torch.get_num_threads()
+        threads = []
+        try:
+            torch.set_num_threads(2)
+            run_actor(lambda: threads.append(torch.get_num_threads()), (), device='0')
+            run_actor(lambda: threads.append(torch.get_num_threads()), (), device='cpu')
+        finally:
+            torch.set_num_threads(num_threads)
+        self.assertEqual(threads, [2, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,10 @@ import unittest
 import torch
 import numpy as np
 
-from rlcard.agents.dqn_agent import DQNAgent
+import rlcard
+from rlcard.envs import VecEnv
+
+from rlcard.agents.dqn_agent import DQNAgent, Memory, PrioritizedMemory, SumTree
 
 class TestDQN(unittest.TestCase):
 
@@ -51,3 +54,115 @@ class TestDQN(unittest.TestCase):
         predicted_action = agent.step({'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}})
         self.assertGreaterEqual(predicted_action, 0)
         self.assertLessEqual(predicted_action, 1)
+
+    def test_memory(self):
+        memory = Memory(memory_size=3, batch_size=2, num_actions=4)
+        for i in range(5):
+            memory.save(np.full(2, i, dtype=np.float32), i % 4, float(i), np.full(2, i + 1, dtype=np.float32), [i % 4, 3], i == 4)
+        self.assertEqual(len(memory), 3)
+        self.assertEqual(memory.states.dtype, np.float32)
+        self.assertEqual(sorted(memory.rewards.tolist()), [2.0, 3.0, 4.0])
+
+        state_batch, action_batch, reward_batch, next_state_batch, legal_actions_batch, done_batch = memory.sample()
+        self.assertEqual(state_batch.shape, (2, 2))
+        self.assertEqual(legal_actions_batch.shape, (2, 4))
+        self.assertEqual(len(set(reward_batch.tolist())), 2)
+        for state, action, reward, next_state, legal_actions, done in zip(*memory.sample()):
+            self.assertIn(reward, [2.0, 3.0, 4.0])
+            self.assertEqual(state[0], reward)
+            self.assertEqual(next_state[0], reward + 1)
+            self.assertEqual(action, reward % 4)
+            self.assertEqual(np.flatnonzero(legal_actions).tolist(), sorted({action, 3}))
+            self.assertEqual(done, reward == 4)
+
+    def test_memory_without_num_actions(self):
+        memory = Memory(3, 2)
+        memory.save(np.zeros(2), 0, 0.0, np.zeros(2), [0, 1], False)
+        memory.save(np.zeros(2), 1, 1.0, np.zeros(2), [], True)
+        self.assertEqual(memory.legal_actions.shape, (3, 2))
+        memory.save(np.zeros(2), 4, 2.0, np.zeros(2), [1, 4], False)
+        self.assertEqual(memory.legal_actions.shape, (3, 5))
+        self.assertEqual(memory.legal_actions[:3].tolist(), [[True, True, False, False, False],
+                                                             [False] * 5,
+                                                             [False, True, False, False, True]])
+        self.assertEqual(memory.sample()[4].shape, (2, 5))
+
+    def test_train_prioritized(self):
+        agent = DQNAgent(replay_memory_size=200,
+                         replay_memory_init_size=100,
+                         update_target_estimator_every=100,
+                         state_shape=[2],
+                         mlp_layers=[10,10],
+                         device=torch.device('cpu'),
+                         prioritized_replay=True,
+                         priority_beta_steps=300)
+        self.assertIsInstance(agent.memory, PrioritizedMemory)
+        for _ in range(300):
+            ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), np.random.randint(2), {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, True]
+            agent.feed(ts)
+        self.assertEqual(agent.q_estimator.td_errors.shape, (agent.batch_size,))
+        self.assertGreater(agent.memory.max_priority, 0)
+        self.assertAlmostEqual(agent.memory.tree.total(), agent.memory.tree[np.arange(200)].sum())
+
+    def test_sum_tree(self):
+        tree = SumTree(5)
+        tree.update([0, 1, 2, 3, 4], [1.0, 0.0, 2.0, 3.0, 4.0])
+        self.assertEqual(tree.total(), 10.0)
+        self.assertEqual(tree.find([0.0, 0.5, 1.0, 2.9, 3.0, 5.9, 6.0, 9.99]).tolist(), [0, 0, 2, 2, 3, 3, 4, 4])
+        tree.update([4], [0.0])
+        self.assertEqual(tree.total(), 6.0)
+        self.assertEqual(tree.find([6.0, 9.0]).tolist(), [3, 3])
+
+    def test_prioritized_memory(self):
+        np.random.seed(0)
+        memory = PrioritizedMemory(memory_size=4, batch_size=1000, num_actions=2, alpha=1.0, epsilon=0.0)
+        for i in range(4):
+            memory.save(np.zeros(2), 0, float(i), np.zeros(2), [0], False)
+        memory.update_priorities(np.arange(4), np.array([1.0, -1.0, 2.0, 0.0]))
+        self.assertEqual(memory.max_priority, 2.0)
+
+        samples = memory.sample(beta=1.0)
+        indices, weights = samples[-2:]
+        self.assertTrue(np.array_equal(samples[2], indices.astype(np.float32)))
+        counts = np.bincount(indices, minlength=4)
+        self.assertEqual(counts.tolist(), [250, 250, 500, 0])
+        self.assertTrue(np.allclose(weights, np.where(indices == 2, 0.5, 1.0)))
+
+        # A new transition takes the largest priority
+        memory.save(np.zeros(2), 0, 4.0, np.zeros(2), [0], False)
+        self.assertEqual(memory.tree[0], 2.0)
+
+    def test_prioritized_memory_partly_filled(self):
+        memory = PrioritizedMemory(memory_size=8, batch_size=4, num_actions=2)
+        for i in range(3):
+            memory.save(np.zeros(2), 0, float(i), np.zeros(2), [0], False)
+        # The largest prefix sum must not reach the empty, uninitialized rows
+        indices = memory.tree.find([memory.tree.total()] * 4)
+        self.assertEqual(indices.tolist(), [2, 2, 2, 2])
+        np.random.seed(0)
+        for _ in range(100):
+            samples = memory.sample()
+            self.assertTrue(np.all(samples[-2] < 3))
+            self.assertTrue(np.all(np.isfinite(samples[-1])))
+
+    def test_batch_step(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        agent = DQNAgent(num_actions=env.num_actions,
+                         state_shape=env.state_shape[0],
+                         mlp_layers=[10,10],
+                         device=torch.device('cpu'))
+        states = []
+        for _ in range(20):
+            state, _ = env.reset()
+            states.append(state)
+        actions, values = agent.batch_eval_step(states)
+        self.assertEqual(values.shape, (20, env.num_actions))
+        for state, action in zip(states, actions):
+            self.assertEqual(action, agent.eval_step(state)[0])
+        for state, action in zip(states, agent.batch_step(states)):
+            self.assertIn(action, state['legal_actions'])
+
+        vec_env = VecEnv('leduc-holdem', 8, config={'seed': 0})
+        vec_env.set_agents([agent, agent])
+        self.assertEqual(vec_env.run(20).shape, (20, 2))
+        self.assertEqual(vec_env.run(20, is_training=True).shape, (20, 2))
@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.cfr_agent import CFRAgent
+from rlcard.agents.mccfr_agent import ExternalSamplingMCCFRAgent, OutcomeSamplingMCCFRAgent
+
+class TestMCCFR(unittest.TestCase):
+
+    def _test_train(self, agent_class):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        agent = agent_class(env, model_path='experiments/mccfr_model')
+
+        for _ in range(200):
+            agent.train()
+        self.assertGreater(len(agent.table), 0)
+
+        state = {'obs': np.array([1., 1., 0., 0., 0., 0.]), 'legal_actions': {0: None,2: None}, 'raw_legal_actions': ['call', 'fold']}
+        action, _ = agent.eval_step(state)
+        self.assertIn(action, [0, 2])
+
+        n = len(agent.table)
+        strategy_sums = agent.table.strategy_sums[:n]
+        self.assertTrue(np.all(strategy_sums[~agent.table.legal_mask[:n]] == 0))
+        return agent
+
+    def test_external_sampling(self):
+        self._test_train(ExternalSamplingMCCFRAgent)
+
+    def test_outcome_sampling(self):
+        self._test_train(OutcomeSamplingMCCFRAgent)
+
+    def test_save_and_load(self):
+        agent = self._test_train(ExternalSamplingMCCFRAgent)
+        agent.save()
+
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        new_agent = ExternalSamplingMCCFRAgent(env, model_path='experiments/mccfr_model')
+        new_agent.load()
+        self.assertEqual(len(agent.table), len(new_agent.table))
+        self.assertEqual(agent.iteration, new_agent.iteration)
+
+        cfr_agent = CFRAgent(env, model_path='experiments/mccfr_model')
+        cfr_agent.load()
+        self.assertEqual(len(agent.table), len(cfr_agent.average_policy))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,13 @@
+import os
 import unittest
+import tempfile
 import torch
 import numpy as np
 
-from rlcard.agents.nfsp_agent import NFSPAgent
+import rlcard
+from rlcard.envs import VecEnv
+
+from rlcard.agents.nfsp_agent import NFSPAgent, ReservoirBuffer, Transition
 
 class TestNFSP(unittest.TestCase):
 
@@ -45,3 +50,55 @@ class TestNFSP(unittest.TestCase):
 
             ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}}, np.random.randint(2), 0, {'obs': np.random.random_sample((2,)), 'legal_actions': {0: None, 1: None}, 'raw_legal_actions': ['call', 'raise']}, True]
             agent.feed(ts)
+
+    def test_reservoir_buffer(self):
+        buffer = ReservoirBuffer(10, state_dtype=np.int8)
+        for i in range(100):
+            buffer.add(Transition(info_state=np.full(3, i % 2, dtype=np.float64), action_probs=np.array([0.25, 0.75])))
+        self.assertEqual(len(buffer), 10)
+
+        info_states, action_probs = buffer.sample(4)
+        self.assertEqual(info_states.shape, (4, 3))
+        self.assertEqual(info_states.dtype, np.int8)
+        self.assertEqual(action_probs.dtype, np.float16)
+        self.assertTrue(np.all(action_probs == np.array([0.25, 0.75])))
+        self.assertEqual(len(list(buffer)), 10)
+        with self.assertRaises(ValueError):
+            buffer.sample(11)
+
+        buffer.clear()
+        self.assertEqual(len(buffer), 0)
+
+    def test_reservoir_buffer_memmap(self):
+        with tempfile.TemporaryDirectory() as path:
+            buffer = ReservoirBuffer(5, path=path)
+            for i in range(5):
+                buffer.add((np.full(2, i, dtype=np.int8), np.array([1.0, 0.0])))
+            info_states, _ = buffer.sample(5)
+            self.assertEqual(sorted(info_states[:, 0].tolist()), [0, 1, 2, 3, 4])
+            self.assertEqual(np.load(os.path.join(path, 'info_states.npy')).shape, (5, 2))
+            del buffer, info_states
+
+    def test_batch_step(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0})
+        agent = NFSPAgent(num_actions=env.num_actions,
+                          state_shape=env.state_shape[0],
+                          hidden_layers_sizes=[10,10],
+                          q_mlp_layers=[10,10],
+                          evaluate_with='best_response',
+                          device=torch.device('cpu'))
+        states = []
+        for _ in range(20):
+            state, _ = env.reset()
+            states.append(state)
+        actions, values = agent.batch_eval_step(states)
+        self.assertEqual(values.shape, (20, env.num_actions))
+        for state, action in zip(states, actions):
+            self.assertEqual(action, agent.eval_step(state)[0])
+        for state, action in zip(states, agent.batch_step(states)):
+            self.assertIn(action, state['legal_actions'])
+
+        vec_env = VecEnv('leduc-holdem', 8, config={'seed': 0})
+        vec_env.set_agents([agent, agent])
+        self.assertEqual(vec_env.run(20).shape, (20, 2))
+        self.assertEqual(vec_env.run(20, is_training=True).shape, (20, 2))
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+
+from rlcard.agents.array_cfr_agent import ArrayCFRAgent, InfoSetTable
+from rlcard.agents.mccfr_agent import ExternalSamplingMCCFRAgent
+from rlcard.agents.parallel_cfr import ParallelCFRTrainer
+
+class TestParallelCFR(unittest.TestCase):
+
+    def test_delta(self):
+        table = InfoSetTable(num_actions=2, chunk_size=4)
+        table.get_id('a', [0, 1])
+        snapshot = table.snapshot()
+        table.regrets[0] += [1., -1.]
+        i = table.get_id('b', [1])
+        table.strategy_sums[i, 1] += 2.
+        delta = table.pop_delta(snapshot)
+
+        self.assertEqual(delta[0], ['a', 'b'])
+        self.assertTrue(np.all(table.regrets[:2] == 0))
+        self.assertTrue(np.all(table.strategy_sums[:2] == 0))
+
+        other = InfoSetTable(num_actions=2)
+        other.apply_delta(delta)
+        other.apply_delta(delta)
+        np.testing.assert_allclose(other.regrets[other.index['a']], [2., -2.])
+        np.testing.assert_allclose(other.strategy_sums[other.index['b']], [0., 4.])
+        self.assertEqual(other.legal_mask[other.index['b']].tolist(), [False, True])
+
+    def _test_train(self, agent_class):
+        with ParallelCFRTrainer('leduc-holdem', agent_class, num_workers=2, traversals_per_worker=2, seed=3) as trainer:
+            for _ in range(10):
+                trainer.train()
+            stats = trainer.stats()
+        self.assertEqual(trainer.agent.iteration, 10)
+        self.assertGreater(stats['num_infosets'], 0)
+        self.assertGreater(stats['traversals_per_second'], 0)
+
+        state = {'obs': np.array([1., 1., 0., 0., 0., 0.]), 'legal_actions': {0: None,2: None}, 'raw_legal_actions': ['call', 'fold']}
+        action, _ = trainer.agent.eval_step(state)
+        self.assertIn(action, [0, 2])
+        return trainer.agent
+
+    def test_train_cfr(self):
+        self._test_train(ArrayCFRAgent)
+
+    def test_train_external_sampling(self):
+        self._test_train(ExternalSamplingMCCFRAgent)
+
+    def test_deterministic(self):
+        agent_1 = self._test_train(ExternalSamplingMCCFRAgent)
+        agent_2 = self._test_train(ExternalSamplingMCCFRAgent)
+        self.assertEqual(agent_1.table.keys, agent_2.table.keys)
+        np.testing.assert_allclose(agent_1.table.regrets, agent_2.table.regrets)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
+import numpy as np
 
 import rlcard
+from rlcard.envs.doudizhu import _cards2array
 from rlcard.agents.random_agent import RandomAgent
 from .determism_util import is_deterministic
 
@@ -12,6 +14,27 @@ class TestDoudizhuEnv(unittest.TestCase):
         state, _ = env.reset()
         self.assertEqual(state['obs'].size, 790)
 
+    def test_cards2array(self):
+        array = _cards2array('3334BR')
+        self.assertEqual(array.dtype, np.int8)
+        self.assertEqual(array[:8].tolist(), [1, 1, 1, 0, 1, 0, 0, 0])
+        self.assertEqual(array[8:52].sum(), 0)
+        self.assertEqual(array[52:].tolist(), [1, 1])
+        self.assertEqual(_cards2array('pass').sum(), 0)
+        self.assertIs(_cards2array('3334BR'), array)
+        with self.assertRaises(ValueError):
+            array[0] = 0
+
+    def test_legal_action_features(self):
+        env = rlcard.make('doudizhu')
+        state, _ = env.reset()
+        features = state['legal_action_features']
+        self.assertEqual(features.shape, (len(state['legal_actions']), 54))
+        for row, (action_id, action_feature) in enumerate(state['legal_actions'].items()):
+            self.assertTrue(np.array_equal(features[row], action_feature))
+            self.assertTrue(np.array_equal(env.get_action_feature(action_id),
+                                           _cards2array(env._decode_action(action_id))))
+
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('doudizhu'))
 
@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.envs import VecEnv
+from rlcard.agents.random_agent import RandomAgent
+
+
+class TestVecEnv(unittest.TestCase):
+
+    def test_reset(self):
+        vec_env = VecEnv('leduc-holdem', 4, config={'seed': 0})
+        obs, legal_mask, player_ids = vec_env.reset()
+        self.assertEqual(obs.shape, (4, 36))
+        self.assertEqual(legal_mask.shape, (4, vec_env.num_actions))
+        self.assertEqual(len(player_ids), 4)
+        for i in range(4):
+            legal_actions = np.flatnonzero(legal_mask[i]).tolist()
+            self.assertEqual(legal_actions, list(vec_env.states[i]['legal_actions'].keys()))
+
+    def test_step_auto_reset(self):
+        vec_env = VecEnv('leduc-holdem', 8, config={'seed': 0})
+        obs, legal_mask, _ = vec_env.reset()
+        num_done = 0
+        for _ in range(50):
+            actions = RandomAgent.batch_step(obs, legal_mask)
+            obs, legal_mask, _, payoffs, dones = vec_env.step(actions)
+            self.assertEqual(payoffs.shape, (8, 2))
+            self.assertTrue(np.all(payoffs[~dones] == 0))
+            np.testing.assert_allclose(payoffs.sum(axis=1), 0)
+            num_done += dones.sum()
+        self.assertGreater(num_done, 0)
+        for env in vec_env.envs:
+            self.assertFalse(env.is_over())
+
+    def test_seed(self):
+        vec_env_1 = VecEnv('leduc-holdem', 3, config={'seed': 7})
+        vec_env_2 = VecEnv('leduc-holdem', 3, config={'seed': 7})
+        np.testing.assert_array_equal(vec_env_1.reset()[0], vec_env_2.reset()[0])
+
+    def test_run(self):
+        vec_env = VecEnv('leduc-holdem', 16)
+        vec_env.set_agents([RandomAgent(vec_env.num_actions) for _ in range(vec_env.num_players)])
+        payoffs = vec_env.run(100)
+        self.assertEqual(payoffs.shape, (100, 2))
+        np.testing.assert_allclose(payoffs.sum(axis=1), 0)
+
+    def test_run_without_batch_methods(self):
+        class SingleStateAgent(object):
+            use_raw = False
+
+            def step(self, state):
+                return list(state['legal_actions'].keys())[0]
+
+        vec_env = VecEnv('limit-holdem', 4)
+        vec_env.set_agents([RandomAgent(vec_env.num_actions), SingleStateAgent()])
+        payoffs = vec_env.run(10, is_training=True)
+        self.assertEqual(payoffs.shape, (10, 2))
+
+    def test_heterogeneous_obs(self):
+        vec_env = VecEnv('doudizhu', 2)
+        vec_env.set_agents([RandomAgent(vec_env.num_actions) for _ in range(vec_env.num_players)])
+        payoffs = vec_env.run(2)
+        self.assertEqual(payoffs.shape, (2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
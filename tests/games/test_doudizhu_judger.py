@@ -1,6 +1,9 @@
 import unittest
+import numpy as np
 
-from rlcard.games.doudizhu.utils import CARD_TYPE
+from rlcard.games.doudizhu.game import DoudizhuGame as Game
+from rlcard.games.doudizhu.utils import CARD_TYPE, TYPE_CARD, ACTION_2_ID, ACTION_COUNTS
+from rlcard.games.doudizhu.utils import cards2str, cards2mask, contains_cards, get_gt_cards
 from rlcard.games.doudizhu.judger import DoudizhuJudger as Judger
 
 class TestDoudizhuGame(unittest.TestCase):
@@ -155,5 +158,55 @@ class TestDoudizhuGame(unittest.TestCase):
             self.assertIn(c, playable_cards)
         self.assertEqual(len(playable_cards), len(all_cards_list))
 
+    def test_cards2mask(self):
+        self.assertEqual(cards2mask('3'), 1)
+        self.assertEqual(cards2mask('33'), 1 | 1 << 15)
+        self.assertEqual(cards2mask('3334R'), 1 | 1 << 15 | 1 << 30 | 1 << 1 | 1 << 14)
+        self.assertEqual(ACTION_COUNTS[ACTION_2_ID['33344']].tolist(), [3, 2] + [0] * 13)
+        hand_mask = cards2mask('3334455')
+        for cards, contained in [('333', True), ('3333', False), ('3344', True), ('33344555', False)]:
+            self.assertEqual(cards2mask(cards) & ~hand_mask == 0, contained)
+
+    def test_get_gt_cards(self):
+        game = Game()
+        game.np_random = np.random.RandomState(0)
+        for _ in range(3):
+            game.init_game()
+            while not game.is_over():
+                player = game.players[game.round.current_player]
+                greater_player = game.round.greater_player
+                if greater_player is not None and greater_player.player_id != player.player_id:
+                    # Compare with a search over all the candidates of greater weight
+                    current_hand = cards2str(player.current_hand)
+                    target_type, target_weight = CARD_TYPE[0][greater_player.played_cards][0]
+                    expected = {'pass'}
+                    if target_type != 'rocket':
+                        for card_type, weight in [(target_type, int(target_weight)), ('bomb', -1), ('rocket', -1)]:
+                            for can_weight, cards_list in TYPE_CARD[card_type].items():
+                                if int(can_weight) > weight:
+                                    expected.update(cards for cards in cards_list if contains_cards(current_hand, cards))
+                    gt_cards = get_gt_cards(player, greater_player)
+                    self.assertEqual(len(gt_cards), len(expected))
+                    self.assertEqual(set(gt_cards), expected)
+                actions = sorted(game.state['actions'])
+                game.step(actions[game.np_random.randint(len(actions))])
+
+    def test_calc_playable_cards(self):
+        game = Game(allow_step_back=True)
+        game.np_random = np.random.RandomState(0)
+        game.init_game()
+        for _ in range(30):
+            if game.is_over():
+                break
+            actions = sorted(game.state['actions'])
+            game.step(actions[game.np_random.randint(len(actions))])
+            for player in game.players:
+                self.assertEqual(game.judger.playable_cards[player.player_id],
+                                 Judger.playable_cards_from_hand(cards2str(player.current_hand)))
+        while game.step_back():
+            for player in game.players:
+                self.assertEqual(game.judger.playable_cards[player.player_id],
+                                 Judger.playable_cards_from_hand(cards2str(player.current_hand)))
+
 if __name__ == '__main__':
     unittest.main()
@@ -18,6 +18,7 @@ from rlcard.games.gin_rummy.utils.action_event import draw_card_action_id, pick_
 from rlcard.games.gin_rummy.utils.action_event import declare_dead_hand_action_id
 from rlcard.games.gin_rummy.utils.action_event import gin_action_id, discard_action_id, knock_action_id
 from rlcard.games.gin_rummy.utils.melding import get_all_set_melds, get_all_run_melds, get_meld_clusters
+from rlcard.games.gin_rummy.utils.melding import get_best_deadwood_count, run_meld_masks, set_meld_masks
 from rlcard.games.gin_rummy.utils.settings import Setting, Settings
 from rlcard.games.gin_rummy.utils.thinker import Thinker
 
@@ -168,6 +169,27 @@ class TestGinRummyGame(unittest.TestCase):
         self.assertEqual(set(knock_cards), set(correct_knock_cards))
         self.assertEqual(gin_cards, [])
 
+    def test_bitboards(self):
+        self.assertEqual(len(run_meld_masks), 264)
+        self.assertEqual(len(set_meld_masks), 65)
+        hand_text = ['7H', '6H', '5H', '4S', '4H', '3H', '2S', 'AS', 'AH', 'AD', 'AC']
+        hand = [utils.card_from_text(x) for x in hand_text]
+        hand_mask = utils.get_card_mask(hand)
+        self.assertEqual(utils.get_card_count_of_mask(hand_mask), 11)
+        self.assertEqual(set(utils.get_cards_from_mask(hand_mask)), set(hand))
+        self.assertEqual(utils.get_deadwood_count_of_mask(hand_mask), 35)
+
+        # 3H-6H, AS-AH-AD-AC and 4S, 2S as deadwood
+        self.assertEqual(get_best_deadwood_count(hand=hand[1:]), 6)
+        meld_cluster = [[utils.card_from_text(x) for x in ['7H', '6H', '5H', '4H', '3H']]]
+        self.assertEqual(utils.get_deadwood_count(hand=hand[1:], meld_cluster=meld_cluster), 10)
+
+        player = GinRummyPlayer(player_id=0, np_random=np.random.RandomState())
+        for card in hand:
+            player.add_card_to_hand(card)
+        player.remove_card_from_hand(hand[0])
+        self.assertEqual(player.hand_mask, utils.get_card_mask(hand[1:]))
+
     def test_corrected_settings(self):
         default_setting = Setting.default_setting()
         config = {Setting.max_drawn_card_count: 10,
@@ -0,0 +1,62 @@
+import itertools
+import multiprocessing
+import unittest
+
+import rlcard
+from rlcard.games.limitholdem.equity import EquityCalculator, canonical_key
+from rlcard.games.limitholdem.evaluator import cards_to_ids, evaluate
+
+class TestHoldemEquity(unittest.TestCase):
+
+    def test_canonical_key(self):
+        key = canonical_key(cards_to_ids(['SA', 'HK']), cards_to_ids(['D2', 'C7', 'HT']))
+        self.assertEqual(key, canonical_key(cards_to_ids(['CK', 'DA']), cards_to_ids(['CT', 'S7', 'H2'])))
+        self.assertEqual(key, canonical_key(cards_to_ids(['HK', 'SA']), cards_to_ids(['HT', 'C7', 'D2'])))
+        self.assertNotEqual(key, canonical_key(cards_to_ids(['SA', 'SK']), cards_to_ids(['D2', 'C7', 'HT'])))
+
+    def test_exact_equity(self):
+        hole_cards = cards_to_ids(['S7', 'H2'])
+        public_cards = cards_to_ids(['D2', 'C7', 'HK', 'S9'])
+        deck = [card for card in range(52) if card not in hole_cards + public_cards]
+        total, count = 0.0, 0
+        for river in deck:
+            board = public_cards + [river]
+            strength = evaluate(hole_cards + board)
+            for opponent in itertools.combinations([card for card in deck if card != river], 2):
+                opponent_strength = evaluate(list(opponent) + board)
+                total += 1.0 if strength > opponent_strength else 0.5 if strength == opponent_strength else 0.0
+                count += 1
+        calculator = EquityCalculator()
+        self.assertAlmostEqual(calculator.equity(['S7', 'H2'], ['D2', 'C7', 'HK', 'S9']), total / count)
+
+    def test_sampled_equity(self):
+        calculator = EquityCalculator(num_samples=20000, seed=0)
+        self.assertAlmostEqual(calculator.equity(['SA', 'HA']), 0.852, delta=0.01)
+        self.assertLess(calculator.equity(['S7', 'H2'], num_opponents=3), calculator.equity(['S7', 'H2']))
+
+    def test_cache(self):
+        calculator = EquityCalculator(seed=0)
+        equity = calculator.equity(['SA', 'SK'], ['D2', 'C7', 'HT'])
+        self.assertEqual(len(calculator.cache), 1)
+        self.assertEqual(calculator.equity(['DK', 'DA'], ['HT', 'S7', 'C2']), equity)
+        self.assertEqual(len(calculator.cache), 1)
+        with self.assertRaises(ValueError):
+            calculator.equity(['SA', 'SA'])
+
+    def test_pool(self):
+        with multiprocessing.Pool(2) as pool:
+            with_pool = EquityCalculator(chunk_size=5000, pool=pool, seed=0).equity(['SA', 'HK'], ['D2', 'C7', 'HT'])
+        without_pool = EquityCalculator(chunk_size=5000, seed=0).equity(['SA', 'HK'], ['D2', 'C7', 'HT'])
+        self.assertEqual(with_pool, without_pool)
+
+    def test_state_equity(self):
+        calculator = EquityCalculator(num_samples=1000, seed=0)
+        for env_id in ['limit-holdem', 'no-limit-holdem']:
+            env = rlcard.make(env_id, config={'game_num_players': 3})
+            state, _ = env.reset()
+            equity = calculator.state_equity(state)
+            self.assertEqual(equity, calculator.equity(state['raw_obs']['hand'], num_opponents=2))
+            self.assertTrue(0 <= equity <= 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+
+from rlcard.games.limitholdem.evaluator import (
+    ID_TO_CARD,
+    card_to_id,
+    cards_to_ids,
+    compare_hands,
+    evaluate,
+    evaluate_batch,
+    get_category,
+)
+from rlcard.games.limitholdem.utils import Hand
+from rlcard.games.limitholdem.utils import compare_hands as compare_hands_by_hand
+from rlcard.games.base import Card
+
+class TestHoldemEvaluator(unittest.TestCase):
+
+    def test_card_to_id(self):
+        self.assertEqual(card_to_id('SA'), 0)
+        self.assertEqual(card_to_id(Card('C', 'K')), 51)
+        self.assertEqual(card_to_id(13), 13)
+        self.assertEqual(cards_to_ids(['H2', 'DT']), [14, 35])
+
+    def test_categories(self):
+        hands = {
+            9: ['CJ', 'CT', 'CQ', 'CK', 'C9', 'C8', 'SA'],
+            8: ['CJ', 'SJ', 'HJ', 'DJ', 'C9', 'C8', 'C7'],
+            7: ['CJ', 'SJ', 'HJ', 'D9', 'C9', 'C8', 'S7'],
+            6: ['CA', 'CQ', 'CT', 'C8', 'C6', 'S4', 'D2'],
+            5: ['CJ', 'ST', 'HQ', 'DK', 'D9', 'C8', 'C7'],
+            4: ['CJ', 'SJ', 'HJ', 'D9', 'C2', 'C7', 'C4'],
+            3: ['CJ', 'SJ', 'H9', 'D9', 'C2', 'C8', 'C7'],
+            2: ['CJ', 'SJ', 'H9', 'D3', 'C2', 'C8', 'C7'],
+            1: ['CJ', 'S5', 'H9', 'D4', 'C2', 'C8', 'C7'],
+        }
+        for category, hand in hands.items():
+            self.assertEqual(get_category(evaluate(cards_to_ids(hand))), category)
+        # The wheel is the lowest straight
+        wheel = evaluate(cards_to_ids(['SA', 'H2', 'D3', 'C4', 'S5', 'HJ', 'DK']))
+        six_high = evaluate(cards_to_ids(['S6', 'H2', 'D3', 'C4', 'S5', 'HJ', 'DK']))
+        self.assertEqual(get_category(wheel), 5)
+        self.assertLess(wheel, six_high)
+        with self.assertRaises(ValueError):
+            evaluate(cards_to_ids(['SA', 'H2', 'D3', 'C4']))
+
+    def test_compare_hands(self):
+        self.assertEqual(compare_hands([['CJ', 'SJ', 'H9', 'D3', 'C2', 'C8', 'C7'],
+                                        ['CQ', 'SQ', 'H9', 'D3', 'C2', 'C8', 'C6']]), [0, 1])
+        self.assertEqual(compare_hands([['CJ', 'CT', 'CQ', 'CK', 'C9', 'C8', 'C7'], None]), [1, 0])
+        self.assertEqual(compare_hands([['CA', 'C2', 'DJ', 'CT', 'S7', 'C5', 'ST'],
+                                        ['S3', 'S4', 'DJ', 'CT', 'S7', 'C5', 'ST'],
+                                        ['HQ', 'DA', 'DJ', 'CT', 'S7', 'C5', 'ST'],
+                                        ['SQ', 'HA', 'DJ', 'CT', 'S7', 'C5', 'ST']]), [0, 0, 1, 1])
+
+    def test_consistent_with_hand(self):
+        np_random = np.random.RandomState(0)
+        for _ in range(2000):
+            num_players = np_random.randint(2, 5)
+            cards = [ID_TO_CARD[card_id] for card_id in np_random.choice(52, 5 + 2 * num_players, replace=False)]
+            hands = [cards[:5] + cards[5+2*i:7+2*i] for i in range(num_players)]
+            self.assertEqual(compare_hands(hands), compare_hands_by_hand([list(hand) for hand in hands]))
+            hand = Hand(list(hands[0]))
+            hand.evaluateHand()
+            self.assertEqual(get_category(evaluate(cards_to_ids(hands[0]))), hand.category)
+
+    def test_evaluate_batch(self):
+        np_random = np.random.RandomState(0)
+        card_ids = np.array([np_random.choice(52, 7, replace=False) for _ in range(1000)])
+        for num_cards in [5, 6, 7]:
+            strengths = evaluate_batch(card_ids[:, :num_cards])
+            self.assertEqual(strengths.shape, (1000,))
+            self.assertEqual(strengths.tolist(), [evaluate(list(hand)) for hand in card_ids[:, :num_cards]])
+        with self.assertRaises(ValueError):
+            evaluate_batch(card_ids[:, :4])
+
+if __name__ == '__main__':
+    unittest.main()
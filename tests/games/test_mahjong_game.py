@@ -3,6 +3,9 @@ import numpy as np
 
 from rlcard.games.mahjong.game import MahjongGame as Game
 from rlcard.games.mahjong.player import MahjongPlayer as Player
+from rlcard.games.mahjong.card import MahjongCard as Card
+from rlcard.games.mahjong.judger import MahjongJudger as Judger
+from rlcard.games.mahjong.utils import card_encoding_dict, encode_cards, init_deck
 
 class TestMahjongMethods(unittest.TestCase):
 
@@ -68,6 +71,73 @@ class TestMahjongMethods(unittest.TestCase):
         success = game.step_back()
         self.assertEqual(success, False)
 
+    def test_counts(self):
+        game = Game(allow_step_back=True)
+        state, _ = game.init_game()
+        for _ in range(20):
+            if game.is_over():
+                break
+            state, _ = game.step(np.random.choice(game.get_legal_actions(state)))
+        for _ in range(20):
+            game.step_back()
+            for player in game.players:
+                counts = np.zeros(34, dtype=np.int8)
+                for card in player.hand:
+                    counts[card_encoding_dict[card.get_str()]] += 1
+                self.assertEqual(counts.tolist(), player.counts.tolist())
+
+    def test_tiles(self):
+        deck = init_deck()
+        for card in deck:
+            self.assertEqual(card.tile, card_encoding_dict[card.get_str()])
+        cards = deck[:3] + deck[34:35]
+        plane = encode_cards(cards)
+        self.assertEqual(plane.shape, (34, 4))
+        self.assertEqual(plane[cards[0].tile].tolist(), [1, 1, 0, 0])
+        self.assertEqual(plane.sum(), 4)
+        self.assertEqual(encode_cards([]).sum(), 0)
+
+    def test_judge_pong_chow(self):
+        class Dealer:
+            pass
+        dealer = Dealer()
+        players = [Player(i, np.random) for i in range(4)]
+        for trait in ['2', '3', '5', '5']:
+            players[2].add_card(Card('dots', trait))
+        dealer.table = [Card('dots', '5')]
+        self.assertEqual(Judger.judge_pong_gong(dealer, players, 2), (False, None, None))
+        action, player, cards = Judger.judge_pong_gong(dealer, players, 0)
+        self.assertEqual((action, player.player_id, len(cards)), ('pong', 2, 3))
+
+        dealer.table = [Card('dots', '4')]
+        dealer.table[0].set_index_num(3)
+        for card in players[2].hand:
+            card.set_index_num(int(card.trait) - 1)
+        action, player, cards = Judger(np.random).judge_chow(dealer, players, 1)
+        self.assertEqual((action, player.player_id), ('chow', 2))
+        self.assertEqual([card.get_str() for card in cards], ['dots-2', 'dots-3', 'dots-4'])
+
+    def test_judge_hu(self):
+        judger = Judger(np.random.RandomState())
+        player = Player(0, np.random.RandomState())
+        hand = [('bamboo', '1'), ('bamboo', '2'), ('bamboo', '3'), ('dots', '5'), ('dots', '5'), ('dots', '5'),
+                ('characters', '7'), ('characters', '8'), ('characters', '9'), ('dragons', 'red'), ('dragons', 'red'),
+                ('dragons', 'red'), ('winds', 'east'), ('winds', 'east')]
+        for card_type, trait in hand:
+            player.add_card(Card(card_type, trait))
+        self.assertEqual(judger.judge_hu(player), (True, 4))
+        self.assertEqual(judger.judge_hu(player), Judger.judge_hand([card.get_str() for card in player.hand], 0))
+
+        # Without the pair, there are at most 4 sets but no win
+        player.remove_card(len(player.hand) - 1)
+        win, _ = judger.judge_hu(player)
+        self.assertFalse(win)
+        self.assertEqual(player.counts.sum(), 13)
+
+        # The sets in the pile count
+        player.pile = [[Card('winds', 'west')] * 3] * 4
+        self.assertEqual(judger.judge_hu(player), (True, 4))
+
     def test_player_get_player_id(self):
         player = Player(0, np.random.RandomState())
         self.assertEqual(0, player.get_player_id())
@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+
+import rlcard
+
+def fingerprint(obj, memo=None):
+    ''' Describe the content of a game object with plain Python values,
+    ignoring the random generators and the undo log
+    '''
+    if memo is None:
+        memo = set()
+    if isinstance(obj, (list, tuple)):
+        return [fingerprint(o, memo) for o in obj]
+    if isinstance(obj, dict):
+        return {str(k): fingerprint(v, memo) for k, v in obj.items()}
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, '__dict__'):
+        if id(obj) in memo:
+            return 'seen'
+        memo.add(id(obj))
+        return {k: fingerprint(v, memo) for k, v in vars(obj).items()
+                if k not in ('np_random', 'history', 'judger')}
+    return repr(obj)
+
+class TestStepBack(unittest.TestCase):
+
+    def check_step_back(self, env_id, config={}, num_games=20):
+        env = rlcard.make(env_id, config=dict(config, allow_step_back=True, seed=0))
+        np_random = np.random.RandomState(0)
+        for _ in range(num_games):
+            state, _ = env.reset()
+            snapshots = []
+            while not env.is_over():
+                snapshots.append(fingerprint(env.game))
+                legal_actions = list(state['legal_actions'].keys())
+                state, _ = env.step(legal_actions[np_random.randint(len(legal_actions))])
+                if np_random.rand() < 0.3:
+                    # Step back and forth in the middle of the game
+                    env.step_back()
+                    self.assertEqual(fingerprint(env.game), snapshots[-1])
+                    state, _ = env.step(legal_actions[np_random.randint(len(legal_actions))])
+            while snapshots:
+                env.step_back()
+                self.assertEqual(fingerprint(env.game), snapshots.pop())
+            self.assertFalse(env.game.step_back())
+
+    def test_leduc_holdem(self):
+        self.check_step_back('leduc-holdem')
+
+    def test_limit_holdem(self):
+        self.check_step_back('limit-holdem')
+        self.check_step_back('limit-holdem', {'game_num_players': 4})
+
+    def test_no_limit_holdem(self):
+        self.check_step_back('no-limit-holdem')
+        self.check_step_back('no-limit-holdem', {'game_num_players': 4})
+
+    def test_uno(self):
+        self.check_step_back('uno', num_games=5)
+
+    def test_mahjong(self):
+        self.check_step_back('mahjong', num_games=2)
+
+    def test_gin_rummy(self):
+        self.check_step_back('gin-rummy', num_games=5)
+
+    def test_bridge(self):
+        self.check_step_back('bridge', num_games=5)
+
+    def test_blackjack(self):
+        self.check_step_back('blackjack')
+        self.check_step_back('blackjack', {'game_num_players': 3})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+import torch
+
+import rlcard
+from rlcard.agents import CFRAgent, DQNAgent, NFSPAgent, RandomAgent
+from rlcard.utils.exploitability import GameTree, DECISION, TERMINAL, exploitability
+
+def get_expected_payoffs(tree, policy):
+    ''' The expected payoffs when all the players follow the policy
+    '''
+    edge_probs = tree.edge_probs.copy()
+    parents = tree.parents[1:]
+    decision = np.zeros(tree.num_nodes, dtype=bool)
+    decision[1:] = (tree.kinds[parents] == DECISION) & (tree.edge_slots[1:] >= 0)
+    edge_probs[decision] = policy[tree.policy_infosets[tree.parents[decision]], tree.edge_slots[decision]]
+    reach = np.zeros(tree.num_nodes)
+    reach[0] = 1.0
+    for level in tree.levels:
+        reach[level] = reach[tree.parents[level]] * edge_probs[level]
+    terminal = tree.kinds == TERMINAL
+    return reach[terminal] @ tree.payoffs[terminal]
+
+class TestExploitability(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.env = rlcard.make('leduc-holdem', config={'seed': 0, 'allow_step_back': True})
+        cls.tree = GameTree(cls.env)
+
+    def test_tree(self):
+        tree = self.tree
+        self.assertEqual(sum(len(level) for level in tree.levels), tree.num_nodes - 1)
+        self.assertTrue(np.all(tree.parents[1:] < np.arange(1, tree.num_nodes)))
+        # The probabilities of the deals and of the public cards sum to one
+        self.assertAlmostEqual(tree.edge_probs[tree.parents == 0].sum(), 1.0)
+        with self.assertRaises(ValueError):
+            GameTree(rlcard.make('leduc-holdem'))
+        with self.assertRaises(ValueError):
+            GameTree(rlcard.make('limit-holdem', config={'allow_step_back': True}))
+
+    def test_best_response(self):
+        agent = RandomAgent(num_actions=self.env.num_actions)
+        policy = self.tree.get_policy(agent)
+        payoffs = get_expected_payoffs(self.tree, policy)
+        self.assertAlmostEqual(payoffs.sum(), 0.0)
+        for player_id in range(self.env.num_players):
+            self.assertGreater(self.tree.best_response_value(policy, player_id), payoffs[player_id])
+        self.assertAlmostEqual(self.tree.exploitability(agent), exploitability(self.env, agent))
+
+    def test_cfr(self):
+        agent = CFRAgent(rlcard.make('leduc-holdem', config={'seed': 0, 'allow_step_back': True}))
+        random_exploitability = self.tree.exploitability(RandomAgent(num_actions=self.env.num_actions))
+        for _ in range(20):
+            agent.train()
+        self.assertLess(self.tree.exploitability(agent), random_exploitability)
+
+    def test_neural_agents(self):
+        dqn_agent = DQNAgent(num_actions=self.env.num_actions,
+                             state_shape=self.env.state_shape[0],
+                             mlp_layers=[16],
+                             device=torch.device('cpu'))
+        nfsp_agent = NFSPAgent(num_actions=self.env.num_actions,
+                               state_shape=self.env.state_shape[0],
+                               hidden_layers_sizes=[16],
+                               q_mlp_layers=[16],
+                               device=torch.device('cpu'))
+        for agent in [dqn_agent, nfsp_agent]:
+            policy = self.tree.get_policy(agent)
+            num_legal_actions = np.array([len(state['legal_actions']) for state in self.tree.states])
+            np.testing.assert_allclose(policy.sum(axis=1), 1.0, rtol=1e-5)
+            self.assertTrue(np.all(policy[np.arange(self.tree.num_slots) >= num_legal_actions[:, None]] == 0))
+            self.assertGreater(self.tree.exploitability(agent), 0.0)
+
+        # DQN plays its greedy action with probability 1
+        self.assertTrue(np.all(np.isin(self.tree.get_policy(dqn_agent), [0.0, 1.0])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
-from rlcard.utils.utils import init_54_deck, init_standard_deck, rank2int, print_card, elegent_form, reorganize, tournament
+from rlcard.utils.utils import init_54_deck, init_standard_deck, rank2int, print_card, elegent_form, reorganize, tournament, parallel_tournament
+from rlcard.utils.utils import stack_states, sample_masked, _get_normal_quantile
 import rlcard
 from rlcard.agents.random_agent import RandomAgent
 
@@ -41,5 +42,50 @@ class TestUtils(unittest.TestCase):
         payoffs = tournament(env,1000)
         self.assertEqual(len(payoffs), 2)
 
+    def test_parallel_tournament(self):
+        agents = [RandomAgent(4), RandomAgent(4)]
+        payoffs, intervals = parallel_tournament('leduc-holdem', agents, 300, seed=1, num_workers=1, shard_size=64)
+        self.assertEqual(len(payoffs), 2)
+        self.assertEqual(len(intervals), 2)
+        self.assertAlmostEqual(sum(payoffs), 0)
+        self.assertGreater(intervals[0], 0)
+
+        parallel_payoffs, parallel_intervals = parallel_tournament('leduc-holdem', agents, 300, seed=1, num_workers=2, shard_size=64)
+        self.assertEqual(payoffs, parallel_payoffs)
+        self.assertEqual(intervals, parallel_intervals)
+
+        # The games played in the current process leave its generators unchanged
+        np.random.seed(3)
+        expected = np.random.rand()
+        np.random.seed(3)
+        parallel_tournament('leduc-holdem', agents, 10, seed=1, num_workers=1)
+        self.assertEqual(np.random.rand(), expected)
+
+    def test_normal_quantile(self):
+        self.assertAlmostEqual(_get_normal_quantile(0.975), 1.959963984540054, places=12)
+        self.assertAlmostEqual(_get_normal_quantile(0.5), 0.0, places=12)
+        self.assertAlmostEqual(_get_normal_quantile(0.005), -2.5758293035489004, places=12)
+
+    def test_stack_states(self):
+        states = [{'obs': np.zeros(3), 'legal_actions': {0: None, 2: None}}, {'obs': np.ones(3), 'legal_actions': {1: None}}]
+        obs, legal_mask = stack_states(states, 4)
+        self.assertEqual(obs.shape, (2, 3))
+        self.assertEqual(legal_mask.tolist(), [[True, False, True, False], [False, True, False, False]])
+        states[1]['obs'] = np.ones(2)
+        obs, _ = stack_states(states, 4)
+        self.assertEqual([o.shape for o in obs], [(3,), (2,)])
+
+    def test_sample_masked(self):
+        np.random.seed(0)
+        legal_mask = np.array([[True, False, True, False]] * 4000 + [[False, True, True, False]] * 4000)
+        probs = np.tile([0.1, 0.5, 0.3, 0.1], (8000, 1))
+        probs[4000:, 1:3] = 0
+        actions, normalized = sample_masked(probs, legal_mask)
+        self.assertTrue(np.all(legal_mask[np.arange(8000), actions]))
+        np.testing.assert_allclose(normalized[0], [0.25, 0, 0.75, 0])
+        np.testing.assert_allclose(normalized[-1], [0, 0.5, 0.5, 0])
+        self.assertAlmostEqual(np.mean(actions[:4000] == 2), 0.75, delta=0.03)
+        self.assertAlmostEqual(np.mean(actions[4000:] == 1), 0.5, delta=0.03)
+
 if __name__ == '__main__':
     unittest.main()